@@ -0,0 +1,438 @@
+"""
+Provider-side batch submission of judge prompts.
+
+In batch mode the judge prompts of a round are rendered up front, written to
+an OpenAI batch input file (one ``/v1/chat/completions`` request per line,
+identified by a ``custom_id``), submitted through a ``BatchBackend`` and
+polled until the provider has answered all of them. The answers are read
+back by ``custom_id`` and replayed to the regular metric code through
+``ReplayChatModel``, so batch and online runs share their prompts, parsing
+and scoring.
+
+Every submitted batch is recorded next to its input file, so a restarted run
+resumes polling the same batch instead of submitting it again.
+
+Backends:
+- ``openai``: the OpenAI Batch API (24h completion window, discounted).
+- ``local``: a file-based stand-in that answers the input file with a chat
+  model in the background and writes an output file in the same format.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import BaseModel
+from ragas.prompt import PydanticPrompt
+from ragas.prompt.utils import extract_json
+
+from rate_limits import RateLimitedChatModel
+from scheduler import map_bounded
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+
+FINISHED_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def prompt_key(text: str) -> str:
+    """Identifies a rendered prompt independently of the request it came from."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(message.content) for message in messages)
+
+
+@dataclass
+class JudgeRequest:
+    """One judge prompt of a batch round."""
+
+    custom_id: str
+    prompt: PydanticPrompt
+    data: BaseModel
+
+    @property
+    def text(self) -> str:
+        """The prompt exactly as ``PydanticPrompt.generate`` sends it."""
+        return self.prompt.to_string(self.prompt.process_input(self.data))
+
+
+def parse_output(prompt: PydanticPrompt, text: str) -> Optional[BaseModel]:
+    """Parses a judge answer into the prompt's output model, None if invalid."""
+    try:
+        return prompt.output_model.model_validate_json(extract_json(text))
+    except ValueError:
+        return None
+
+
+def model_parameters(llm: BaseChatModel) -> Dict[str, Any]:
+    """Model name and temperature sent in the body of every batch request."""
+    if isinstance(llm, RateLimitedChatModel):
+        llm = llm.model
+    parameters = {"model": getattr(llm, "model_name", None)}
+    if getattr(llm, "temperature", None) is not None:
+        parameters["temperature"] = llm.temperature
+    return parameters
+
+
+def write_batch_input(
+    path: str, requests: Iterable[JudgeRequest], llm: BaseChatModel
+) -> Dict[str, str]:
+    """Writes one chat completion request per distinct prompt.
+
+    Returns:
+        dict: Prompt key of every written ``custom_id``
+    """
+    parameters = model_parameters(llm)
+    keys = {}
+    seen = set()
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            text = request.text
+            key = prompt_key(text)
+            if key in seen:
+                continue
+            seen.add(key)
+            keys[request.custom_id] = key
+            line = {
+                "custom_id": request.custom_id,
+                "method": "POST",
+                "url": CHAT_COMPLETIONS_URL,
+                "body": {
+                    **parameters,
+                    "messages": [{"role": "user", "content": text}],
+                },
+            }
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return keys
+
+
+def read_batch_output(path: str) -> Dict[str, str]:
+    """Reads the answers of a batch output file by ``custom_id``.
+
+    Failed requests are reported and left out.
+    """
+    answers = {}
+    failed = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                failed += 1
+                continue
+            body = response["body"]
+            answers[record["custom_id"]] = body["choices"][0]["message"]["content"]
+    if failed:
+        print(f"Warning: {failed} batch requests failed and are left unanswered")
+    return answers
+
+
+class BatchBackend(ABC):
+    """Where batch input files are submitted and their outputs come from."""
+
+    # Seconds between status checks of a submitted batch
+    poll_interval: float = 60.0
+
+    @abstractmethod
+    async def submit(self, input_path: str) -> str:
+        """Submits a batch input file and returns the batch id."""
+
+    @abstractmethod
+    async def status(self, batch_id: str) -> str:
+        """Current status of the batch, e.g. ``in_progress`` or ``completed``."""
+
+    @abstractmethod
+    async def download(self, batch_id: str, output_path: str) -> None:
+        """Writes the output file of a finished batch to ``output_path``."""
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    File-based stand-in for a provider batch API.
+
+    Submitted input files are copied to ``directory`` and answered in the
+    background with ``llm``; the batch is complete once its output file
+    exists. Batches found unfinished after a restart are started again.
+    """
+
+    poll_interval = 0.5
+
+    def __init__(self, llm: BaseChatModel, directory: str, max_concurrency: int = 8):
+        self.llm = llm
+        self.directory = directory
+        self.max_concurrency = max_concurrency
+        self._jobs: Dict[str, asyncio.Task] = {}
+
+    def _path(self, batch_id: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{batch_id}.{kind}.jsonl")
+
+    async def _answer(self, line: str) -> Dict[str, Any]:
+        request = json.loads(line)
+        body = request["body"]
+        messages = [HumanMessage(content=m["content"]) for m in body["messages"]]
+        record = {
+            "id": f"batch_req_{uuid.uuid4().hex}",
+            "custom_id": request["custom_id"],
+        }
+        try:
+            result = await self.llm.agenerate([messages])
+        except Exception as e:
+            record.update(response=None, error={"code": "error", "message": str(e)})
+            return record
+        message = result.generations[0][0].message
+        usage = getattr(message, "usage_metadata", None) or {}
+        record["response"] = {
+            "status_code": 200,
+            "body": {
+                "object": "chat.completion",
+                "model": body.get("model"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": message.content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": usage.get("input_tokens", 0),
+                    "completion_tokens": usage.get("output_tokens", 0),
+                    "total_tokens": usage.get("total_tokens", 0),
+                },
+            },
+        }
+        record["error"] = None
+        return record
+
+    async def _run(self, batch_id: str) -> None:
+        with open(self._path(batch_id, "input"), encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+        records = await map_bounded(self._answer, lines, limit=self.max_concurrency)
+        output_path = self._path(batch_id, "output")
+        with open(output_path + ".tmp", "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(output_path + ".tmp", output_path)
+
+    def _start(self, batch_id: str) -> None:
+        self._jobs[batch_id] = asyncio.ensure_future(self._run(batch_id))
+
+    async def submit(self, input_path: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        with open(input_path, "rb") as src, open(
+            self._path(batch_id, "input"), "wb"
+        ) as dst:
+            dst.write(src.read())
+        self._start(batch_id)
+        return batch_id
+
+    async def status(self, batch_id: str) -> str:
+        if os.path.exists(self._path(batch_id, "output")):
+            return "completed"
+        if not os.path.exists(self._path(batch_id, "input")):
+            return "failed"
+        job = self._jobs.get(batch_id)
+        if job is None:
+            self._start(batch_id)
+        elif job.done() and job.exception() is not None:
+            print(f"Warning: local batch {batch_id} failed: {job.exception()}")
+            return "failed"
+        return "in_progress"
+
+    async def download(self, batch_id: str, output_path: str) -> None:
+        with open(self._path(batch_id, "output"), "rb") as src, open(
+            output_path, "wb"
+        ) as dst:
+            dst.write(src.read())
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """The OpenAI Batch API, through the async OpenAI client."""
+
+    def __init__(self, client: Any = None, completion_window: str = "24h"):
+        if client is None:
+            from openai import AsyncOpenAI
+
+            client = AsyncOpenAI()
+        self.client = client
+        self.completion_window = completion_window
+
+    async def submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as f:
+            uploaded = await self.client.files.create(file=f, purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=CHAT_COMPLETIONS_URL,
+            completion_window=self.completion_window,
+            metadata={"description": os.path.basename(input_path)},
+        )
+        return batch.id
+
+    async def status(self, batch_id: str) -> str:
+        return (await self.client.batches.retrieve(batch_id)).status
+
+    async def download(self, batch_id: str, output_path: str) -> None:
+        batch = await self.client.batches.retrieve(batch_id)
+        with open(output_path, "wb") as f:
+            # Requests that failed are listed in a separate error file
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    content = await self.client.files.content(file_id)
+                    f.write(content.read())
+
+
+def get_batch_backend(
+    name: str, llm: BaseChatModel, directory: str, max_concurrency: int = 8
+) -> BatchBackend:
+    """Creates the batch backend called ``name`` (``openai`` or ``local``)."""
+    if name == "openai":
+        return OpenAIBatchBackend()
+    elif name == "local":
+        return LocalBatchBackend(
+            llm, os.path.join(directory, "local"), max_concurrency=max_concurrency
+        )
+    else:
+        raise ValueError(f"Unknown batch backend: {name}")
+
+
+async def run_batch(
+    backend: BatchBackend,
+    requests: List[JudgeRequest],
+    llm: BaseChatModel,
+    work_dir: str,
+    name: str,
+    poll_interval: Optional[float] = None,
+) -> Dict[str, str]:
+    """Submits the requests as one batch and waits for the answers.
+
+    Args:
+        backend: Batch API to submit to
+        requests: Judge prompts of the round
+        llm: Judge model whose name and temperature go into the requests
+        work_dir: Directory of the batch input, state and output files
+        name: Name of the round, unique within ``work_dir``
+        poll_interval: Seconds between status checks (default: the backend's)
+
+    Returns:
+        dict: Answer text by prompt key, for every answered request
+    """
+    if not requests:
+        return {}
+    os.makedirs(work_dir, exist_ok=True)
+    input_path = os.path.join(work_dir, f"{name}.input.jsonl")
+    state_path = os.path.join(work_dir, f"{name}.batch.json")
+    output_path = os.path.join(work_dir, f"{name}.output.jsonl")
+
+    keys = write_batch_input(input_path, requests, llm)
+    with open(input_path, "rb") as f:
+        input_hash = hashlib.sha256(f.read()).hexdigest()
+
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    if state.get("input_sha256") == input_hash:
+        batch_id = state["batch_id"]
+        print(f"Resuming batch {batch_id} ({len(keys)} requests)")
+    else:
+        batch_id = await backend.submit(input_path)
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump({"batch_id": batch_id, "input_sha256": input_hash}, f)
+        print(f"Submitted batch {batch_id} with {len(keys)} requests")
+
+    if poll_interval is None:
+        poll_interval = backend.poll_interval
+    start = time.monotonic()
+    while (status := await backend.status(batch_id)) not in FINISHED_STATUSES:
+        await asyncio.sleep(poll_interval)
+    print(f"Batch {batch_id} {status} after {time.monotonic() - start:.0f}s")
+    if status != "completed":
+        os.remove(state_path)
+        raise RuntimeError(f"Batch {batch_id} {status}")
+
+    await backend.download(batch_id, output_path)
+    answers = read_batch_output(output_path)
+    return {keys[custom_id]: text for custom_id, text in answers.items()}
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Answers prompts from the responses of finished batches.
+
+    Prompts without a batch answer (e.g. the retry of an output parser after
+    an unparsable answer) go to the online ``fallback`` model. Without one
+    they raise, so the publication they belong to is reported as failed
+    exactly like after a failed online request.
+    """
+
+    responses: Dict[str, str]
+    model_name: Optional[str] = None
+    temperature: Optional[float] = None
+    fallback: Optional[BaseChatModel] = None
+    # Prompts answered by the fallback
+    missed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "batch-replay"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "temperature": self.temperature}
+
+    def _answer(self, messages: List[BaseMessage]) -> Optional[ChatResult]:
+        answer = self.responses.get(prompt_key(prompt_text(messages)))
+        if answer is None:
+            return None
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=answer))]
+        )
+
+    def _missing(self, messages: List[BaseMessage]) -> LookupError:
+        text = prompt_text(messages)
+        return LookupError(
+            f"No batch response for prompt {prompt_key(text)} "
+            f"({' '.join(text.split())[:80]!r}...)"
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        result = self._answer(messages)
+        if result is None:
+            raise self._missing(messages)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        result = self._answer(messages)
+        if result is not None:
+            return result
+        if self.fallback is None:
+            raise self._missing(messages)
+        self.missed += 1
+        online = await self.fallback.agenerate([messages], stop=stop, **kwargs)
+        return ChatResult(
+            generations=online.generations[0], llm_output=online.llm_output
+        )
@@ -0,0 +1,82 @@
+"""
+Benchmark and equivalence check for batched semantic similarity.
+
+Scores the semantic similarity fields of the golden dataset with the
+per-item ragas path and with the batched EmbeddingIndex path, using the local
+mock embedding model, and reports embedding requests, wall-clock time and the
+largest score difference between the two.
+
+Usage:
+    python code/benchmarks/bench_batched_embeddings.py --rows 19
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("RAGAS_DO_NOT_TRACK", "true")
+
+import numpy as np  # noqa: E402
+
+import run_lesson6_multiagent_case_study_evals as evaluator  # noqa: E402
+from evaluation_context import EvaluationContext  # noqa: E402
+from mock_models import MockChatModel, MockEmbeddings  # noqa: E402
+from utils import load_dataset  # noqa: E402
+
+
+async def score_dataset(df, batch_embeddings: bool, args):
+    embeddings = MockEmbeddings(latency=args.embedding_latency)
+    eval_ctx = EvaluationContext(
+        llm=MockChatModel(),
+        embeddings=embeddings,
+        max_concurrency=args.concurrency,
+        batch_embeddings=batch_embeddings,
+    )
+    start = time.perf_counter()
+    if batch_embeddings:
+        await evaluator.prefetch_embeddings(eval_ctx, df)
+
+    scores = []
+    for _, row in df.iterrows():
+        results = await asyncio.gather(
+            *(
+                evaluator.evaluate_semantic_similarity(eval_ctx, *inputs)
+                for inputs in evaluator.semantic_similarity_inputs(row)
+            )
+        )
+        for result in results:
+            for value in result.values():
+                scores.extend(np.ravel(value))
+    return np.array(scores), embeddings, time.perf_counter() - start
+
+
+async def main(args):
+    df = load_dataset(num_publications_to_evaluate=args.rows)
+    per_item, per_item_embeddings, per_item_time = await score_dataset(df, False, args)
+    batched, batched_embeddings, batched_time = await score_dataset(df, True, args)
+
+    print(f"Rows scored:            {len(df)}")
+    print(f"{'':<24}{'requests':>10}{'texts':>8}{'time (s)':>10}")
+    for label, embeddings, elapsed in [
+        ("Per-item ragas path", per_item_embeddings, per_item_time),
+        ("Batched index path", batched_embeddings, batched_time),
+    ]:
+        print(
+            f"{label:<24}{embeddings.requests:>10}"
+            f"{embeddings.texts_embedded:>8}{elapsed:>10.2f}"
+        )
+    max_diff = float(np.max(np.abs(per_item - batched)))
+    print(f"Max score difference:   {max_diff:.2e}")
+    print(f"Within tolerance:       {np.allclose(per_item, batched, atol=1e-6)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=19)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--embedding-latency", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
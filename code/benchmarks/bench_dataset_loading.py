@@ -0,0 +1,86 @@
+"""
+Startup time and memory of loading the golden dataset.
+
+Compares the eager loaders (``pd.read_csv`` of every row plus ``json.load`` of
+every description) with chunked CSV reading and the offset-indexed,
+on-demand description lookup, on a synthetic dataset.
+
+Usage:
+    python code/benchmarks/bench_dataset_loading.py --rows 10000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from description_index import PublicationDescriptionIndex  # noqa: E402
+from synthetic_data import generate_synthetic_dataset  # noqa: E402
+from utils import (  # noqa: E402
+    iter_dataset_chunks,
+    load_dataset,
+    load_publication_descriptions,
+)
+
+
+def measure(func):
+    """Runs ``func`` and returns (result, seconds, peak traced MiB)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path, json_path = generate_synthetic_dataset(
+            args.rows, tmp_dir, args.description_chars
+        )
+        json_mib = os.path.getsize(json_path) / 2**20
+        print(f"Synthetic dataset: {args.rows} rows, {json_mib:.0f} MiB of JSON\n")
+
+        def eager():
+            df = load_dataset(csv_path, num_publications_to_evaluate=args.rows)
+            descriptions = load_publication_descriptions(json_path)
+            return [
+                descriptions.get(pub_id) for pub_id in df["publication_external_id"]
+            ]
+
+        def lazy(index_dir):
+            index = PublicationDescriptionIndex(json_path, index_dir=index_dir)
+            fetched = 0
+            for chunk in iter_dataset_chunks(csv_path, args.rows, args.chunksize):
+                for pub_id in chunk["publication_external_id"]:
+                    fetched += len(index.get(pub_id))
+            return fetched
+
+        def lazy_first(count):
+            index = PublicationDescriptionIndex(json_path, index_dir=tmp_dir)
+            chunk = next(iter_dataset_chunks(csv_path, count, args.chunksize))
+            return [index.get(pub_id) for pub_id in chunk["publication_external_id"]]
+
+        runs = [
+            ("Eager: all rows", eager),
+            ("Lazy: all rows, cold index", lambda: lazy(tmp_dir)),
+            ("Lazy: all rows, warm index", lambda: lazy(tmp_dir)),
+            ("Lazy: first 2 rows", lambda: lazy_first(2)),
+        ]
+        print(f"{'Loader':<30}{'time (s)':>10}{'peak (MiB)':>12}")
+        for label, func in runs:
+            _, elapsed, peak = measure(func)
+            print(f"{label:<30}{elapsed:>10.2f}{peak:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--description-chars", type=int, default=30_000)
+    parser.add_argument("--chunksize", type=int, default=500)
+    main(parser.parse_args())
@@ -0,0 +1,72 @@
+"""
+Parse throughput of the golden dataset: CSV literals vs. converted Parquet.
+
+Reads every row of a synthetic dataset into typed rows, once by parsing the
+CSV (``ast.literal_eval`` per cell, tag splitting, description lookup) and
+once from the Parquet file written by ``golden_dataset.py``, and checks that
+both produce the same rows.
+
+Usage:
+    python code/benchmarks/bench_dataset_parsing.py --rows 10000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from golden_dataset import convert_golden_dataset, iter_golden_dataset  # noqa: E402
+from synthetic_data import generate_synthetic_dataset  # noqa: E402
+
+
+def load_all(**paths) -> pd.DataFrame:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return pd.concat(iter_golden_dataset(**paths), ignore_index=True)
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path, json_path = generate_synthetic_dataset(
+            args.rows, tmp_dir, args.description_chars
+        )
+        parquet_path = os.path.join(tmp_dir, "golden_dataset.parquet")
+        sources = dict(csv_path=csv_path, json_path=json_path)
+
+        start = time.perf_counter()
+        from_csv = load_all(parquet_path=parquet_path, **sources)
+        csv_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        convert_golden_dataset(csv_path, json_path, parquet_path)
+        convert_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        from_parquet = load_all(parquet_path=parquet_path, **sources)
+        parquet_time = time.perf_counter() - start
+
+        parquet_mib = os.path.getsize(parquet_path) / 2**20
+
+    print(f"Rows: {args.rows}\n")
+    print(f"{'Loader':<28}{'time (s)':>10}{'rows/sec':>12}")
+    for label, elapsed in [
+        ("CSV + literal_eval", csv_time),
+        ("Parquet", parquet_time),
+    ]:
+        print(f"{label:<28}{elapsed:>10.2f}{args.rows / elapsed:>12,.0f}")
+    print(f"\nSpeedup:             {csv_time / parquet_time:.1f}x")
+    print(f"One-off conversion:  {convert_time:.2f}s ({parquet_mib:.1f} MiB)")
+    print(f"Rows identical:      {from_csv.equals(from_parquet)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--description-chars", type=int, default=2_000)
+    main(parser.parse_args())
@@ -0,0 +1,92 @@
+"""
+Cross-row deduplication of scoring work on the golden dataset.
+
+Runs ``evaluate_rows`` over the golden dataset against the local mock chat
+and embedding models, once with ``deduplicate`` and once without, and reports
+the scoring units planned, the unique ones, the model calls the plan expects
+to save and the judge and embedding requests actually sent, and checks that
+both runs produce the same results. With ``--prefilter``, rows are assessed
+before the plan is made, so only escalated items count as shared work.
+
+On the 19 publications of the golden dataset every unit is unique (1.00x)
+in every mode, so deduplication saves no calls there; the savings reported
+by ``bench_pipeline`` come from its synthetic rows, which copy the generated
+fields of golden rows drawn with replacement.
+
+Usage:
+    python code/benchmarks/bench_dedup.py
+    python code/benchmarks/bench_dedup.py --faithfulness-mode combined --prefilter
+    python code/benchmarks/bench_dedup.py --per-item-embeddings
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+# ragas telemetry posts synchronously from inside the event loop
+os.environ.setdefault("RAGAS_DO_NOT_TRACK", "true")
+
+import run_lesson6_multiagent_case_study_evals as evaluator  # noqa: E402
+from evaluation_context import EvaluationContext  # noqa: E402
+from golden_dataset import iter_golden_dataset  # noqa: E402
+from mock_models import MockChatModel, MockEmbeddings  # noqa: E402
+from prefilter import Prefilter, PrefilterThresholds  # noqa: E402
+from work_plan import dedup_ratio  # noqa: E402
+
+
+async def run(df, args, deduplicate: bool):
+    embeddings = MockEmbeddings(latency=0)
+    eval_ctx = EvaluationContext(
+        llm=MockChatModel(latency=args.llm_latency),
+        embeddings=embeddings,
+        batch_embeddings=not args.per_item_embeddings,
+        faithfulness_mode=args.faithfulness_mode,
+        prefilter=Prefilter(PrefilterThresholds()) if args.prefilter else None,
+        deduplicate=deduplicate,
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = await evaluator.evaluate_rows(eval_ctx, df)
+    # The context calls a copy of the chat model with its span handler attached
+    return results, eval_ctx.llm.calls, embeddings.requests, eval_ctx.dedup_stats()
+
+
+async def main(args):
+    df = pd.concat(iter_golden_dataset(args.rows), ignore_index=True)
+    shared, shared_judge, shared_embedding, stats = await run(df, args, True)
+    direct, direct_judge, direct_embedding, _ = await run(df, args, False)
+
+    print(f"Rows evaluated:        {len(df)}")
+    for kind, stat in stats.items():
+        print(
+            f"{kind + ':':<23}{stat['units']} units, {stat['unique']} unique "
+            f"({dedup_ratio(stat):.2f}x), saves {stat['judge_calls_saved']} judge "
+            f"and {stat['embedding_calls_saved']} embedding calls"
+        )
+    print(f"Judge calls:           {direct_judge} -> {shared_judge}")
+    print(f"Embedding requests:    {direct_embedding} -> {shared_embedding}")
+    # repr() keeps NaN scores comparable
+    print(f"Results identical:     {repr(shared) == repr(direct)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=None, help="default: all")
+    parser.add_argument(
+        "--faithfulness-mode", choices=["per_field", "combined"], default="per_field"
+    )
+    parser.add_argument("--prefilter", action="store_true")
+    parser.add_argument(
+        "--per-item-embeddings",
+        action="store_true",
+        help="Score semantic similarity per candidate through ragas (planned as "
+        "shared work) instead of the batched embedding index",
+    )
+    parser.add_argument("--llm-latency", type=float, default=0.005)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,123 @@
+"""
+Semantic similarity with the local embedding backend versus the remote one.
+
+Scores every semantic similarity field of the golden dataset through the
+batched EmbeddingIndex path, once with the local scikit-learn model of
+``local_embeddings`` and once with OpenAI's text-embedding-ada-002 (or,
+with ``--remote mock``, the same client against the fake OpenAI server of
+``mock_server``, for offline runs). Reports rows per second of each backend
+(median of ``--repeat`` passes, each with a fresh index and no embedding
+cache) and the Spearman rank correlation of the per-candidate scores, per
+field and overall.
+
+Usage:
+    python code/benchmarks/bench_embedding_backends.py
+    python code/benchmarks/bench_embedding_backends.py --remote mock --latency 0.2
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("RAGAS_DO_NOT_TRACK", "true")
+
+import numpy as np  # noqa: E402
+from dotenv import load_dotenv  # noqa: E402
+from scipy.stats import spearmanr  # noqa: E402
+
+import run_lesson6_multiagent_case_study_evals as evaluator  # noqa: E402
+from evaluation_context import EvaluationContext, build_embeddings  # noqa: E402
+from golden_dataset import iter_golden_dataset  # noqa: E402
+from mock_models import MockChatModel  # noqa: E402
+from mock_server import MockProvider, MockServerConfig, start_mock_server  # noqa: E402
+
+
+async def score_dataset(df, embeddings, concurrency):
+    """Per-candidate similarity scores by field, and the elapsed seconds."""
+    eval_ctx = EvaluationContext(
+        llm=MockChatModel(), embeddings=embeddings, max_concurrency=concurrency
+    )
+    start = time.perf_counter()
+    await evaluator.prefetch_embeddings(eval_ctx, df)
+    scores = defaultdict(list)
+    for _, row in df.iterrows():
+        results = await asyncio.gather(
+            *(
+                evaluator.evaluate_semantic_similarity(eval_ctx, *inputs)
+                for inputs in evaluator.semantic_similarity_inputs(row)
+            )
+        )
+        for (_, _, metric_name), result in zip(
+            evaluator.semantic_similarity_inputs(row), results
+        ):
+            scores[metric_name].extend(
+                np.ravel(result[f"{metric_name}_semantic_similarity"])
+            )
+    return scores, time.perf_counter() - start
+
+
+async def measure(df, embeddings, args):
+    """Scores of the last pass and the median rows per second over all passes."""
+    rates = []
+    for _ in range(args.repeat):
+        scores, elapsed = await score_dataset(df, embeddings, args.concurrency)
+        rates.append(len(df) / elapsed)
+    return scores, statistics.median(rates)
+
+
+async def main(args):
+    logging.getLogger("aiohttp.server").setLevel(logging.CRITICAL)
+    df = next(iter_golden_dataset(args.rows, chunksize=args.rows or 10_000))
+
+    runner = None
+    if args.remote == "mock":
+        provider = MockProvider(MockServerConfig(latency=args.latency, seed=0))
+        runner, base_url = await start_mock_server(provider)
+        os.environ["OPENAI_BASE_URL"] = os.environ["OPENAI_API_BASE"] = base_url
+        os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    try:
+        remote = build_embeddings(
+            {"embedding_backend": "openai", "embedding_cache": False}
+        )
+        remote_scores, remote_rate = await measure(df, remote, args)
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+
+    local = build_embeddings({"embedding_backend": "local"})
+    # The first pass would otherwise include fitting the model if missing
+    local.embed_query("warm-up")
+    local_scores, local_rate = await measure(df, local, args)
+
+    print(f"Rows scored:               {len(df)}")
+    print(f"Remote backend ({args.remote}):    {remote_rate:,.1f} rows/s")
+    print(f"Local backend ({local.model_name}): {local_rate:,.1f} rows/s")
+    print(f"Speedup:                   {local_rate / remote_rate:.1f}x")
+    print("\nSpearman rank correlation of candidate scores (local vs remote):")
+    all_local, all_remote = [], []
+    for metric_name, scores in remote_scores.items():
+        all_remote.extend(scores)
+        all_local.extend(local_scores[metric_name])
+        rho = spearmanr(local_scores[metric_name], scores).statistic
+        print(f"  {metric_name:<12}{rho:>7.3f}  ({len(scores)} candidates)")
+    print(f"  {'overall':<12}{spearmanr(all_local, all_remote).statistic:>7.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, help="Golden dataset rows (all if omitted)")
+    parser.add_argument("--remote", choices=["openai", "mock"], default="openai")
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="Mock server seconds per request"
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    load_dotenv()
+    asyncio.run(main(args))
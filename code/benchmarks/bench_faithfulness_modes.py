@@ -0,0 +1,145 @@
+"""
+Per-field vs. combined faithfulness judging: tokens, latency and agreement.
+
+Scores the faithfulness of every generated title, TL;DR, reference and tag
+string of the first ``--rows`` golden publications, once with ragas'
+Faithfulness per text and once with a single multi-field judge call per
+publication, and compares judge calls, tokens, wall time and per-item scores.
+
+Runs against the offline mock judge by default. Pass ``--model gpt-4o-mini``
+(with OPENAI_API_KEY set) to measure a real judge.
+
+Usage:
+    python code/benchmarks/bench_faithfulness_modes.py --rows 19
+    python code/benchmarks/bench_faithfulness_modes.py --rows 5 --model gpt-4o-mini
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+# ragas telemetry posts synchronously from inside the event loop
+os.environ.setdefault("RAGAS_DO_NOT_TRACK", "true")
+
+import numpy as np  # noqa: E402
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+
+import run_lesson6_multiagent_case_study_evals as evaluator  # noqa: E402
+from evaluation_context import EvaluationContext  # noqa: E402
+from golden_dataset import iter_golden_dataset  # noqa: E402
+from llm import get_llm  # noqa: E402
+from mock_models import MockChatModel, MockEmbeddings  # noqa: E402
+from scheduler import map_bounded  # noqa: E402
+
+
+class UsageCounter(BaseCallbackHandler):
+    """Counts judge calls and the tokens reported in their usage metadata."""
+
+    def __init__(self):
+        self.calls = self.input_tokens = self.output_tokens = 0
+
+    def on_llm_end(self, response, **kwargs):
+        self.calls += 1
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(generation.message, "usage_metadata", None) or {}
+                self.input_tokens += usage.get("input_tokens", 0)
+                self.output_tokens += usage.get("output_tokens", 0)
+
+
+async def score_row(eval_ctx, row, mode):
+    context = eval_ctx.truncator.truncate(row["publication_description"])
+    fields = evaluator.faithfulness_fields(row)
+    if mode == "combined":
+        results = await evaluator.evaluate_faithfulness_combined(
+            eval_ctx, context, fields
+        )
+    else:
+        scores = await asyncio.gather(
+            *(
+                evaluator.evaluate_faithfulness(
+                    eval_ctx,
+                    generated,
+                    context,
+                    evaluator.FAITHFULNESS_TASKS[name],
+                    name,
+                )
+                for name, generated in fields.items()
+            )
+        )
+        results = dict(zip(fields, scores))
+
+    item_scores = []
+    for name, scores in results.items():
+        value = scores[f"{name}_faithfulness"]
+        item_scores.extend(value if isinstance(value, list) else [value])
+    return item_scores
+
+
+async def run_mode(args, rows, mode):
+    llm = (
+        get_llm(args.model, temperature=0.01)
+        if args.model
+        else MockChatModel(latency=args.llm_latency)
+    )
+    usage = UsageCounter()
+    llm.callbacks = [usage]
+    eval_ctx = EvaluationContext(
+        llm=llm,
+        embeddings=MockEmbeddings(latency=0),
+        max_concurrency=args.concurrency,
+        faithfulness_mode=mode,
+    )
+
+    start = time.perf_counter()
+    scores = await map_bounded(
+        lambda row: score_row(eval_ctx, row, mode), rows, limit=args.concurrency
+    )
+    elapsed = time.perf_counter() - start
+
+    return {
+        "scores": np.array([s for row_scores in scores for s in row_scores], float),
+        "elapsed": elapsed,
+        "calls": usage.calls,
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+    }
+
+
+async def main(args):
+    df = next(iter_golden_dataset(args.rows, chunksize=args.rows))
+    rows = [row for _, row in df.iterrows()]
+
+    per_field = await run_mode(args, rows, "per_field")
+    combined = await run_mode(args, rows, "combined")
+
+    print(f"Publications: {len(rows)}, judge: {args.model or 'mock'}\n")
+    print(f"{'':<22}{'per_field':>12}{'combined':>12}")
+    for label, key, fmt in [
+        ("Judge calls", "calls", "{:>12,}"),
+        ("Input tokens", "input_tokens", "{:>12,}"),
+        ("Output tokens", "output_tokens", "{:>12,}"),
+        ("Wall time (s)", "elapsed", "{:>12.2f}"),
+    ]:
+        print(f"{label:<22}" + fmt.format(per_field[key]) + fmt.format(combined[key]))
+
+    a, b = per_field["scores"], combined["scores"]
+    both = ~np.isnan(a) & ~np.isnan(b)
+    print(f"\nItems scored:          {len(a)} ({both.sum()} scored by both modes)")
+    print(f"Mean |difference|:     {np.abs(a[both] - b[both]).mean():.3f}")
+    print(f"Identical scores:      {(a[both] == b[both]).mean():.1%}")
+    if np.std(a[both]) and np.std(b[both]):
+        print(f"Pearson correlation:   {np.corrcoef(a[both], b[both])[0, 1]:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=19)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--model", help="Real judge model (default: offline mock)")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,252 @@
+"""
+End-to-end throughput benchmark of ``evaluate_dataset`` against a mock provider.
+
+For every ``--rows`` size, generates a synthetic golden dataset, starts the
+fake OpenAI server from ``mock_server`` in-process (seeded latency, jitter,
+429 and 500 rates) and runs the full evaluation through the real clients:
+rate limiting, response and embedding caches, tracing and optionally the
+local batch backend, exactly as configured by ``config.yaml`` and the flags
+below. Each size runs in a fresh process so peak RSS is measured per run.
+
+Records rows/sec, chat and embedding calls per row, tokens, an estimated
+provider cost and peak RSS, and writes them with the configuration and git
+commit as JSON, so runs can be compared across changes.
+
+Usage:
+    python code/benchmarks/bench_pipeline.py --rows 10 100 1000
+    python code/benchmarks/bench_pipeline.py --rows 1000 --batch --output before.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("RAGAS_DO_NOT_TRACK", "true")
+
+import run_lesson6_multiagent_case_study_evals as evaluator  # noqa: E402
+from batch_jobs import get_batch_backend  # noqa: E402
+from benchmarks.synthetic_data import generate_synthetic_dataset  # noqa: E402
+from evaluation_context import build_evaluation_context  # noqa: E402
+from golden_dataset import convert_golden_dataset  # noqa: E402
+from mock_server import MockProvider, MockServerConfig, start_mock_server  # noqa: E402
+from paths import OUTPUTS_DIR, ROOT_DIR, EvaluationPaths  # noqa: E402
+from results_store import load_completed_ids  # noqa: E402
+
+# USD per million tokens
+DEFAULT_PRICES = {
+    "input": 0.15,  # gpt-4o-mini
+    "output": 0.60,
+    "embedding": 0.10,  # text-embedding-ada-002
+}
+
+# Provider batches are billed at half the online price
+BATCH_DISCOUNT = 0.5
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def config_overrides(args) -> dict:
+    return {
+        "max_concurrency": args.concurrency,
+        "faithfulness_mode": args.faithfulness_mode,
+        "llm_cache": args.cache,
+        "embedding_cache": args.cache,
+        "llm_rate_limits": args.rate_limits,
+        "llm_requests_per_minute": args.requests_per_minute,
+        "llm_tokens_per_minute": args.tokens_per_minute,
+        "tracing": args.tracing,
+        "deduplicate_work": args.dedup,
+        "batch_poll_interval": 0.2,
+    }
+
+
+async def run_pipeline(args, rows: int, work_dir: str) -> dict:
+    paths = EvaluationPaths.in_directories(
+        os.path.join(work_dir, "data"), os.path.join(work_dir, "outputs")
+    )
+    generate_synthetic_dataset(
+        rows, os.path.join(work_dir, "data"), args.description_chars, args.seed
+    )
+    if args.parquet:
+        convert_golden_dataset(
+            paths.dataset_csv, paths.dataset_json, paths.dataset_parquet
+        )
+
+    provider = MockProvider(
+        MockServerConfig(
+            latency=args.latency,
+            jitter=args.jitter,
+            rate_limit_rate=args.rate_limit_rate,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        )
+    )
+    runner, base_url = await start_mock_server(provider)
+    os.environ["OPENAI_BASE_URL"] = os.environ["OPENAI_API_BASE"] = base_url
+
+    config = evaluator.configure(config_overrides(args))
+    cache_dir = os.path.join(work_dir, "cache")
+    eval_ctx = build_evaluation_context(
+        config,
+        embedding_cache_db=os.path.join(cache_dir, "embeddings.sqlite"),
+        llm_cache_db=os.path.join(cache_dir, "llm_responses.sqlite"),
+        dataset_paths=paths,
+    )
+    batch_backend = None
+    if args.batch:
+        batch_backend = get_batch_backend(
+            "local",
+            eval_ctx.llm,
+            paths.batch_dir,
+            max_concurrency=eval_ctx.max_concurrency,
+        )
+
+    start = time.perf_counter()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for _ in range(args.repeat):
+                await evaluator.evaluate_dataset(
+                    rows,
+                    eval_ctx,
+                    resume=False,
+                    batch_backend=batch_backend,
+                    paths=paths,
+                )
+    finally:
+        await runner.cleanup()
+    elapsed = time.perf_counter() - start
+
+    stats = provider.stats
+    evaluated = rows * args.repeat
+    cost = (
+        stats.input_tokens * args.input_price + stats.output_tokens * args.output_price
+    ) / 1e6
+    if args.batch:
+        cost *= BATCH_DISCOUNT
+    cost += stats.embedding_tokens * args.embedding_price / 1e6
+    return {
+        "rows": rows,
+        "elapsed": round(elapsed, 3),
+        "rows_per_sec": round(evaluated / elapsed, 3),
+        "chat_calls_per_row": round(stats.completions / evaluated, 3),
+        "embedding_calls_per_row": round(stats.embeddings / evaluated, 3),
+        "cost_usd": round(cost, 6),
+        "cost_usd_per_1k_rows": round(cost / evaluated * 1000, 6),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "failed_rows": rows - len(load_completed_ids(paths.results_jsonl)),
+        "server": asdict(stats),
+        "cache": eval_ctx.cache_stats(),
+    }
+
+
+def run_size(args, rows: int) -> dict:
+    """Runs one dataset size; called in a fresh process."""
+    logging.getLogger("aiohttp.server").setLevel(logging.CRITICAL)
+    with tempfile.TemporaryDirectory(prefix="bench-pipeline-") as work_dir:
+        return asyncio.run(run_pipeline(args, rows, work_dir))
+
+
+def main(args):
+    report = {
+        "benchmark": "pipeline",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": vars(args),
+        "config": {**evaluator.get_config(), **config_overrides(args)},
+        "runs": [],
+    }
+    print(
+        f"{'rows':>8}{'rows/sec':>10}{'chat/row':>10}{'embed/row':>11}"
+        f"{'$/1k rows':>11}{'peak RSS':>10}{'failed':>8}"
+    )
+    for rows in args.rows:
+        # A spawned process starts from a clean interpreter, so ru_maxrss and
+        # the provider stats belong to this size only
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            run = pool.submit(run_size, args, rows).result()
+        report["runs"].append(run)
+        print(
+            f"{rows:>8}{run['rows_per_sec']:>10.2f}{run['chat_calls_per_row']:>10.2f}"
+            f"{run['embedding_calls_per_row']:>11.2f}"
+            f"{run['cost_usd_per_1k_rows']:>11.4f}"
+            f"{run['peak_rss_mb']:>8.0f}MB{run['failed_rows']:>8}"
+        )
+
+    output = args.output or os.path.join(
+        OUTPUTS_DIR,
+        "benchmarks",
+        f"pipeline-{time.strftime('%Y%m%dT%H%M%S')}.json",
+    )
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\nReport written to: {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--description-chars", type=int, default=30_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--parquet", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--faithfulness-mode",
+        choices=["per_field", "combined"],
+        default=evaluator.get_config().get("faithfulness_mode", "per_field"),
+    )
+    parser.add_argument("--no-cache", dest="cache", action="store_false")
+    parser.add_argument("--no-rate-limits", dest="rate_limits", action="store_false")
+    parser.add_argument("--no-tracing", dest="tracing", action="store_false")
+    parser.add_argument("--no-dedup", dest="dedup", action="store_false")
+    parser.add_argument("--batch", action="store_true")
+    parser.add_argument("--requests-per-minute", type=float, default=30_000)
+    parser.add_argument("--tokens-per-minute", type=float, default=50_000_000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--input-price", type=float, default=DEFAULT_PRICES["input"])
+    parser.add_argument("--output-price", type=float, default=DEFAULT_PRICES["output"])
+    parser.add_argument(
+        "--embedding-price", type=float, default=DEFAULT_PRICES["embedding"]
+    )
+    parser.add_argument("--output")
+    main(parser.parse_args())
@@ -0,0 +1,128 @@
+"""
+Prefix stability and provider prompt-cache hits of the judge prompts.
+
+Evaluates the first ``--rows`` golden publications through the real
+``ChatOpenAI`` client against the fake OpenAI server from ``mock_server``,
+which records every prompt and, like the OpenAI API, reports the tokens of
+the longest previously answered prompt prefix as cached. Then checks that:
+
+- every judge prompt that includes the publication content starts with the
+  context block of ``prompt_layout``, and
+- all those prompts of one publication share the same context block, byte
+  for byte (one distinct prefix per publication).
+
+Reports the share of input tokens served from the prompt cache, as counted
+by the server and as seen by the client's tracing spans.
+
+Usage:
+    python code/benchmarks/bench_prompt_cache.py --rows 10 --faithfulness-mode per_field
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("RAGAS_DO_NOT_TRACK", "true")
+
+import run_lesson6_multiagent_case_study_evals as evaluator  # noqa: E402
+from evaluation_context import EvaluationContext  # noqa: E402
+from golden_dataset import iter_golden_dataset  # noqa: E402
+from llm import get_llm  # noqa: E402
+from mock_models import MockEmbeddings, extract_prompt_input  # noqa: E402
+from mock_server import MockProvider, MockServerConfig, start_mock_server  # noqa: E402
+from prompt_layout import split_context_prefix  # noqa: E402
+from rate_limits import RateLimits  # noqa: E402
+from tracing import configure_tracing  # noqa: E402
+
+
+def check_prefixes(prompts, num_publications):
+    """Counts judge prompts by layout and distinct context prefixes."""
+    prefixes = Counter()
+    unprefixed_with_context = 0
+    for prompt in prompts:
+        context, rest = split_context_prefix(prompt)
+        if context is not None:
+            prefixes[context] += 1
+        elif "context" in extract_prompt_input(rest):
+            unprefixed_with_context += 1
+    return {
+        "prompts": len(prompts),
+        "prefixed": sum(prefixes.values()),
+        "unprefixed_with_context": unprefixed_with_context,
+        "distinct_prefixes": len(prefixes),
+        "stable": unprefixed_with_context == 0 and len(prefixes) == num_publications,
+    }
+
+
+async def main(args):
+    logging.getLogger("aiohttp.server").setLevel(logging.CRITICAL)
+    df = next(iter_golden_dataset(args.rows, chunksize=args.rows))
+
+    provider = MockProvider(
+        MockServerConfig(
+            latency=args.latency, jitter=args.latency, seed=0, record_prompts=True
+        )
+    )
+    runner, base_url = await start_mock_server(provider)
+    os.environ["OPENAI_BASE_URL"] = os.environ["OPENAI_API_BASE"] = base_url
+    eval_ctx = EvaluationContext(
+        llm=get_llm(
+            "gpt-4o-mini",
+            temperature=0.01,
+            rate_limits=RateLimits(
+                requests_per_minute=100_000,
+                tokens_per_minute=1e9,
+                max_concurrency=args.concurrency,
+            ),
+        ),
+        embeddings=MockEmbeddings(latency=0),
+        max_concurrency=args.concurrency,
+        faithfulness_mode=args.faithfulness_mode,
+    )
+    tracer = configure_tracing()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await evaluator.evaluate_rows(eval_ctx, df)
+    finally:
+        await runner.cleanup()
+        configure_tracing(enabled=False)
+
+    check = check_prefixes(provider.prompts, len(df))
+    stats = provider.stats
+    llm_rows = tracer.summary().xs("llm", level="name")
+    client_ratio = (
+        llm_rows["prompt_cached_tokens"].sum() / llm_rows["input_tokens"].sum()
+    )
+
+    print(f"Publications:                    {len(df)}")
+    print(f"Judge prompts:                   {check['prompts']}")
+    print(f"  with context block first:      {check['prefixed']}")
+    print(f"  with context elsewhere:        {check['unprefixed_with_context']}")
+    print(f"Distinct context prefixes:       {check['distinct_prefixes']}")
+    print(f"Prefix stable per publication:   {check['stable']}")
+    print(f"Input tokens:                    {stats.input_tokens:,}")
+    print(
+        f"Cached input tokens (server):    {stats.cached_tokens:,} "
+        f"({stats.cached_tokens / stats.input_tokens:.1%})"
+    )
+    print(f"Cached input share (client):     {client_ratio:.1%}")
+    if not check["stable"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument(
+        "--faithfulness-mode", choices=["per_field", "combined"], default="per_field"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,135 @@
+"""
+Judge client behavior against a provider that throttles and stalls.
+
+Starts the fake OpenAI server from ``mock_server`` in-process, configured to
+answer 429s above ``--server-max-in-flight`` concurrent requests, on a random
+share of requests, and to stall a share of the responses. Then evaluates the
+first ``--rows`` golden publications (LLM metrics through the real
+``ChatOpenAI`` client, embeddings offline) twice: with the bare client as
+returned by ``get_llm`` and with the rate-limited client layer. Reports failed
+publications, wall time, 429s seen by the server and the client's per-metric
+retry and throttle statistics.
+
+Usage:
+    python code/benchmarks/bench_rate_limits.py --rows 19 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("RAGAS_DO_NOT_TRACK", "true")
+
+import run_lesson6_multiagent_case_study_evals as evaluator  # noqa: E402
+from evaluation_context import EvaluationContext  # noqa: E402
+from golden_dataset import iter_golden_dataset  # noqa: E402
+from llm import get_llm  # noqa: E402
+from mock_models import MockEmbeddings  # noqa: E402
+from mock_server import MockProvider, MockServerConfig, start_mock_server  # noqa: E402
+from rate_limits import RateLimits  # noqa: E402
+
+
+async def run_client(args, df, rate_limited):
+    provider = MockProvider(
+        MockServerConfig(
+            latency=args.latency,
+            jitter=args.latency,
+            slow_rate=args.slow_rate,
+            slow_latency=args.slow_latency,
+            rate_limit_rate=args.rate_limit_rate,
+            max_in_flight=args.server_max_in_flight,
+            retry_after=args.retry_after,
+            seed=0,
+        )
+    )
+    runner, base_url = await start_mock_server(provider)
+    os.environ["OPENAI_BASE_URL"] = os.environ["OPENAI_API_BASE"] = base_url
+    limits = RateLimits(
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+        max_concurrency=args.concurrency,
+        request_timeout=args.request_timeout,
+        deadline=args.deadline,
+    )
+    llm = get_llm(
+        "gpt-4o-mini",
+        temperature=0.01,
+        rate_limits=limits if rate_limited else None,
+    )
+    if not rate_limited:
+        # The bare provider client keeps its own retries but gets the same timeout
+        llm.request_timeout = args.request_timeout
+    eval_ctx = EvaluationContext(
+        llm=llm,
+        embeddings=MockEmbeddings(latency=0),
+        max_concurrency=args.concurrency,
+    )
+
+    errors = []
+    start = time.perf_counter()
+    try:
+        await evaluator.evaluate_rows(
+            eval_ctx, df, on_result=lambda result, error: errors.append(error)
+        )
+    finally:
+        await runner.cleanup()
+    return {
+        "elapsed": time.perf_counter() - start,
+        "failed": sum(error is not None for error in errors),
+        "server": provider.stats,
+        "client": eval_ctx.rate_limit_stats(),
+    }
+
+
+async def main(args):
+    # Requests abandoned on timeout are logged as errors by the server
+    logging.getLogger("aiohttp.server").setLevel(logging.CRITICAL)
+    df = next(iter_golden_dataset(args.rows, chunksize=args.rows))
+    bare = await run_client(args, df, rate_limited=False)
+    limited = await run_client(args, df, rate_limited=True)
+
+    print(f"\nPublications: {len(df)}, concurrency: {args.concurrency}\n")
+    print(f"{'':<28}{'bare':>10}{'rate-limited':>14}")
+    for label, value in [
+        ("Failed publications", lambda r: f"{r['failed']}"),
+        ("Wall time (s)", lambda r: f"{r['elapsed']:.2f}"),
+        ("Server requests", lambda r: f"{r['server'].requests}"),
+        ("Server 429s", lambda r: f"{r['server'].rate_limited}"),
+        ("Stalled responses", lambda r: f"{r['server'].slow}"),
+        ("Peak in-flight requests", lambda r: f"{r['server'].max_in_flight}"),
+    ]:
+        print(f"{label:<28}{value(bare):>10}{value(limited):>14}")
+
+    print("\nRate-limited client, by metric:")
+    print(
+        f"{'metric':<28}{'requests':>9}{'retries':>9}{'429s':>7}{'failed':>8}"
+        f"{'throttled (s)':>15}{'backoff (s)':>13}"
+    )
+    for metric, stat in limited["client"].items():
+        print(
+            f"{metric:<28}{stat['requests']:>9}{stat['retries']:>9}"
+            f"{stat['rate_limited']:>7}{stat['failures']:>8}"
+            f"{stat['throttle_wait']:>15.2f}{stat['backoff_wait']:>13.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=19)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--server-max-in-flight", type=int, default=6)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.05)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--slow-rate", type=float, default=0.02)
+    parser.add_argument("--slow-latency", type=float, default=10.0)
+    parser.add_argument("--requests-per-minute", type=float, default=3_000)
+    parser.add_argument("--tokens-per-minute", type=float, default=5_000_000)
+    parser.add_argument("--request-timeout", type=float, default=2.0)
+    parser.add_argument("--deadline", type=float, default=120.0)
+    asyncio.run(main(parser.parse_args()))
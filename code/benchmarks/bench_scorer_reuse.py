@@ -0,0 +1,79 @@
+"""
+Microbenchmark for the per-call overhead of building scorers.
+
+Compares rebuilding the embedding client, LLM wrapper and ragas metric on
+every call (the previous behaviour of the evaluator) with reusing the
+instances owned by a single ``EvaluationContext``.
+
+Usage:
+    python code/benchmarks/bench_scorer_reuse.py --calls 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings  # noqa: E402
+from ragas.embeddings import LangchainEmbeddingsWrapper  # noqa: E402
+from ragas.llms import LangchainLLMWrapper  # noqa: E402
+from ragas.metrics import Faithfulness, SemanticSimilarity  # noqa: E402
+
+from coherence import ContentCoherenceMetric  # noqa: E402
+from evaluation_context import EvaluationContext  # noqa: E402
+
+
+# Scorer builders as they used to run inside each metric function, with the
+# number of times per publication the evaluator called that function.
+PER_CALL_BUILDERS = {
+    "semantic_similarity": (
+        lambda llm: SemanticSimilarity(
+            embeddings=LangchainEmbeddingsWrapper(
+                OpenAIEmbeddings(model="text-embedding-ada-002")
+            )
+        ),
+        4,
+    ),
+    "faithfulness": (lambda llm: Faithfulness(llm=LangchainLLMWrapper(llm)), 4),
+    "content_coherence": (
+        lambda llm: ContentCoherenceMetric(llm=LangchainLLMWrapper(llm)),
+        1,
+    ),
+}
+
+
+def time_per_call(func, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls
+
+
+def main(args):
+    llm = ChatOpenAI(model="gpt-4o-mini")
+    eval_ctx = EvaluationContext(
+        llm=llm, embeddings=OpenAIEmbeddings(model="text-embedding-ada-002")
+    )
+    shared = {
+        "semantic_similarity": lambda: eval_ctx.semantic_scorer,
+        "faithfulness": lambda: eval_ctx.faithfulness_scorer,
+        "content_coherence": lambda: eval_ctx.coherence_scorer,
+    }
+
+    print(f"{'Scorer':<22}{'Rebuilt (us)':>14}{'Shared (us)':>14}")
+    saved_per_row = 0.0
+    for name, (builder, calls_per_row) in PER_CALL_BUILDERS.items():
+        before = time_per_call(lambda: builder(llm), args.calls)
+        after = time_per_call(shared[name], args.calls)
+        saved_per_row += (before - after) * calls_per_row
+        print(f"{name:<22}{before * 1e6:>14.1f}{after * 1e6:>14.1f}")
+    print(f"\nOverhead removed per publication: {saved_per_row * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    main(parser.parse_args())
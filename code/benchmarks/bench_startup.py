@@ -0,0 +1,148 @@
+"""
+Startup time of the evaluator's command line, as a regression check.
+
+Runs ``python -X importtime`` in fresh interpreters to measure the
+cumulative import time of ``cli`` (all ``--help`` and usage errors pay) and
+of the evaluator module (what an evaluation pays before its first request),
+and the wall time of ``python code/cli.py --help``; each is the median of
+``--repeat`` runs. Also lists the heavy packages found in ``sys.modules``
+after each import.
+
+Exits with status 1 if importing ``cli`` or the evaluator leaves any heavy
+package in ``sys.modules``, or if either import takes longer than
+``--max-cli-ms`` or ``--max-evaluator-ms``, e.g. after a module-level import
+or side effect crept back in.
+
+Usage:
+    python code/benchmarks/bench_startup.py
+    python code/benchmarks/bench_startup.py --repeat 5 --max-evaluator-ms 4000
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVALUATOR_MODULE = "run_lesson6_multiagent_case_study_evals"
+
+# Packages that take a large share of the evaluator's import time
+HEAVY_PACKAGES = [
+    "ragas",
+    "langchain_openai",
+    "langchain_groq",
+    "openai",
+    "pandas",
+    "pyarrow",
+    "sklearn",
+    "scipy",
+]
+
+
+def child_env() -> dict:
+    env = dict(os.environ, RAGAS_DO_NOT_TRACK="true")
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in [CODE_DIR, env.get("PYTHONPATH")] if path
+    )
+    return env
+
+
+def import_time(module: str):
+    """Cumulative import time of ``module`` in ms, and the modules it imported.
+
+    Parses the ``-X importtime`` report of a fresh interpreter: one line per
+    module with its self and cumulative microseconds.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=child_env(),
+        cwd=CODE_DIR,
+        check=True,
+    )
+    cumulative_us = None
+    imported = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            cumulative_us = int(cumulative)
+    return cumulative_us / 1000, imported
+
+
+def help_time() -> float:
+    """Wall time of ``cli.py --help`` in ms, interpreter startup included."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(CODE_DIR, "cli.py"), "--help"],
+        capture_output=True,
+        env=child_env(),
+        check=True,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def heavy_packages(module: str) -> list:
+    """Heavy packages in ``sys.modules`` of a fresh interpreter after ``import module``."""
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {module}; "
+            f"print(*[name for name in {HEAVY_PACKAGES!r} if name in sys.modules])",
+        ],
+        capture_output=True,
+        text=True,
+        env=child_env(),
+        cwd=CODE_DIR,
+        check=True,
+    )
+    return completed.stdout.split()
+
+
+def measure(module: str, repeat: int):
+    """Median import time of ``module`` in ms and the heavy packages it loads."""
+    times = [import_time(module)[0] for _ in range(repeat)]
+    return statistics.median(times), heavy_packages(module)
+
+
+def main(args) -> int:
+    cli_ms, cli_heavy = measure("cli", args.repeat)
+    evaluator_ms, evaluator_heavy = measure(EVALUATOR_MODULE, args.repeat)
+    help_ms = statistics.median(help_time() for _ in range(args.repeat))
+
+    print(f"Import cli:               {cli_ms:>8,.1f} ms  (max {args.max_cli_ms:,})")
+    print(f"  heavy packages:         {', '.join(cli_heavy) or 'none'}")
+    print(
+        f"Import evaluator:         {evaluator_ms:>8,.1f} ms  "
+        f"(max {args.max_evaluator_ms:,})"
+    )
+    print(f"  heavy packages:         {', '.join(evaluator_heavy) or 'none'}")
+    print(f"cli.py --help wall time:  {help_ms:>8,.1f} ms")
+
+    failures = []
+    if cli_heavy:
+        failures.append(f"cli imports {', '.join(cli_heavy)}")
+    if evaluator_heavy:
+        failures.append(f"evaluator imports {', '.join(evaluator_heavy)}")
+    if cli_ms > args.max_cli_ms:
+        failures.append(f"cli import over {args.max_cli_ms} ms")
+    if evaluator_ms > args.max_evaluator_ms:
+        failures.append(f"evaluator import over {args.max_evaluator_ms} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-cli-ms", type=float, default=100)
+    parser.add_argument("--max-evaluator-ms", type=float, default=2500)
+    sys.exit(main(parser.parse_args()))
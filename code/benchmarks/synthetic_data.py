@@ -0,0 +1,88 @@
+"""
+Synthetic golden datasets shaped like ``golden_dataset.csv`` / ``.json``.
+
+Rows are sampled from the real golden dataset and given fresh, unique
+publication ids; descriptions are padded or cut to a configurable length.
+Generation is deterministic for a given seed.
+
+Usage:
+    python code/benchmarks/synthetic_data.py --rows 10000 --output-dir /tmp/golden
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from paths import GOLDEN_DATASET_CSV, GOLDEN_DATASET_JSON  # noqa: E402
+
+
+def synthetic_id(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_letters + string.digits, k=12))
+
+
+def generate_synthetic_dataset(
+    rows: int, output_dir: str, description_chars: int = 30_000, seed: int = 0
+):
+    """Writes a synthetic golden CSV and JSON with ``rows`` publications.
+
+    Args:
+        rows: Number of publications to generate.
+        output_dir: Directory receiving golden_dataset.csv and .json.
+        description_chars: Length of every publication description.
+        seed: Random seed.
+
+    Returns:
+        tuple: (csv_path, json_path)
+    """
+    rng = random.Random(seed)
+    source_df = pd.read_csv(GOLDEN_DATASET_CSV)
+    with open(GOLDEN_DATASET_JSON, "r", encoding="utf-8") as f:
+        source_publications = {p["publication_external_id"]: p for p in json.load(f)}
+
+    os.makedirs(output_dir, exist_ok=True)
+    csv_path = os.path.join(output_dir, "golden_dataset.csv")
+    json_path = os.path.join(output_dir, "golden_dataset.json")
+
+    records = []
+    with open(json_path, "w", encoding="utf-8") as json_file:
+        json_file.write("[\n")
+        for i in range(rows):
+            source = source_df.iloc[rng.randrange(len(source_df))]
+            pub_id = synthetic_id(rng)
+            records.append({**source.to_dict(), "publication_external_id": pub_id})
+
+            publication = dict(source_publications[source["publication_external_id"]])
+            description = publication["publication_description"]
+            repeats = description_chars // max(1, len(description)) + 1
+            publication.update(
+                id=i,
+                publication_external_id=pub_id,
+                publication_description=(description * repeats)[:description_chars],
+            )
+            if i:
+                json_file.write(",\n")
+            json.dump(publication, json_file, indent=4)
+        json_file.write("\n]")
+
+    pd.DataFrame(records, columns=source_df.columns).to_csv(csv_path, index=False)
+    return csv_path, json_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--description-chars", type=int, default=30_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    paths = generate_synthetic_dataset(
+        args.rows, args.output_dir, args.description_chars, args.seed
+    )
+    print("Wrote " + " and ".join(paths))
@@ -0,0 +1,157 @@
+"""
+Persistent, size-bounded key/value cache backed by SQLite.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+def content_key(*parts: str) -> str:
+    """Builds a content-addressed cache key from its parts.
+
+    Args:
+        parts: Strings identifying the cached value (e.g. model name and text).
+
+    Returns:
+        str: Hex SHA-256 digest of the parts.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SQLiteLRUCache:
+    """
+    Key/value store in a single SQLite table with least-recently-used eviction.
+
+    Each entry records the time it was last read or written; once the table
+    grows past ``max_entries`` the oldest entries are deleted. Entries carry a
+    ``namespace`` (e.g. the model name) so they can be invalidated selectively.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Shard processes share the database file, so wait out their write locks
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, namespace TEXT, value BLOB, last_access REAL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """Looks up several keys, refreshing the access time of those found.
+
+        Args:
+            keys: Keys to look up.
+
+        Returns:
+            dict: Mapping from each key found to its value.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's limit on bound parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(
+                    self._conn.execute(
+                        f"SELECT key, value FROM entries WHERE key IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                )
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE entries SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, bytes], namespace: str = "") -> None:
+        """Stores several values and evicts the least recently used overflow.
+
+        Args:
+            items: Mapping from key to value.
+            namespace: Namespace recorded with every entry.
+        """
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, namespace, value, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                [(key, namespace, value, now) for key, value in items.items()],
+            )
+            overflow = (
+                self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                - self.max_entries
+            )
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    "SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+                    (overflow,),
+                )
+            self._conn.commit()
+
+    def put(self, key: str, value: bytes, namespace: str = "") -> None:
+        self.put_many({key: value}, namespace)
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        """Deletes every entry, or only those of ``namespace``.
+
+        Args:
+            namespace: Namespace to clear, or None to clear everything.
+
+        Returns:
+            int: Number of entries deleted.
+        """
+        with self._lock:
+            if namespace is None:
+                cursor = self._conn.execute("DELETE FROM entries")
+            else:
+                cursor = self._conn.execute(
+                    "DELETE FROM entries WHERE namespace = ?", (namespace,)
+                )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters for this process and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
@@ -0,0 +1,79 @@
+"""
+Command-line entry point of the golden dataset evaluation.
+
+Parses the arguments before importing the evaluator (ragas, LangChain,
+pandas and the provider clients take seconds to import), so ``--help`` and
+usage errors return at once. Then loads ``.env`` into the environment and
+runs ``run_lesson6_multiagent_case_study_evals.main``:
+
+    python code/cli.py --num-publications 5
+    python code/cli.py --batch local --restart
+"""
+
+import argparse
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Evaluate the golden dataset.")
+    parser.add_argument(
+        "--num-publications",
+        type=int,
+        help="Publications to evaluate (default: num_publications_to_evaluate "
+        "of config.yaml)",
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Bypass the persistent LLM judge response cache for this run",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Discard stored results instead of reusing the unchanged ones",
+    )
+    parser.add_argument(
+        "--batch",
+        choices=["openai", "local"],
+        help="Submit the judge prompts as provider batches through this backend "
+        "instead of calling the judge online",
+    )
+    parser.add_argument(
+        "--sample",
+        action="store_true",
+        help="Evaluate publications in randomized, stratified order until the "
+        "confidence intervals of the sampling_metrics of config.yaml are narrow "
+        "enough (or a budget is used up), instead of the first N rows",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        default=1,
+        help="Partition the dataset into this many shards by publication id hash; "
+        "without --shard-index, evaluate all of them in parallel processes",
+    )
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        help="Only evaluate this shard (0-based), e.g. on one of several machines",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="Only merge the results of --shard-count shards evaluated earlier",
+    )
+    return parser
+
+
+def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    import run_lesson6_multiagent_case_study_evals as evaluator
+
+    evaluator.main(args)
+
+
+if __name__ == "__main__":
+    main()
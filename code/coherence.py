@@ -6,6 +6,9 @@ from ragas.dataset_schema import SingleTurnSample
 from ragas.prompt import PydanticPrompt
 from pydantic import BaseModel, Field
 
+from prompt_layout import ContextFirstPrompt
+from tracing import span
+
 
 class CoherenceInput(BaseModel):
     context: str = Field(description="The original publication content/context")
@@ -20,7 +23,9 @@ class CoherenceOutput(BaseModel):
     reasoning: str = Field(description="Brief explanation of the score")
 
 
-class CoherencePrompt(PydanticPrompt[CoherenceInput, CoherenceOutput]):
+class CoherencePrompt(
+    ContextFirstPrompt, PydanticPrompt[CoherenceInput, CoherenceOutput]
+):
     instruction = """You are an expert evaluator tasked with measuring the coherence and relevance of AI-generated content components.
 
 Evaluate how well the generated title, TL;DR, references, and tags relate to each other and to the original context.
@@ -113,14 +118,11 @@ class ContentCoherenceMetric(MetricWithLLM, SingleTurnMetric):
             tags_generated=tags_generated,
         )
 
-        try:
-            # Generate response using the PydanticPrompt
+        # Judge errors propagate (after the client's retries) so that the
+        # publication is reported as failed instead of scoring a made-up 0.5
+        with span("content_coherence.judge"):
             prompt_response = await self.coherence_prompt.generate(
                 data=prompt_input, llm=self.llm, callbacks=callbacks
             )
 
-            return prompt_response.score
-
-        except Exception as e:
-            print(f"Error in LLM generation: {e}")
-            return 0.5  # Default score if LLM fails
+        return prompt_response.score
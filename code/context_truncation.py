@@ -0,0 +1,137 @@
+"""
+Token-budgeted truncation of publication descriptions.
+
+Descriptions are cut to the judge model's token budget with its tiktoken BPE,
+preferring to end on a sentence boundary. The BPE files are kept under
+``outputs/cache/tiktoken`` so that, once downloaded, truncation works offline;
+if no BPE can be loaded, the budget is estimated at 4 characters per token.
+"""
+
+import os
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional
+
+import tiktoken
+
+from paths import CACHE_DIR
+
+DEFAULT_ENCODING = "o200k_base"
+
+CHARS_PER_TOKEN = 4
+
+# Only end on a boundary if it keeps at least this share of the budget
+MIN_KEPT_FRACTION = 0.8
+
+SENTENCE_END = re.compile(r"[.!?](?=\s|$)|\n\s*\n")
+
+
+@lru_cache(maxsize=None)
+def load_encoding(model_name: Optional[str] = None) -> Optional[tiktoken.Encoding]:
+    """Loads the tiktoken encoding of a model.
+
+    Models unknown to tiktoken (e.g. Groq-hosted ones) use ``o200k_base``.
+
+    Returns:
+        The encoding, or None if its BPE file is neither cached nor downloadable.
+    """
+    os.environ.setdefault("TIKTOKEN_CACHE_DIR", os.path.join(CACHE_DIR, "tiktoken"))
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name or "")
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        print(
+            f"Warning: Could not load a tokenizer ({e.__class__.__name__}), "
+            f"estimating {CHARS_PER_TOKEN} characters per token"
+        )
+        return None
+
+
+def sentence_boundaries(text: str) -> List[int]:
+    """Character offsets just past each sentence end or paragraph break, in order."""
+    return [match.end() for match in SENTENCE_END.finditer(text)]
+
+
+def token_cut(text: str, max_tokens: int, encoding: tiktoken.Encoding) -> int:
+    """Character offset after the first ``max_tokens`` tokens of ``text``.
+
+    Returns ``len(text)`` if the text fits. Only a prefix long enough to hold
+    the budget is encoded, unless it turns out to be too short.
+    """
+    window = text[: max_tokens * CHARS_PER_TOKEN * 2]
+    tokens = encoding.encode(window, disallowed_special=())
+    if len(tokens) <= max_tokens and len(window) < len(text):
+        tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return len(text)
+    # Drop a character split across the last kept token
+    kept = encoding.decode_bytes(tokens[:max_tokens])
+    return len(kept.decode("utf-8", errors="ignore"))
+
+
+def truncate_context(
+    text: str, max_tokens: int = 8000, encoding: Optional[tiktoken.Encoding] = None
+) -> str:
+    """
+    Truncate context to fit within token limits.
+
+    Args:
+        text: Input text to truncate
+        max_tokens: Maximum number of tokens allowed
+        encoding: Tokenizer of the judge model; without one, 1 token is
+            estimated as 4 characters
+
+    Returns:
+        Truncated text string, ending on a sentence boundary if one falls in
+        the last 20% of the budget and with "..." appended otherwise
+    """
+    if not text:
+        return ""
+
+    if encoding is None:
+        cut = min(len(text), max_tokens * CHARS_PER_TOKEN)
+    else:
+        cut = token_cut(text, max_tokens, encoding)
+    if cut == len(text):
+        return text
+
+    boundaries = sentence_boundaries(text[:cut])
+    if boundaries and boundaries[-1] > cut * MIN_KEPT_FRACTION:
+        return text[: boundaries[-1]].rstrip()
+    return text[:cut] + "..."
+
+
+class ContextTruncator:
+    """
+    Truncates publication descriptions for one judge model, memoizing results.
+
+    Every metric of a publication shares the same truncated context, and a
+    publication evaluated again (e.g. retried or re-run in the same process)
+    is not re-tokenized.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        max_tokens: int = 8000,
+        max_entries: int = 256,
+    ):
+        self.encoding = load_encoding(model_name)
+        self.max_tokens = max_tokens
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+
+    def truncate(self, text: str) -> str:
+        """Returns ``text`` cut to the token budget, computed once per text."""
+        if text in self._results:
+            self._results.move_to_end(text)
+            return self._results[text]
+
+        truncated = truncate_context(text, self.max_tokens, self.encoding)
+        self._results[text] = truncated
+        if len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return truncated
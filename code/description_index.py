@@ -0,0 +1,146 @@
+"""
+Lazy, offset-indexed access to publication descriptions in the golden JSON.
+
+``golden_dataset.json`` is a single JSON array of publication objects. Instead
+of parsing the whole file, the index records the byte range of every object
+once (persisted next to the JSON file and rebuilt when its size or
+modification time changes), and each description is then read and parsed
+on demand.
+"""
+
+import json
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+from cache_store import content_key
+
+SEPARATOR = re.compile(r"[\s,]*")
+
+
+def scan_object_offsets(f, block_size: int = 1 << 20) -> Dict[str, Tuple[int, int]]:
+    """Finds the byte range of every top-level object in a JSON array.
+
+    Objects are decoded one at a time with the C JSON decoder from a sliding
+    window of the file, so memory use is bounded by the largest publication.
+
+    Args:
+        f: JSON file opened in text mode with UTF-8 encoding.
+        block_size: Number of characters read per refill of the window.
+
+    Returns:
+        dict: Mapping from publication_external_id to (start, end) byte offsets.
+    """
+    decoder = json.JSONDecoder()
+    offsets = {}
+    buffer = f.read(block_size)
+    cursor = buffer.index("[") + 1
+    cursor_byte = len(buffer[:cursor].encode("utf-8"))
+    eof = False
+
+    while True:
+        position = SEPARATOR.match(buffer, cursor).end()
+        if position < len(buffer) and buffer[position] == "]":
+            return offsets
+        try:
+            if position == len(buffer):
+                raise ValueError("window exhausted")
+            publication, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            if eof:
+                raise
+            # The next object runs past the window: slide it and read more
+            chunk = f.read(block_size)
+            eof = not chunk
+            buffer = buffer[cursor:] + chunk
+            cursor = 0
+            continue
+
+        start_byte = cursor_byte + len(buffer[cursor:position].encode("utf-8"))
+        end_byte = start_byte + len(buffer[position:end].encode("utf-8"))
+        offsets[publication["publication_external_id"]] = (start_byte, end_byte)
+        cursor, cursor_byte = end, end_byte
+
+
+class PublicationDescriptionIndex:
+    """
+    Mapping-like view of ``publication_external_id -> publication_description``.
+
+    Descriptions are read from disk only when requested, so memory use does
+    not grow with the size of the golden dataset.
+    """
+
+    def __init__(
+        self, json_path: str, index_dir: Optional[str] = None, persist: bool = True
+    ):
+        """
+        Args:
+            json_path: Golden dataset JSON file.
+            index_dir: Directory to persist the index in (default: next to
+                the JSON file, so it goes away with the dataset).
+            persist: Save the index to disk; False keeps it in memory only,
+                e.g. for a one-off pass.
+        """
+        self.json_path = json_path
+        self.index_path = None
+        if persist and index_dir:
+            # Files of the same name in different directories get their own index
+            path_key = content_key(os.path.abspath(json_path))[:16]
+            self.index_path = os.path.join(
+                index_dir, f"{os.path.basename(json_path)}.{path_key}.index.json"
+            )
+        elif persist:
+            self.index_path = f"{json_path}.index.json"
+        self.offsets = self._load_or_build()
+
+    def _fingerprint(self) -> Dict[str, object]:
+        stat = os.stat(self.json_path)
+        return {
+            "path": os.path.abspath(self.json_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+
+    def _load_or_build(self) -> Dict[str, Tuple[int, int]]:
+        fingerprint = self._fingerprint()
+        if self.index_path and os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("source") == fingerprint:
+                return {k: tuple(v) for k, v in stored["offsets"].items()}
+
+        with open(self.json_path, "r", encoding="utf-8") as f:
+            offsets = scan_object_offsets(f)
+
+        if self.index_path:
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump({"source": fingerprint, "offsets": offsets}, f)
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __contains__(self, pub_id: str) -> bool:
+        return pub_id in self.offsets
+
+    def get_publication(self, pub_id: str) -> Optional[dict]:
+        """Reads and parses the full JSON object of one publication."""
+        if pub_id not in self.offsets:
+            return None
+        start, end = self.offsets[pub_id]
+        with open(self.json_path, "rb") as f:
+            f.seek(start)
+            return json.loads(f.read(end - start))
+
+    def get(self, pub_id: str, default: str = "") -> str:
+        """Returns the description of a publication, read on demand."""
+        publication = self.get_publication(pub_id)
+        if publication is None:
+            return default
+        return publication.get("publication_description", default)
+
+    def __getitem__(self, pub_id: str) -> str:
+        if pub_id not in self.offsets:
+            raise KeyError(pub_id)
+        return self.get(pub_id)
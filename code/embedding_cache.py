@@ -0,0 +1,67 @@
+"""
+On-disk cache in front of a LangChain embeddings model.
+"""
+
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from cache_store import SQLiteLRUCache, content_key
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings model that serves previously embedded texts from a SQLiteLRUCache.
+
+    Entries are keyed by model name plus a hash of the text, so the cache can
+    be shared between runs and between models. Only the texts that miss are
+    sent to the wrapped model, in a single request.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: SQLiteLRUCache):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def _keys(self, texts: List[str]) -> List[str]:
+        return [content_key(self.model_name, text) for text in texts]
+
+    def _lookup(self, texts: List[str]):
+        keys = self._keys(texts)
+        found = self.cache.get_many(keys)
+        missing = list(
+            dict.fromkeys(text for text, key in zip(texts, keys) if key not in found)
+        )
+        return keys, found, missing
+
+    def _store(self, missing: List[str], vectors: List[List[float]], found: dict):
+        new_entries = {
+            key: np.asarray(vector, dtype=np.float32).tobytes()
+            for key, vector in zip(self._keys(missing), vectors)
+        }
+        self.cache.put_many(new_entries, namespace=self.model_name)
+        found.update(new_entries)
+
+    @staticmethod
+    def _decode(keys: List[str], found: dict) -> List[List[float]]:
+        return [np.frombuffer(found[key], dtype=np.float32).tolist() for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts)
+        if missing:
+            self._store(missing, self.embeddings.embed_documents(missing), found)
+        return self._decode(keys, found)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(missing)
+            self._store(missing, vectors, found)
+        return self._decode(keys, found)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
@@ -0,0 +1,132 @@
+"""
+Batched, deduplicated embeddings for semantic similarity scoring.
+"""
+
+import asyncio
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from scheduler import bounded
+
+if TYPE_CHECKING:
+    # Importing ragas takes seconds; keep it off the import path of utils
+    from ragas.embeddings import BaseRagasEmbeddings
+
+
+def prepare_embedding_text(text) -> str:
+    """Normalizes a value the same way ragas' SemanticSimilarity does.
+
+    Args:
+        text: Value to embed.
+
+    Returns:
+        str: Text sent to the embedding model (empty strings become a space).
+    """
+    return str(text) or " "
+
+
+def cosine_similarities(candidates: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every row of ``candidates`` with ``reference``.
+
+    Args:
+        candidates: Matrix of shape (n, dim) with unit-norm rows.
+        reference: Unit-norm vector of shape (dim,).
+
+    Returns:
+        np.ndarray: Similarities of shape (n,).
+    """
+    return candidates @ reference
+
+
+class EmbeddingIndex:
+    """
+    In-memory store of unit-norm embeddings keyed by text.
+
+    Texts are deduplicated and embedded in chunks of ``batch_size`` with one
+    ``embed_texts`` request per chunk, so a whole set of candidates and their
+    reference cost a single round-trip instead of one per text.
+    """
+
+    def __init__(
+        self,
+        embeddings: "BaseRagasEmbeddings",
+        batch_size: int = 256,
+        limiter: Optional[asyncio.Semaphore] = None,
+    ):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.limiter = limiter
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def clear(self) -> None:
+        """Drops all stored embeddings (e.g. between dataset chunks)."""
+        self._vectors.clear()
+
+    async def _embed_chunk(self, chunk: List[str]) -> None:
+        futures = [self._pending[text] for text in chunk]
+        try:
+            vectors = np.asarray(
+                await bounded(self.limiter, self.embeddings.embed_texts(chunk)),
+                dtype=np.float64,
+            )
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            # A zero vector (e.g. a local model knowing none of the words) has
+            # similarity 0 with everything instead of NaN
+            vectors /= np.where(norms > 0, norms, 1.0)
+            for text, vector, future in zip(chunk, vectors, futures):
+                self._vectors[text] = vector.astype(np.float32)
+                future.set_result(None)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+                # Mark as retrieved; concurrent waiters still receive the error
+                future.exception()
+            raise
+        finally:
+            for text in chunk:
+                self._pending.pop(text, None)
+
+    async def add(self, texts: Iterable) -> None:
+        """Embeds every text that is not in the index yet.
+
+        Texts already being embedded by a concurrent call are awaited rather
+        than requested twice.
+
+        Args:
+            texts: Values to embed.
+        """
+        loop = asyncio.get_running_loop()
+        missing, waiting = [], []
+        for text in dict.fromkeys(prepare_embedding_text(t) for t in texts):
+            if text in self._vectors:
+                continue
+            if text in self._pending:
+                waiting.append(self._pending[text])
+                continue
+            self._pending[text] = loop.create_future()
+            missing.append(text)
+
+        chunks = [
+            missing[start : start + self.batch_size]
+            for start in range(0, len(missing), self.batch_size)
+        ]
+        await asyncio.gather(*(self._embed_chunk(chunk) for chunk in chunks))
+        if waiting:
+            await asyncio.gather(*waiting)
+
+    async def get(self, texts: List) -> np.ndarray:
+        """Returns the unit-norm embeddings of ``texts``, embedding any missing.
+
+        Args:
+            texts: Values to look up.
+
+        Returns:
+            np.ndarray: Matrix of shape (len(texts), dim).
+        """
+        await self.add(texts)
+        return np.stack([self._vectors[prepare_embedding_text(t)] for t in texts])
@@ -0,0 +1,262 @@
+"""
+Shared clients and scorers for an evaluation run.
+"""
+
+import asyncio
+import copy
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_openai import OpenAIEmbeddings
+from ragas.embeddings import LangchainEmbeddingsWrapper
+from ragas.llms import LangchainLLMWrapper
+from ragas.metrics import SemanticSimilarity
+
+from cache_store import SQLiteLRUCache
+from coherence import ContentCoherenceMetric
+from context_truncation import ContextTruncator, load_encoding
+from embedding_cache import CachedEmbeddings
+from embedding_index import EmbeddingIndex
+from faithfulness import MultiFieldFaithfulness, TracedFaithfulness
+from llm import get_llm
+from llm_cache import JudgeResponseCache, get_judge_cache
+from paths import (
+    EMBEDDING_CACHE_DB,
+    LLM_CACHE_DB,
+    LOCAL_EMBEDDING_MODEL,
+    EvaluationPaths,
+)
+from prefilter import Prefilter, PrefilterThresholds
+from rate_limits import RateLimitedChatModel, RateLimits
+from tracing import LLMSpanHandler
+from work_plan import SharedWork
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+
+@dataclass
+class EvaluationContext:
+    """
+    Owns the model clients and metric instances used by every metric call.
+
+    Built once per run, so the HTTP connection pools of the underlying clients
+    and the ragas scorers are reused across all fields and publications. With
+    ``batch_embeddings`` enabled, semantic similarity is computed from a shared
+    EmbeddingIndex instead of one ragas call per candidate. Publication
+    descriptions are truncated to ``context_max_tokens`` of the judge model's
+    tokenizer once and shared by all metrics of the publication (the memo holds
+    ``context_cache_entries`` descriptions, at least a chunk's worth). With
+    ``faithfulness_mode="combined"``, one judge call per publication checks the
+    faithfulness of every generated field instead of two calls per text.
+    With a ``prefilter``, faithfulness items and content coherence that local
+    signals decide confidently are scored without the judge. With
+    ``deduplicate``, units of scoring work with the same inputs are run once
+    per chunk and their results shared (see ``work_plan``).
+    """
+
+    llm: BaseChatModel
+    embeddings: Embeddings
+    max_concurrency: int = 8
+    batch_embeddings: bool = True
+    embedding_batch_size: int = 256
+    context_max_tokens: int = 8000
+    context_cache_entries: int = 256
+    faithfulness_mode: str = "per_field"
+    prefilter: Optional[Prefilter] = None
+    deduplicate: bool = True
+
+    evaluator_llm: LangchainLLMWrapper = field(init=False)
+    evaluator_embeddings: LangchainEmbeddingsWrapper = field(init=False)
+    semantic_scorer: SemanticSimilarity = field(init=False)
+    faithfulness_scorer: TracedFaithfulness = field(init=False)
+    multi_field_faithfulness_scorer: MultiFieldFaithfulness = field(init=False)
+    coherence_scorer: ContentCoherenceMetric = field(init=False)
+    limiter: asyncio.Semaphore = field(init=False)
+    embedding_index: EmbeddingIndex = field(init=False)
+    truncator: ContextTruncator = field(init=False)
+    shared_work: Optional[SharedWork] = field(init=False)
+
+    def __post_init__(self):
+        self._build_judge_scorers()
+        self.evaluator_embeddings = LangchainEmbeddingsWrapper(self.embeddings)
+        self.semantic_scorer = SemanticSimilarity(embeddings=self.evaluator_embeddings)
+        self.limiter = asyncio.Semaphore(self.max_concurrency)
+        self.embedding_index = EmbeddingIndex(
+            self.evaluator_embeddings,
+            batch_size=self.embedding_batch_size,
+            limiter=self.limiter,
+        )
+        self.truncator = ContextTruncator(
+            getattr(self.llm, "model_name", None),
+            max_tokens=self.context_max_tokens,
+            max_entries=self.context_cache_entries,
+        )
+        self.shared_work = SharedWork() if self.deduplicate else None
+
+    def _build_judge_scorers(self) -> None:
+        # Judge requests show up as ``llm`` spans below the metric calling them.
+        # The handler goes on a shallow copy: the caller's model keeps its
+        # callbacks, the copy shares its client, cache and rate limiter
+        callbacks = list(self.llm.callbacks or [])
+        if not any(isinstance(handler, LLMSpanHandler) for handler in callbacks):
+            self.llm = self.llm.model_copy(
+                update={"callbacks": [*callbacks, LLMSpanHandler()]}
+            )
+        # ragas would otherwise swap the temperature of the shared model in and
+        # out around every call, which races under concurrency
+        self.evaluator_llm = LangchainLLMWrapper(self.llm, bypass_temperature=True)
+        self.faithfulness_scorer = TracedFaithfulness(llm=self.evaluator_llm)
+        self.multi_field_faithfulness_scorer = MultiFieldFaithfulness(
+            llm=self.evaluator_llm
+        )
+        self.coherence_scorer = ContentCoherenceMetric(llm=self.evaluator_llm)
+
+    def with_llm(self, llm: BaseChatModel, **changes: Any) -> "EvaluationContext":
+        """Copy of the context judging with ``llm``, e.g. a batch replay model.
+
+        Only the judge-bound scorers are rebuilt. The copy shares the
+        embeddings, embedding index, truncator, limiter and shared work of
+        this context. ``changes`` replace other fields, e.g. ``prefilter``.
+        """
+        replaced = copy.copy(self)
+        replaced.llm = llm
+        for name, value in changes.items():
+            setattr(replaced, name, value)
+        replaced._build_judge_scorers()
+        return replaced
+
+    def cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """Hit/miss statistics of the persistent caches used by this run."""
+        stats = {}
+        if isinstance(self.embeddings, CachedEmbeddings):
+            stats["Embeddings"] = self.embeddings.cache.stats()
+        if isinstance(self.llm.cache, JudgeResponseCache):
+            stats["LLM judge"] = self.llm.cache.stats()
+        return stats
+
+    def rate_limit_stats(self) -> Dict[str, Dict[str, float]]:
+        """Requests, retries, 429s and waiting time of the judge, by metric."""
+        if isinstance(self.llm, RateLimitedChatModel):
+            return self.llm.stats.as_dict()
+        return {}
+
+    def prefilter_stats(self) -> Dict[str, Dict[str, int]]:
+        """Units decided high, decided low or escalated to the judge, by metric."""
+        if self.prefilter is not None:
+            return self.prefilter.stats()
+        return {}
+
+    def judge_requests(self) -> int:
+        """Judge requests sent so far (counted by the rate-limited client only)."""
+        return sum(stat["requests"] for stat in self.rate_limit_stats().values())
+
+    def dedup_stats(self) -> Dict[str, Dict[str, int]]:
+        """Scoring units, unique units and model calls saved, by kind of work."""
+        if self.shared_work is not None:
+            return self.shared_work.stats()
+        return {}
+
+
+def build_embeddings(
+    config: Dict[str, Any],
+    embedding_cache_db: str = EMBEDDING_CACHE_DB,
+    dataset_paths: Optional[EvaluationPaths] = None,
+) -> Embeddings:
+    """Creates the embeddings model of the configured ``embedding_backend``.
+
+    Args:
+        config: Application config loaded from ``config.yaml``.
+        embedding_cache_db: SQLite file of the embedding cache.
+        dataset_paths: Golden dataset the local model is fitted on (default:
+            the repository's).
+
+    Returns:
+        ``openai``: OpenAI embeddings behind the on-disk cache (if enabled);
+        ``local``: the scikit-learn model of ``local_embeddings``, which is
+        faster to run than to look up and so is not cached.
+    """
+    backend = config.get("embedding_backend", "openai")
+    if backend == "local":
+        # scikit-learn is only imported by runs that use it
+        from local_embeddings import LocalEmbeddings
+
+        return LocalEmbeddings.load(
+            config.get("local_embedding_model", LOCAL_EMBEDDING_MODEL),
+            dimensions=config.get("local_embedding_dimensions", 128),
+            dataset_paths=dataset_paths,
+        )
+    elif backend != "openai":
+        raise ValueError(f"Unknown embedding backend: {backend}")
+
+    # Without a tokenizer (BPE file neither cached nor downloadable) the client
+    # would fail every request; descriptions are truncated upstream anyway
+    embeddings = OpenAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        check_embedding_ctx_length=load_encoding(EMBEDDING_MODEL) is not None,
+    )
+    if config.get("embedding_cache", True):
+        embeddings = CachedEmbeddings(
+            embeddings,
+            model_name=EMBEDDING_MODEL,
+            cache=SQLiteLRUCache(
+                embedding_cache_db,
+                max_entries=config.get("embedding_cache_max_entries", 100_000),
+            ),
+        )
+    return embeddings
+
+
+def build_evaluation_context(
+    config: Dict[str, Any],
+    embedding_cache_db: str = EMBEDDING_CACHE_DB,
+    llm_cache_db: str = LLM_CACHE_DB,
+    dataset_paths: Optional[EvaluationPaths] = None,
+) -> EvaluationContext:
+    """Creates the evaluation context described by the app config.
+
+    Args:
+        config: Application config loaded from ``config.yaml``.
+        embedding_cache_db: SQLite file of the embedding cache.
+        llm_cache_db: SQLite file of the judge response cache.
+        dataset_paths: Golden dataset of the run (default: the repository's).
+
+    Returns:
+        A ready-to-use EvaluationContext.
+    """
+    model_name = config.get("llm", "gpt-4o-mini")
+    llm_cache = None
+    if config.get("llm_cache", True):
+        llm_cache = get_judge_cache(
+            model_name,
+            path=llm_cache_db,
+            max_entries=config.get("llm_cache_max_entries", 50_000),
+        )
+
+    return EvaluationContext(
+        llm=get_llm(
+            model_name,
+            temperature=config.get("judge_temperature", 0.01),
+            cache=llm_cache,
+            rate_limits=(
+                RateLimits.from_config(config)
+                if config.get("llm_rate_limits", True)
+                else None
+            ),
+        ),
+        embeddings=build_embeddings(config, embedding_cache_db, dataset_paths),
+        max_concurrency=config.get("max_concurrency", 8),
+        batch_embeddings=config.get("batch_embeddings", True),
+        embedding_batch_size=config.get("embedding_batch_size", 256),
+        context_max_tokens=config.get("context_max_tokens", 8000),
+        # Every pass over a chunk truncates each of its descriptions again
+        context_cache_entries=max(256, config.get("dataset_chunksize", 500)),
+        faithfulness_mode=config.get("faithfulness_mode", "per_field"),
+        prefilter=(
+            Prefilter(PrefilterThresholds.from_config(config))
+            if config.get("prefilter", False)
+            else None
+        ),
+        deduplicate=config.get("deduplicate_work", True),
+    )
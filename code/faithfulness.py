@@ -0,0 +1,141 @@
+"""
+Single-call faithfulness judging for all generated fields of a publication.
+
+Ragas' ``Faithfulness`` makes two judge calls per generated text (statement
+extraction, then verification against the context), so a publication with
+several candidate titles, TL;DRs and references uploads the same context
+many times. ``MultiFieldFaithfulness`` asks the judge to extract and verify
+the claims of every generated item in one structured call and scores each
+item like ragas does: supported statements / extracted statements.
+"""
+
+import typing as t
+from dataclasses import dataclass, field
+
+import numpy as np
+from pydantic import BaseModel, Field
+from ragas.callbacks import Callbacks
+from ragas.llms import BaseRagasLLM
+from ragas.metrics import Faithfulness
+from ragas.prompt import PydanticPrompt
+
+from prompt_layout import ContextFirstNLIStatementPrompt, ContextFirstPrompt
+from tracing import span
+
+
+class GeneratedItem(BaseModel):
+    id: str = Field(description="Identifier of the generated item")
+    field: str = Field(description="Field the item was generated for")
+    text: str = Field(description="AI generated text to check")
+
+
+class MultiFieldFaithfulnessInput(BaseModel):
+    context: str = Field(description="The original publication content/context")
+    tasks: t.Dict[str, str] = Field(
+        description="Instruction each field was generated for, by field"
+    )
+    items: t.List[GeneratedItem] = Field(description="Generated items to check")
+
+
+class StatementVerdict(BaseModel):
+    statement: str = Field(description="Self-contained claim made by the item")
+    reason: str = Field(description="Brief justification of the verdict")
+    verdict: int = Field(description="1 if the context supports the claim, else 0")
+
+
+class ItemVerdicts(BaseModel):
+    id: str = Field(description="Identifier of the generated item")
+    statements: t.List[StatementVerdict] = Field(
+        description="Claims of the item with their verdicts"
+    )
+
+
+class MultiFieldFaithfulnessOutput(BaseModel):
+    items: t.List[ItemVerdicts] = Field(description="Verdicts for every item")
+
+
+class MultiFieldFaithfulnessPrompt(
+    ContextFirstPrompt,
+    PydanticPrompt[MultiFieldFaithfulnessInput, MultiFieldFaithfulnessOutput],
+):
+    instruction = """You are an expert evaluator judging whether AI-generated content is faithful to its source.
+
+For EACH generated item, independently of the other items:
+
+1. Break the item's text down into one or more fully understandable statements. Ensure that no pronouns are used in any statement.
+2. For every statement, return verdict 1 if it can be directly inferred from the context, or 0 if it can not be directly inferred from the context, with a brief reason.
+
+Return one entry per item, with the item's id, in the order the items are given. Never skip an item."""
+
+    input_model = MultiFieldFaithfulnessInput
+    output_model = MultiFieldFaithfulnessOutput
+
+
+def score_statements(statements: t.List[StatementVerdict]) -> float:
+    """Share of supported statements, NaN if no statement was extracted."""
+    if not statements:
+        return np.nan
+    return sum(1 if statement.verdict else 0 for statement in statements) / len(
+        statements
+    )
+
+
+@dataclass
+class MultiFieldFaithfulness:
+    """
+    Judges the faithfulness of several generated texts against one context in
+    a single LLM call.
+    """
+
+    llm: BaseRagasLLM
+    prompt: PydanticPrompt = field(default_factory=MultiFieldFaithfulnessPrompt)
+
+    async def ascore_items(
+        self,
+        context: str,
+        tasks: t.Dict[str, str],
+        items: t.List[GeneratedItem],
+        callbacks: Callbacks = None,
+    ) -> t.Dict[str, float]:
+        """
+        Score every generated item against the context.
+
+        Args:
+            context: Source content the items must be faithful to
+            tasks: Instruction of every field the items belong to
+            items: Generated texts with unique ids
+            callbacks: Callbacks for monitoring
+
+        Returns:
+            Mapping from item id to its faithfulness score (NaN for items the
+            judge returned no statements for)
+        """
+        response = await self.prompt.generate(
+            data=MultiFieldFaithfulnessInput(context=context, tasks=tasks, items=items),
+            llm=self.llm,
+            callbacks=callbacks,
+        )
+        verdicts = {item.id: item.statements for item in response.items}
+        return {item.id: score_statements(verdicts.get(item.id, [])) for item in items}
+
+
+@dataclass
+class TracedFaithfulness(Faithfulness):
+    """
+    Ragas Faithfulness with a tracing span around each of its two judge calls,
+    and the context first in the verdict prompt (see ``prompt_layout``).
+    """
+
+    nli_statements_prompt: PydanticPrompt = field(
+        default_factory=ContextFirstNLIStatementPrompt
+    )
+
+    async def _create_statements(self, row: t.Dict, callbacks: Callbacks):
+        with span("faithfulness.statements"):
+            return await super()._create_statements(row, callbacks)
+
+    async def _create_verdicts(
+        self, row: t.Dict, statements: t.List[str], callbacks: Callbacks
+    ):
+        with span("faithfulness.verdicts", statements=len(statements)):
+            return await super()._create_verdicts(row, statements, callbacks)
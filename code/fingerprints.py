@@ -0,0 +1,211 @@
+"""
+Input fingerprints for incremental re-evaluation.
+
+Every result record in the store carries, per metric group (the semantic
+similarity and faithfulness of each field, and content coherence), a
+fingerprint of everything the group's scores depend on: the generated and
+truth texts, the hash of the truncated context, the judge or embedding
+model and a version of the metric's prompts. A later run recomputes only
+the groups whose fingerprint changed and copies the others from the
+previous record; publications with no changes are skipped.
+"""
+
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from cache_store import content_key
+from results_store import ID_COLUMN, iter_records
+
+# Bump when the scoring code changes in a way the inputs below do not capture
+FINGERPRINT_VERSION = 1
+
+
+def digest(*parts) -> str:
+    """Content key of JSON-serializable parts."""
+    return content_key(
+        *(json.dumps(part, sort_keys=True, default=str) for part in parts)
+    )
+
+
+def prompt_version(prompt) -> str:
+    """Hash of a ragas prompt's instruction, examples and output schema."""
+    examples = [
+        [example_input.model_dump(), example_output.model_dump()]
+        for example_input, example_output in prompt.examples
+    ]
+    return digest(
+        type(prompt).__name__,
+        prompt.instruction,
+        examples,
+        prompt.output_model.model_json_schema(),
+    )
+
+
+def embedding_model_name(embeddings) -> str:
+    """Name of the embedding model, or its class for unnamed models."""
+    return (
+        getattr(embeddings, "model_name", None)
+        or getattr(embeddings, "model", None)
+        or type(embeddings).__name__
+    )
+
+
+class Fingerprinter:
+    """
+    Fingerprints the metric groups of a publication for one evaluation
+    context. The parts that do not depend on the publication (models, prompt
+    versions, faithfulness mode, pre-filter thresholds) are computed once.
+    """
+
+    def __init__(self, eval_ctx):
+        from batch_jobs import model_parameters
+
+        judge = model_parameters(eval_ctx.llm)
+        prefilter = eval_ctx.prefilter
+        thresholds = asdict(prefilter.thresholds) if prefilter is not None else None
+        self.prefiltered = prefilter is not None
+        faithfulness_scorer = eval_ctx.faithfulness_scorer
+        if eval_ctx.faithfulness_mode == "combined":
+            faithfulness_prompts = [
+                prompt_version(eval_ctx.multi_field_faithfulness_scorer.prompt)
+            ]
+        else:
+            faithfulness_prompts = [
+                prompt_version(faithfulness_scorer.statement_generator_prompt),
+                prompt_version(faithfulness_scorer.nli_statements_prompt),
+            ]
+        self.embedding_model = embedding_model_name(eval_ctx.embeddings)
+        self.faithfulness_version = digest(
+            FINGERPRINT_VERSION,
+            judge,
+            eval_ctx.faithfulness_mode,
+            faithfulness_prompts,
+            thresholds,
+        )
+        self.coherence_version = digest(
+            FINGERPRINT_VERSION,
+            judge,
+            prompt_version(eval_ctx.coherence_scorer.coherence_prompt),
+            thresholds,
+        )
+
+    def semantic_similarity(self, generated, truth) -> str:
+        return digest(FINGERPRINT_VERSION, self.embedding_model, generated, truth)
+
+    def faithfulness(self, generated, truth, task: str, context_hash: str) -> str:
+        # The truth only matters to the pre-filter; without it, a changed
+        # reference keeps the faithfulness scores of the unchanged candidates
+        if not self.prefiltered:
+            truth = None
+        return digest(self.faithfulness_version, generated, truth, task, context_hash)
+
+    def coherence(self, generated: List, context_hash: str) -> str:
+        return digest(self.coherence_version, generated, context_hash)
+
+
+def group_values(result: Dict[str, Any], group: str) -> Dict[str, Any]:
+    """The result values of a metric group (its score and, for lists, mean)."""
+    return {
+        key: value
+        for key, value in result.items()
+        if key == group or key == f"{group}_mean"
+    }
+
+
+@dataclass
+class ReusePlan:
+    """Which metric groups of a publication are taken from the previous run."""
+
+    fingerprints: Dict[str, str]
+    reused: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def complete(self) -> bool:
+        """True if nothing about the publication needs to be recomputed."""
+        return len(self.reused) == len(self.fingerprints)
+
+
+class PreviousResults:
+    """
+    Latest successful records of a results store, looked up by id on
+    demand. Records appended to the store after construction are ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offsets = {}
+        for offset, record in iter_records(path):
+            pub_id = record["result"][ID_COLUMN]
+            if record["status"] == "ok" and record.get("fingerprints"):
+                self.offsets[pub_id] = offset
+            else:
+                self.offsets.pop(pub_id, None)
+        self._file = open(path, "rb") if self.offsets else None
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _record(self, pub_id: str) -> Optional[Dict]:
+        offset = self.offsets.get(pub_id)
+        if offset is None:
+            return None
+        self._file.seek(offset)
+        return json.loads(self._file.readline())
+
+    def result(self, pub_id: str) -> Optional[Dict]:
+        """The latest successful result of a publication, if any."""
+        record = self._record(pub_id)
+        return record["result"] if record is not None else None
+
+    def plan(self, pub_id: str, fingerprints: Dict[str, str]) -> ReusePlan:
+        """Reuses every group whose fingerprint and scores are unchanged."""
+        plan = ReusePlan(fingerprints)
+        record = self._record(pub_id)
+        if record is None:
+            return plan
+        previous = record["fingerprints"]
+        for group, fingerprint in fingerprints.items():
+            if previous.get(group) != fingerprint:
+                continue
+            # Failed publications have no ok record; a NaN score (e.g. a text
+            # without statements) would come back the same from the judge cache
+            values = group_values(record["result"], group)
+            if group in values:
+                plan.reused[group] = values
+        return plan
+
+
+@dataclass
+class ReuseStats:
+    """Counts of reused versus recomputed publications and metric groups."""
+
+    publications_reused: int = 0
+    publications_evaluated: int = 0
+    groups_reused: int = 0
+    groups_recomputed: int = 0
+
+    def add(self, plans: Iterable[ReusePlan]) -> None:
+        for plan in plans:
+            if plan.complete:
+                self.publications_reused += 1
+            else:
+                self.publications_evaluated += 1
+            self.groups_reused += len(plan.reused)
+            self.groups_recomputed += len(plan.fingerprints) - len(plan.reused)
+
+    def summary_line(self) -> str:
+        return (
+            f"Incremental: reused {self.publications_reused} publications, "
+            f"evaluated {self.publications_evaluated}; "
+            f"reused {self.groups_reused} metric groups, "
+            f"recomputed {self.groups_recomputed}"
+        )
@@ -0,0 +1,220 @@
+"""
+Typed, columnar copy of the golden dataset.
+
+``golden_dataset.csv`` stores the generated titles, TL;DRs and references as
+Python literals and the tags as pipe-separated strings, and the descriptions
+live in a separate JSON file. Converting both once into a Parquet file with
+native list and struct columns lets the evaluator load rows that are ready to
+use, with no per-row parsing:
+
+    python code/golden_dataset.py
+
+When the Parquet file is missing or older than its sources, rows are read
+from the CSV and JSON and parsed on the fly instead.
+"""
+
+import argparse
+import ast
+import os
+from typing import Iterator, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from description_index import PublicationDescriptionIndex
+from paths import GOLDEN_DATASET_CSV, GOLDEN_DATASET_JSON, GOLDEN_DATASET_PARQUET
+from utils import TAG_SEPARATOR, iter_dataset_chunks
+
+REFERENCE = pa.struct([("url", pa.string()), ("title", pa.string())])
+
+SCHEMA = pa.schema(
+    [
+        ("publication_external_id", pa.string()),
+        ("title_truth", pa.string()),
+        ("tldr_truth", pa.string()),
+        ("references_truth", pa.list_(REFERENCE)),
+        ("tags_truth", pa.list_(pa.string())),
+        ("title_generated", pa.list_(pa.string())),
+        ("tldr_generated", pa.list_(pa.string())),
+        ("references_generated", pa.list_(REFERENCE)),
+        ("tags_generated", pa.list_(pa.string())),
+        ("publication_description", pa.string()),
+    ]
+)
+
+LITERAL_COLUMNS = [
+    "references_truth",
+    "title_generated",
+    "tldr_generated",
+    "references_generated",
+]
+
+TAG_COLUMNS = ["tags_truth", "tags_generated"]
+
+
+def parse_csv_chunk(chunk: pd.DataFrame, descriptions) -> pd.DataFrame:
+    """Turns raw CSV rows into typed rows shaped like the Parquet schema.
+
+    Args:
+        chunk: Rows of the golden dataset CSV
+        descriptions: Mapping from publication_external_id to description
+
+    Returns:
+        pandas.DataFrame: Rows with list columns and the publication description
+    """
+    chunk = chunk.copy()
+    for column in LITERAL_COLUMNS:
+        chunk[column] = [ast.literal_eval(value) for value in chunk[column]]
+    for column in TAG_COLUMNS:
+        chunk[column] = chunk[column].fillna("").astype(str).str.split(TAG_SEPARATOR)
+    chunk["publication_description"] = [
+        descriptions.get(pub_id, "") for pub_id in chunk["publication_external_id"]
+    ]
+    return chunk[SCHEMA.names]
+
+
+def record_batch_to_frame(batch: pa.RecordBatch) -> pd.DataFrame:
+    """Converts a record batch to a DataFrame holding plain Python lists and dicts."""
+    return pd.DataFrame(
+        {
+            name: column.to_pylist()
+            for name, column in zip(batch.schema.names, batch.columns)
+        }
+    )
+
+
+def convert_golden_dataset(
+    csv_path: str = GOLDEN_DATASET_CSV,
+    json_path: str = GOLDEN_DATASET_JSON,
+    output_path: str = GOLDEN_DATASET_PARQUET,
+    chunksize: int = 500,
+) -> int:
+    """Writes the golden CSV and JSON as a single Parquet file.
+
+    Rows are converted one chunk at a time; each chunk becomes a row group.
+
+    Args:
+        csv_path: Golden dataset CSV
+        json_path: Golden dataset JSON with the publication descriptions
+        output_path: Parquet file to write
+        chunksize: Number of rows converted at a time
+
+    Returns:
+        int: Number of rows written
+    """
+    # A one-off pass over the JSON, so the offset index is not persisted
+    descriptions = PublicationDescriptionIndex(json_path, persist=False)
+    rows = 0
+    with pq.ParquetWriter(output_path, SCHEMA) as writer:
+        for chunk in iter_dataset_chunks(csv_path, chunksize=chunksize):
+            table = pa.Table.from_pandas(
+                parse_csv_chunk(chunk, descriptions),
+                schema=SCHEMA,
+                preserve_index=False,
+            )
+            writer.write_table(table)
+            rows += table.num_rows
+    return rows
+
+
+def is_up_to_date(
+    parquet_path: str = GOLDEN_DATASET_PARQUET,
+    sources=(GOLDEN_DATASET_CSV, GOLDEN_DATASET_JSON),
+) -> bool:
+    """Whether the Parquet file exists and is newer than all of its sources."""
+    if not os.path.exists(parquet_path):
+        return False
+    modified = os.path.getmtime(parquet_path)
+    return all(os.path.getmtime(source) <= modified for source in sources)
+
+
+def iter_golden_dataset(
+    num_publications_to_evaluate: Optional[int] = None,
+    chunksize: int = 500,
+    parquet_path: str = GOLDEN_DATASET_PARQUET,
+    csv_path: str = GOLDEN_DATASET_CSV,
+    json_path: str = GOLDEN_DATASET_JSON,
+) -> Iterator[pd.DataFrame]:
+    """Streams typed golden dataset rows in chunks.
+
+    Reads the Parquet file when it is up to date, otherwise parses the CSV
+    and JSON. Either way the chunks have the columns of ``SCHEMA``: generated
+    titles and TL;DRs as lists of strings, references as lists of
+    ``{"url", "title"}`` dicts, tags as lists of strings and the publication
+    description.
+
+    Args:
+        num_publications_to_evaluate: Only read the first N rows (all if None)
+        chunksize: Number of rows per chunk
+        parquet_path: Converted dataset
+        csv_path: Golden dataset CSV, used if the Parquet file is stale
+        json_path: Golden dataset JSON, used if the Parquet file is stale
+
+    Yields:
+        pandas.DataFrame: Chunks of typed rows
+    """
+    remaining = num_publications_to_evaluate
+
+    if is_up_to_date(parquet_path, (csv_path, json_path)):
+        for batch in pq.ParquetFile(parquet_path).iter_batches(batch_size=chunksize):
+            if remaining is not None:
+                if remaining <= 0:
+                    return
+                batch = batch.slice(0, remaining)
+                remaining -= batch.num_rows
+            yield record_batch_to_frame(batch)
+        return
+
+    print(
+        f"Note: {os.path.basename(parquet_path)} is missing or stale, parsing the "
+        "CSV instead (run `python code/golden_dataset.py` to convert it)"
+    )
+    descriptions = PublicationDescriptionIndex(json_path)
+    for chunk in iter_dataset_chunks(csv_path, remaining, chunksize):
+        yield parse_csv_chunk(chunk, descriptions)
+
+
+def read_publications(
+    ids: Sequence[str],
+    chunksize: int = 500,
+    parquet_path: str = GOLDEN_DATASET_PARQUET,
+    csv_path: str = GOLDEN_DATASET_CSV,
+    json_path: str = GOLDEN_DATASET_JSON,
+) -> pd.DataFrame:
+    """Typed rows of the publications ``ids``, in that order, from one pass
+    over the dataset. Ids missing from the dataset are left out."""
+    wanted = set(ids)
+    chunks = [
+        chunk[chunk["publication_external_id"].isin(wanted)]
+        for chunk in iter_golden_dataset(
+            chunksize=chunksize,
+            parquet_path=parquet_path,
+            csv_path=csv_path,
+            json_path=json_path,
+        )
+    ]
+    if not chunks:
+        return pd.DataFrame(columns=SCHEMA.names)
+    rows = pd.concat(chunks).set_index("publication_external_id", drop=False)
+    return rows.reindex([pub_id for pub_id in ids if pub_id in rows.index]).reset_index(
+        drop=True
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Convert the golden dataset CSV and JSON to Parquet."
+    )
+    parser.add_argument("--csv", default=GOLDEN_DATASET_CSV)
+    parser.add_argument("--json", default=GOLDEN_DATASET_JSON)
+    parser.add_argument("--output", default=GOLDEN_DATASET_PARQUET)
+    parser.add_argument("--chunksize", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    rows = convert_golden_dataset(args.csv, args.json, args.output, args.chunksize)
+    print(f"Wrote {rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Lexical overlap metrics computed for a whole DataFrame at once.
+
+The tags and reference URLs of all rows are interned to integer ids and laid
+out as sparse row-per-publication indicator matrices, so Jaccard similarity
+for every row is a handful of sparse matrix operations instead of a Python
+set comparison per row. Two lenient variants complement the exact scores:
+
+- references: URLs are normalized (scheme, ``www.``, case of the host,
+  trailing slash and fragment ignored) before comparing.
+- tags: tags are matched one-to-one when their normalized forms are near
+  duplicates according to rapidfuzz (e.g. "time-series" and "timeseries").
+
+Normalization runs once per distinct label, vectorized over the vocabulary.
+"""
+
+from itertools import chain
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import csr_matrix
+
+# Minimum rapidfuzz ratio (0-100) for two normalized tags to count as a match
+TAG_MATCH_CUTOFF = 90
+
+LEXICAL_METRICS = [
+    "references_jaccard_similarity",
+    "references_normalized_jaccard_similarity",
+    "tags_jaccard_similarity",
+    "tags_fuzzy_jaccard_similarity",
+]
+
+
+def normalize_urls(urls: pd.Series) -> pd.Series:
+    """Reduces URLs to host, path and query: ``https://www.X.org/a/#b`` -> ``x.org/a``."""
+    return (
+        urls.str.strip()
+        .str.replace(r"#.*$", "", regex=True)
+        .str.replace(r"^[A-Za-z][A-Za-z0-9+.\-]*://", "", regex=True)
+        .str.replace(r"^www\.", "", regex=True, case=False)
+        .str.replace(r"/+(?=\?|$)", "", regex=True)
+        .str.replace(r"^[^/?]*", lambda host: host.group(0).lower(), regex=True)
+    )
+
+
+def normalize_tags(tags: pd.Series) -> pd.Series:
+    """Lowercases tags and unifies spaces, hyphens and underscores."""
+    return tags.str.lower().str.replace(r"[\s_\-]+", " ", regex=True).str.strip()
+
+
+class InternedLabels:
+    """
+    Label sets of aligned generated/truth rows, interned to integer ids.
+
+    Rows ``0..num_rows-1`` hold the generated labels and rows
+    ``num_rows..2*num_rows-1`` the truth labels of the same publications.
+    """
+
+    def __init__(
+        self, num_rows: int, rows: np.ndarray, codes: np.ndarray, vocabulary: pd.Series
+    ):
+        self.num_rows = num_rows
+        self.rows = rows
+        self.codes = codes
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def from_lists(
+        cls, generated: Sequence[List[str]], truth: Sequence[List[str]]
+    ) -> "InternedLabels":
+        lengths = [len(labels) for labels in chain(generated, truth)]
+        labels = pd.Series(
+            list(chain.from_iterable(chain(generated, truth))), dtype=object
+        )
+        codes, uniques = pd.factorize(labels.fillna(""))
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        return cls(len(generated), rows, codes, pd.Series(uniques, dtype=object))
+
+    def remap(self, normalized: pd.Series) -> "InternedLabels":
+        """Re-interns the labels by their normalized form; empty forms are dropped.
+
+        Args:
+            normalized: Normalized form of every entry of ``vocabulary``
+        """
+        normalized = normalized.fillna("")
+        normalized_codes, uniques = pd.factorize(normalized)
+        keep = normalized.to_numpy()[self.codes] != ""
+        return InternedLabels(
+            self.num_rows,
+            self.rows[keep],
+            normalized_codes[self.codes][keep],
+            pd.Series(uniques, dtype=object),
+        )
+
+    def indicators(self) -> Tuple[csr_matrix, csr_matrix]:
+        """Binary (row x label) matrices of the generated and the truth labels."""
+        matrix = csr_matrix(
+            (np.ones(len(self.codes)), (self.rows, self.codes)),
+            shape=(2 * self.num_rows, len(self.vocabulary)),
+        )
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        return matrix[: self.num_rows], matrix[self.num_rows :]
+
+    def jaccard(self) -> np.ndarray:
+        """Row-wise Jaccard similarity; rows where both sets are empty score 0.0."""
+        generated, truth = self.indicators()
+        intersection = np.asarray(generated.multiply(truth).sum(axis=1)).ravel()
+        union = (
+            np.asarray(generated.sum(axis=1)).ravel()
+            + np.asarray(truth.sum(axis=1)).ravel()
+            - intersection
+        )
+        return np.divide(intersection, union, out=np.zeros(len(union)), where=union > 0)
+
+    def fuzzy_jaccard(self, cutoff: int) -> np.ndarray:
+        """Row-wise Jaccard similarity where near-duplicate labels count as shared.
+
+        Labels that are not shared exactly are paired one-to-one (a maximum
+        matching over the pairs scoring at least ``cutoff``), so a label never
+        matches more than once. Rows without such labels keep their exact score.
+        """
+        generated, truth = self.indicators()
+        shared = generated.multiply(truth).tocsr()
+        generated_rest = (generated - shared).tocsr()
+        truth_rest = (truth - shared).tocsr()
+        generated_rest.eliminate_zeros()
+        truth_rest.eliminate_zeros()
+
+        matches = np.asarray(shared.sum(axis=1)).ravel()
+        sizes = np.asarray(generated.sum(axis=1) + truth.sum(axis=1)).ravel()
+        candidates = np.flatnonzero(
+            (np.diff(generated_rest.indptr) > 0) & (np.diff(truth_rest.indptr) > 0)
+        )
+        vocabulary = self.vocabulary.to_numpy()
+        generated_ptr, truth_ptr = generated_rest.indptr, truth_rest.indptr
+        for row in candidates:
+            similar = process.cdist(
+                vocabulary[
+                    generated_rest.indices[generated_ptr[row] : generated_ptr[row + 1]]
+                ],
+                vocabulary[truth_rest.indices[truth_ptr[row] : truth_ptr[row + 1]]],
+                scorer=fuzz.ratio,
+                score_cutoff=cutoff,
+                dtype=np.uint8,
+            )
+            if similar.any():
+                pairs = linear_sum_assignment(similar > 0, maximize=True)
+                matches[row] += (similar[pairs] > 0).sum()
+
+        union = sizes - matches
+        return np.divide(matches, union, out=np.zeros(len(union)), where=union > 0)
+
+
+def compute_lexical_metrics(
+    df: pd.DataFrame, tag_match_cutoff: int = TAG_MATCH_CUTOFF
+) -> pd.DataFrame:
+    """Computes every lexical metric for all rows of a typed golden dataset chunk.
+
+    Args:
+        df: Rows with reference lists of ``{"url", "title"}`` dicts and tag lists
+        tag_match_cutoff: Minimum rapidfuzz ratio for near-duplicate tags
+
+    Returns:
+        pandas.DataFrame: One column per name in ``LEXICAL_METRICS``, indexed like ``df``
+    """
+    urls = InternedLabels.from_lists(
+        [[ref["url"] for ref in refs] for refs in df["references_generated"]],
+        [[ref["url"] for ref in refs] for refs in df["references_truth"]],
+    )
+    tags = InternedLabels.from_lists(
+        [[tag for tag in tags if tag] for tags in df["tags_generated"]],
+        [[tag for tag in tags if tag] for tags in df["tags_truth"]],
+    )
+    normalized_urls = urls.remap(normalize_urls(urls.vocabulary))
+    normalized_tags = tags.remap(normalize_tags(tags.vocabulary))
+
+    return pd.DataFrame(
+        {
+            "references_jaccard_similarity": urls.jaccard(),
+            "references_normalized_jaccard_similarity": normalized_urls.jaccard(),
+            "tags_jaccard_similarity": tags.jaccard(),
+            "tags_fuzzy_jaccard_similarity": normalized_tags.fuzzy_jaccard(
+                tag_match_cutoff
+            ),
+        },
+        index=df.index,
+    )
@@ -1,17 +1,63 @@
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
+from typing import Optional
+
+from langchain_core.caches import BaseCache
 from langchain_core.language_models.chat_models import BaseChatModel
-from dotenv import load_dotenv
 
-load_dotenv()
+from rate_limits import RateLimitedChatModel, RateLimits
+
+
+def get_llm(
+    model_name: str,
+    temperature: float = 0.7,
+    cache: Optional[BaseCache] = None,
+    rate_limits: Optional[RateLimits] = None,
+) -> BaseChatModel:
+    """Creates the chat model for ``model_name``.
+
+    With ``rate_limits``, the model is wrapped in a RateLimitedChatModel that
+    owns throttling, retries and the cache; the provider client then neither
+    retries nor caches on its own.
+    """
+    if rate_limits is not None:
+        return RateLimitedChatModel(
+            model=_provider_llm(model_name, temperature, max_retries=0),
+            limits=rate_limits,
+            cache=cache,
+        )
+    return _provider_llm(model_name, temperature, cache=cache)
+
 
+def _provider_llm(
+    model_name: str,
+    temperature: float,
+    cache: Optional[BaseCache] = None,
+    max_retries: int = 2,
+) -> BaseChatModel:
+    # Provider packages are imported on first use, so importing this module
+    # stays cheap; API keys come from the environment (see ``cli``)
+    from langchain_groq import ChatGroq
+    from langchain_openai import ChatOpenAI
 
-def get_llm(model_name: str, temperature: float = 0.7) -> BaseChatModel:
     if model_name == "gpt-4o-mini":
-        return ChatOpenAI(model="gpt-4o-mini", temperature=temperature)
+        return ChatOpenAI(
+            model="gpt-4o-mini",
+            temperature=temperature,
+            cache=cache,
+            max_retries=max_retries,
+        )
     elif model_name == "gpt-4o":
-        return ChatOpenAI(model="gpt-4o", temperature=temperature)
+        return ChatOpenAI(
+            model="gpt-4o",
+            temperature=temperature,
+            cache=cache,
+            max_retries=max_retries,
+        )
     elif model_name == "llama3-8b-8192":
-        return ChatGroq(model="llama3-8b-8192", temperature=temperature)
+        return ChatGroq(
+            model="llama3-8b-8192",
+            temperature=temperature,
+            cache=cache,
+            max_retries=max_retries,
+        )
     else:
         raise ValueError(f"Unknown model name: {model_name}")
@@ -0,0 +1,119 @@
+"""
+Persistent cache for LLM judge responses.
+
+Plugs into LangChain's cache hook of the chat model returned by ``get_llm``,
+so repeated faithfulness and coherence prompts are answered locally. Entries
+are keyed by the model's parameters (model name, temperature, ...) and the
+rendered prompt.
+
+Usage:
+    python code/llm_cache.py stats
+    python code/llm_cache.py clear [--model gpt-4o-mini]
+"""
+
+import argparse
+import json
+from typing import Any, Optional, Sequence
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from cache_store import SQLiteLRUCache, content_key
+from paths import LLM_CACHE_DB
+
+
+def dump_generation(generation: Generation) -> dict:
+    """Serializes a (chat) generation to a JSON-compatible dict."""
+    if isinstance(generation, ChatGeneration):
+        return {"message": message_to_dict(generation.message)}
+    return {"text": generation.text}
+
+
+def load_generation(data: dict) -> Generation:
+    """Inverse of ``dump_generation``."""
+    if "message" in data:
+        return ChatGeneration(message=messages_from_dict([data["message"]])[0])
+    return Generation(text=data["text"])
+
+
+class JudgeResponseCache(BaseCache):
+    """LangChain cache storing the generations of one model in a SQLiteLRUCache."""
+
+    def __init__(self, store: SQLiteLRUCache, model_name: str):
+        self.store = store
+        self.model_name = model_name
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.store.get(content_key(llm_string, prompt))
+        if value is None:
+            return None
+        generations = [load_generation(item) for item in json.loads(value)]
+        for generation in generations:
+            # Lets tracing tell cached answers from fresh ones
+            if isinstance(generation, ChatGeneration):
+                generation.message.response_metadata["cache_hit"] = True
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        value = json.dumps([dump_generation(generation) for generation in return_val])
+        self.store.put(
+            content_key(llm_string, prompt),
+            value.encode("utf-8"),
+            namespace=self.model_name,
+        )
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear(namespace=self.model_name)
+
+    # SQLite lookups are fast enough to run on the event loop directly
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    def stats(self):
+        return self.store.stats()
+
+
+def get_judge_cache(
+    model_name: str, path: str = LLM_CACHE_DB, max_entries: int = 50_000
+) -> JudgeResponseCache:
+    """Opens the persistent judge response cache for a model.
+
+    Args:
+        model_name: Name of the judge model.
+        path: SQLite database file.
+        max_entries: Maximum number of cached responses across all models.
+
+    Returns:
+        JudgeResponseCache: Cache to pass to ``get_llm``.
+    """
+    return JudgeResponseCache(SQLiteLRUCache(path, max_entries), model_name)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Inspect or invalidate the LLM judge cache."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show the number of cached responses")
+    clear_parser = subparsers.add_parser("clear", help="Delete cached responses")
+    clear_parser.add_argument(
+        "--model", help="Only delete the responses of this model (default: all)"
+    )
+    args = parser.parse_args(argv)
+
+    store = SQLiteLRUCache(LLM_CACHE_DB)
+    if args.command == "stats":
+        print(f"Cached responses: {len(store)} ({LLM_CACHE_DB})")
+    else:
+        deleted = store.clear(namespace=args.model)
+        print(f"Deleted {deleted} cached responses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Local CPU embeddings for semantic similarity, built on scikit-learn.
+
+``LocalEmbeddings`` maps texts to dense vectors with latent semantic
+analysis: TF-IDF weights of word unigrams and bigrams and of character
+n-grams (which keep short titles and tags from embedding to nothing),
+reduced with a truncated SVD. The model is fitted once on the texts of the
+golden dataset (descriptions and every truth and generated field) and
+saved to ``LOCAL_EMBEDDING_MODEL``, so runs need no network access and
+embed well over a thousand texts per second on one core.
+
+Select it with ``embedding_backend: local`` in ``config.yaml``. The model
+file records the dimensions and dataset files it was fitted with; a run
+configured with others refits it. The model name includes a hash of the
+fitted model, so scores cached or fingerprinted with one fit are not mixed
+with another. Refit by hand, e.g. after the dataset changed a lot:
+
+    python code/local_embeddings.py --refit
+"""
+
+import argparse
+import hashlib
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import joblib
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.pipeline import make_pipeline, make_union
+
+from golden_dataset import TAG_SEPARATOR, iter_golden_dataset
+from paths import LOCAL_EMBEDDING_MODEL, EvaluationPaths
+
+DIMENSIONS = 128
+
+# Vocabulary size of each TF-IDF vectorizer; with the dimensions, bounds the
+# size of the SVD components stored in the model file
+MAX_FEATURES = 16384
+
+
+def golden_dataset_texts(paths: Optional[EvaluationPaths] = None) -> Iterator[str]:
+    """Every description, truth and generated text of the golden dataset."""
+    paths = paths or EvaluationPaths()
+    for chunk in iter_golden_dataset(
+        parquet_path=paths.dataset_parquet,
+        csv_path=paths.dataset_csv,
+        json_path=paths.dataset_json,
+    ):
+        for _, row in chunk.iterrows():
+            yield row["publication_description"]
+            yield row["title_truth"]
+            yield row["tldr_truth"]
+            yield str(row["references_truth"])
+            yield TAG_SEPARATOR.join(row["tags_truth"])
+            yield from row["title_generated"]
+            yield from row["tldr_generated"]
+            yield from (str(reference) for reference in row["references_generated"])
+            yield TAG_SEPARATOR.join(row["tags_generated"])
+
+
+def fit_local_model(texts: Iterable[str], dimensions: int = DIMENSIONS):
+    """Fits the TF-IDF and SVD pipeline on ``texts``.
+
+    The number of dimensions is capped below the number of distinct texts
+    and features, as required by the SVD.
+    """
+    texts = list(dict.fromkeys(texts))
+    tfidf = make_union(
+        TfidfVectorizer(
+            ngram_range=(1, 2), sublinear_tf=True, max_features=MAX_FEATURES
+        ),
+        TfidfVectorizer(
+            analyzer="char_wb",
+            ngram_range=(3, 5),
+            sublinear_tf=True,
+            max_features=MAX_FEATURES,
+        ),
+    )
+    features = tfidf.fit_transform(texts)
+    components = max(1, min(dimensions, features.shape[0] - 1, features.shape[1] - 1))
+    svd = TruncatedSVD(n_components=components, random_state=0)
+    svd.fit(features)
+    # Halves the model file; float32 is all the embedding cache keeps anyway
+    svd.components_ = svd.components_.astype(np.float32)
+    return make_pipeline(tfidf, svd)
+
+
+def fit_settings(dimensions: int, dataset_paths: EvaluationPaths) -> Dict[str, Any]:
+    """Settings a model file is fitted with, saved alongside the model."""
+    return {
+        "dimensions": dimensions,
+        "dataset_csv": os.path.abspath(dataset_paths.dataset_csv),
+        "dataset_json": os.path.abspath(dataset_paths.dataset_json),
+    }
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    LangChain embeddings model backed by a fitted scikit-learn pipeline.
+
+    Every batch of texts is transformed with one sparse matrix product, and
+    the vectors are L2-normalized so cosine similarity is a dot product.
+    """
+
+    def __init__(self, pipeline, model_name: str):
+        self.pipeline = pipeline
+        # ragas reports usage under ``model``
+        self.model = self.model_name = model_name
+
+    @classmethod
+    def load(
+        cls,
+        path: str = LOCAL_EMBEDDING_MODEL,
+        dimensions: int = DIMENSIONS,
+        dataset_paths: Optional[EvaluationPaths] = None,
+    ) -> "LocalEmbeddings":
+        """Loads the model at ``path``, (re)fitting it on the golden dataset if needed.
+
+        The model is fitted if the file is missing or was fitted with other
+        ``dimensions`` or dataset files than ``dataset_paths``.
+        """
+        dataset_paths = dataset_paths or EvaluationPaths()
+        settings = fit_settings(dimensions, dataset_paths)
+        saved = joblib.load(path) if os.path.exists(path) else None
+        if saved is not None:
+            # Model files of earlier versions hold the bare pipeline
+            fitted = saved.get("settings") if isinstance(saved, dict) else None
+            if fitted != settings:
+                print(
+                    f"Refitting local embedding model {path}: fitted with "
+                    f"{fitted}, configured {settings}"
+                )
+                saved = None
+        if saved is None:
+            print(f"Fitting local embedding model on the golden dataset to {path}")
+            saved = {
+                "settings": settings,
+                "pipeline": fit_local_model(
+                    golden_dataset_texts(dataset_paths), dimensions
+                ),
+            }
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            joblib.dump(saved, path)
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        return cls(saved["pipeline"], model_name=f"local-lsa-{digest[:12]}")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        vectors = self.pipeline.transform(texts)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        # Texts sharing no feature with the corpus stay zero vectors
+        vectors /= np.where(norms > 0, norms, 1.0)
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fit the local embedding model on the golden dataset."
+    )
+    parser.add_argument("--path", default=LOCAL_EMBEDDING_MODEL)
+    parser.add_argument("--dimensions", type=int, default=DIMENSIONS)
+    parser.add_argument(
+        "--refit", action="store_true", help="Replace an existing model file"
+    )
+    args = parser.parse_args()
+    if args.refit and os.path.exists(args.path):
+        os.remove(args.path)
+    embeddings = LocalEmbeddings.load(args.path, args.dimensions)
+    print(f"Local embedding model {embeddings.model_name} at {args.path}")
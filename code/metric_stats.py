@@ -0,0 +1,217 @@
+"""
+Streaming statistics of the metric scores of an evaluation run.
+
+``MetricAggregator`` is fed one result dictionary at a time, as results
+arrive or are read back from the results store, and keeps per metric a
+``RunningStats`` (count, mean, variance via Welford's algorithm, min, max)
+and a ``QuantileSketch``. Memory does not grow with the number of results
+(the sketch grows logarithmically), and aggregators of separate runs or
+shards can be merged. Metric columns are discovered from the results: every
+numeric, non-missing scalar value counts; list-valued per-candidate scores
+are summarized by their ``_mean`` columns.
+
+On up to ``QuantileSketch.capacity`` values, all statistics match pandas
+(sample standard deviation, linearly interpolated quantiles).
+"""
+
+import math
+from dataclasses import dataclass, field
+from numbers import Real
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from results_store import ID_COLUMN
+
+# Quantiles reported for every metric
+QUANTILES = (0.05, 0.5, 0.95)
+
+
+@dataclass
+class RunningStats:
+    """Count, mean, variance, min and max of a stream of values."""
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+
+    def update(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "RunningStats") -> None:
+        """Adds the values summarized by ``other`` (Chan et al.)."""
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation, NaN below two values (as in pandas)."""
+        if self.count < 2:
+            return math.nan
+        return math.sqrt(max(self.m2, 0.0) / (self.count - 1))
+
+
+@dataclass
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded memory (a simplified KLL sketch).
+
+    Values are buffered at level 0. When a level holds ``capacity`` values it
+    is sorted and every other value moves up a level, where each value stands
+    for twice as many inputs; the offset alternates between compactions to
+    avoid bias. Until the first compaction the quantiles are exact.
+    """
+
+    capacity: int = 256
+    levels: List[List[float]] = field(default_factory=lambda: [[]])
+    count: int = 0
+    _offset: int = 0
+
+    def update(self, value: float) -> None:
+        self.levels[0].append(value)
+        self.count += 1
+        if len(self.levels[0]) >= self.capacity:
+            self._compact()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Adds the values summarized by ``other``."""
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append([])
+            self.levels[level].extend(items)
+        self.count += other.count
+        self._compact()
+
+    def _compact(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self.capacity:
+                items.sort()
+                # An odd value out stays at this level
+                kept = [items.pop()] if len(items) % 2 else []
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                self.levels[level + 1].extend(items[self._offset :: 2])
+                self._offset ^= 1
+                self.levels[level] = kept
+            level += 1
+
+    @property
+    def exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def quantile(self, q: float) -> float:
+        """Estimated ``q``-quantile; exact (linear interpolation) if uncompacted."""
+        if not self.count:
+            return math.nan
+        if self.exact:
+            return float(np.quantile(self.levels[0], q))
+        values = np.concatenate([np.asarray(items, float) for items in self.levels])
+        weights = np.concatenate(
+            [np.full(len(items), 2.0**level) for level, items in enumerate(self.levels)]
+        )
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(values[order][min(index, len(values) - 1)])
+
+
+@dataclass
+class MetricStats:
+    """Running statistics and quantile sketch of one metric."""
+
+    stats: RunningStats = field(default_factory=RunningStats)
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def update(self, value: float) -> None:
+        self.stats.update(value)
+        self.sketch.update(value)
+
+    def merge(self, other: "MetricStats") -> None:
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+
+    def summary(self, quantiles: Sequence[float] = QUANTILES) -> Dict[str, float]:
+        summary = {
+            "count": self.stats.count,
+            "mean": self.stats.mean,
+            "std": self.stats.std,
+            "min": self.stats.min,
+            "max": self.stats.max,
+        }
+        for q in quantiles:
+            summary[f"p{round(q * 100):02d}"] = self.sketch.quantile(q)
+        return summary
+
+
+def is_score(value) -> bool:
+    """True for numeric, non-missing scalars (booleans excluded)."""
+    return (
+        isinstance(value, Real)
+        and not isinstance(value, bool)
+        and not math.isnan(value)
+    )
+
+
+class MetricAggregator:
+    """Per-metric statistics of a stream of evaluation results."""
+
+    def __init__(self, quantiles: Sequence[float] = QUANTILES):
+        self.quantiles = tuple(quantiles)
+        self.metrics: Dict[str, MetricStats] = {}
+        self.results = 0
+
+    def update(self, result: Dict) -> None:
+        """Adds one publication's result dictionary."""
+        self.results += 1
+        for column, value in result.items():
+            if column != ID_COLUMN and is_score(value):
+                self.metrics.setdefault(column, MetricStats()).update(float(value))
+
+    def update_many(self, results: Iterable[Dict]) -> "MetricAggregator":
+        for result in results:
+            self.update(result)
+        return self
+
+    def merge(self, other: "MetricAggregator") -> None:
+        """Adds the results summarized by ``other`` (e.g. another shard)."""
+        self.results += other.results
+        for column, metric in other.metrics.items():
+            self.metrics.setdefault(column, MetricStats()).merge(metric)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Statistics of every metric seen, in order of first appearance."""
+        return {
+            column: metric.summary(self.quantiles)
+            for column, metric in self.metrics.items()
+        }
+
+    def progress_line(self, columns: Optional[Sequence[str]] = None) -> str:
+        """One-line running means, e.g. for progress output."""
+        columns = columns if columns is not None else self.metrics
+        means = ", ".join(
+            f"{column} {self.metrics[column].stats.mean:.3f}"
+            for column in columns
+            if column in self.metrics
+        )
+        return f"{self.results} results | mean {means}"
+
+    @classmethod
+    def from_frame(cls, results_df, **kwargs) -> "MetricAggregator":
+        """Aggregates the rows of a results DataFrame."""
+        return cls(**kwargs).update_many(results_df.to_dict("records"))
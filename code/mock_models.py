@@ -0,0 +1,258 @@
+"""
+Local stand-ins for the chat and embedding models used by the evaluator.
+
+The mock chat model answers the ragas prompts used in this repo (faithfulness
+statement extraction, NLI verdicts, the combined multi-field faithfulness
+prompt and the content coherence prompt) with
+well-formed JSON derived from the prompt itself, so the full evaluation
+pipeline can run offline. Both models simulate network latency and count the
+requests they receive, which makes them suitable for throughput benchmarks.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from prompt_layout import split_context_prefix
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+def tokenize_words(text: str) -> List[str]:
+    """Splits text into lowercase alphanumeric words.
+
+    Args:
+        text: Input text.
+
+    Returns:
+        List of words found in the text.
+    """
+    return WORD_PATTERN.findall(str(text).lower())
+
+
+def word_overlap(text: str, reference_words: set) -> float:
+    """Fraction of the words in ``text`` that also appear in ``reference_words``.
+
+    Args:
+        text: Text whose words are checked.
+        reference_words: Vocabulary of the reference text.
+
+    Returns:
+        Overlap ratio between 0 and 1.
+    """
+    words = tokenize_words(text)
+    if not words:
+        return 0.0
+    return sum(1 for word in words if word in reference_words) / len(words)
+
+
+def extract_prompt_input(prompt: str) -> Dict[str, Any]:
+    """Extracts the JSON input block from a rendered ragas ``PydanticPrompt``.
+
+    Args:
+        prompt: Prompt text as produced by ``PydanticPrompt.to_string``.
+
+    Returns:
+        The parsed input data, or an empty dict if none could be found.
+    """
+    marker = prompt.rfind("input: ")
+    if marker == -1:
+        return {}
+    payload = prompt[marker + len("input: ") :]
+    end = payload.rfind("Output:")
+    if end != -1:
+        payload = payload[:end]
+    try:
+        return json.loads(payload)
+    except json.JSONDecodeError:
+        return {}
+
+
+def split_sentences(text: str) -> List[str]:
+    """Splits text into its non-empty sentences."""
+    return [
+        sentence.strip()
+        for sentence in SENTENCE_PATTERN.split(str(text))
+        if sentence.strip()
+    ]
+
+
+def mock_verdicts(statements: List[str], context_words: set) -> List[Dict[str, Any]]:
+    """Marks statements whose words mostly appear in the context as supported."""
+    return [
+        {
+            "statement": statement,
+            "reason": "Word overlap with the context.",
+            "verdict": int(word_overlap(statement, context_words) >= 0.5),
+        }
+        for statement in statements
+    ]
+
+
+def mock_judge_response(prompt: str) -> str:
+    """Builds a deterministic JSON answer for one of the judge prompts.
+
+    Args:
+        prompt: Rendered prompt text.
+
+    Returns:
+        JSON string matching the output model the prompt asks for.
+    """
+    context, prompt = split_context_prefix(prompt)
+    data = extract_prompt_input(prompt)
+    if context is not None:
+        data.setdefault("context", context)
+
+    if "answer" in data:
+        return json.dumps({"statements": split_sentences(data["answer"])[:5]})
+
+    if "statements" in data:
+        context_words = set(tokenize_words(data.get("context", "")))
+        verdicts = mock_verdicts(data["statements"], context_words)
+        return json.dumps({"statements": verdicts})
+
+    if "items" in data:
+        context_words = set(tokenize_words(data.get("context", "")))
+        items = [
+            {
+                "id": item["id"],
+                "statements": mock_verdicts(
+                    split_sentences(item["text"])[:5], context_words
+                ),
+            }
+            for item in data["items"]
+        ]
+        return json.dumps({"items": items})
+
+    if "title_generated" in data:
+        context_words = set(tokenize_words(data.get("context", "")))
+        fields = [
+            "title_generated",
+            "tldr_generated",
+            "references_generated",
+            "tags_generated",
+        ]
+        score = float(
+            np.mean([word_overlap(data.get(f, ""), context_words) for f in fields])
+        )
+        return json.dumps(
+            {"score": round(score, 2), "reasoning": "Word overlap with the context."}
+        )
+
+    return json.dumps({})
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used for the mock usage metadata."""
+    return max(1, len(text) // 4)
+
+
+class MockChatModel(BaseChatModel):
+    """Offline chat model that answers judge prompts after a fixed delay."""
+
+    model_name: str = "mock-judge"
+    temperature: float = 0.0
+    latency: float = 0.05
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "temperature": self.temperature}
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        self.calls += 1
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = mock_judge_response(prompt)
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(content)
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+
+class MockEmbeddings(Embeddings):
+    """Offline embedding model based on hashed bag-of-words vectors.
+
+    Every ``embed_*`` call counts as one request and waits ``latency`` seconds,
+    regardless of how many texts it carries.
+    """
+
+    def __init__(self, dimensions: int = 256, latency: float = 0.02):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.requests = 0
+        self.texts_embedded = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions)
+        for word in tokenize_words(text) or [""]:
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            sign = 1.0 if digest[4] % 2 == 0 else -1.0
+            vector[bucket] += sign
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def _record(self, texts: List[str]) -> None:
+        self.requests += 1
+        self.texts_embedded += len(texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        self._record(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency)
+        self._record(texts)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
@@ -0,0 +1,309 @@
+"""
+Local fake of the OpenAI chat completions and embeddings endpoints.
+
+Answers with the same deterministic judge responses and hashed embeddings as
+``mock_models``, but over HTTP, so the real ``ChatOpenAI``/``OpenAIEmbeddings``
+clients (connection pools, retries, timeouts) are exercised end to end.
+The server can misbehave like a loaded provider: it adds latency and jitter,
+answers a share of the requests slowly, fails a share with 500s, and returns
+429s with a ``Retry-After`` header randomly, above a requests-per-minute
+budget or above a number of concurrent requests. With a seed, the sequence of
+delays and failures is drawn from a reproducible random sequence. Like the
+OpenAI API, it reports as cached the input tokens of the longest prompt
+prefix (at least 1024 tokens, in 128-token steps) it has answered before.
+
+Usage:
+    python code/mock_server.py --port 8765 --rate-limit-rate 0.1 --max-in-flight 16
+
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python code/run_lesson6_multiagent_case_study_evals.py
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Tuple
+
+from aiohttp import web
+
+from mock_models import MockEmbeddings, estimate_tokens, mock_judge_response
+
+# Token estimate of mock_models.estimate_tokens
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class MockServerConfig:
+    """Latency and failure behavior of the fake provider."""
+
+    latency: float = 0.05
+    jitter: float = 0.02
+    # Share of requests answered after ``slow_latency`` instead of ``latency``
+    slow_rate: float = 0.0
+    slow_latency: float = 5.0
+    # Share of requests rejected with a 429 regardless of load
+    rate_limit_rate: float = 0.0
+    # Share of requests failing with a 500 server error
+    error_rate: float = 0.0
+    requests_per_minute: Optional[int] = None
+    max_in_flight: Optional[int] = None
+    retry_after: float = 1.0
+    seed: Optional[int] = None
+    # Provider-side prompt prefix caching
+    prompt_cache: bool = True
+    prompt_cache_min_tokens: int = 1024
+    prompt_cache_step_tokens: int = 128
+    prompt_cache_entries: int = 100_000
+    # Keep every chat prompt in MockProvider.prompts
+    record_prompts: bool = False
+
+
+@dataclass
+class MockServerStats:
+    requests: int = 0
+    completions: int = 0
+    embeddings: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+    slow: int = 0
+    max_in_flight: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    embedding_tokens: int = 0
+
+
+@dataclass
+class MockProvider:
+    """Request handlers and state of one fake provider instance."""
+
+    config: MockServerConfig = field(default_factory=MockServerConfig)
+    stats: MockServerStats = field(default_factory=MockServerStats)
+
+    def __post_init__(self):
+        self.random = random.Random(self.config.seed)
+        self.embedder = MockEmbeddings(latency=0)
+        self.recent = deque()
+        self.in_flight = 0
+        self.prefixes = OrderedDict()
+        self.prompts: List[str] = []
+
+    def _rejection(self) -> Optional[float]:
+        """Seconds the client should wait if this request is rate limited."""
+        config = self.config
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] >= 60:
+            self.recent.popleft()
+        if (
+            config.requests_per_minute
+            and len(self.recent) >= config.requests_per_minute
+        ):
+            return 60 - (now - self.recent[0])
+        if config.max_in_flight and self.in_flight >= config.max_in_flight:
+            return config.retry_after
+        if self.random.random() < config.rate_limit_rate:
+            return config.retry_after
+        self.recent.append(now)
+        return None
+
+    def _cached_tokens(self, prompt: str) -> int:
+        """Caches the prefixes of ``prompt``; returns the tokens of the longest seen before."""
+        config = self.config
+        if not config.prompt_cache:
+            return 0
+        step = config.prompt_cache_step_tokens * CHARS_PER_TOKEN
+        digest = hashlib.sha256()
+        position = cached = 0
+        for end in range(
+            config.prompt_cache_min_tokens * CHARS_PER_TOKEN, len(prompt) + 1, step
+        ):
+            digest.update(prompt[position:end].encode("utf-8"))
+            position = end
+            key = digest.digest()
+            if key in self.prefixes:
+                self.prefixes.move_to_end(key)
+                cached = end
+            else:
+                self.prefixes[key] = None
+        while len(self.prefixes) > config.prompt_cache_entries:
+            self.prefixes.popitem(last=False)
+        return cached // CHARS_PER_TOKEN
+
+    async def _delay(self) -> None:
+        config = self.config
+        if self.random.random() < config.slow_rate:
+            self.stats.slow += 1
+            delay = config.slow_latency
+        else:
+            delay = config.latency
+        await asyncio.sleep(max(0.0, delay + self.random.uniform(0, config.jitter)))
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        self.stats.requests += 1
+        wait = self._rejection()
+        if wait is not None:
+            self.stats.rate_limited += 1
+            return web.json_response(
+                {
+                    "error": {
+                        "message": "Rate limit reached (mock server)",
+                        "type": "requests",
+                        "code": "rate_limit_exceeded",
+                    }
+                },
+                status=429,
+                headers={
+                    "retry-after": f"{wait:.3f}",
+                    "retry-after-ms": str(int(wait * 1000)),
+                },
+            )
+        if self.random.random() < self.config.error_rate:
+            self.stats.errors += 1
+            return web.json_response(
+                {
+                    "error": {
+                        "message": "The server had an error (mock server)",
+                        "type": "server_error",
+                    }
+                },
+                status=500,
+            )
+        self.in_flight += 1
+        self.stats.max_in_flight = max(self.stats.max_in_flight, self.in_flight)
+        try:
+            await self._delay()
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        prompt = "\n".join(str(message["content"]) for message in body["messages"])
+        if self.config.record_prompts:
+            self.prompts.append(prompt)
+        content = mock_judge_response(prompt)
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(content)
+        cached_tokens = min(self._cached_tokens(prompt), input_tokens)
+        self.stats.completions += 1
+        self.stats.input_tokens += input_tokens
+        self.stats.output_tokens += output_tokens
+        self.stats.cached_tokens += cached_tokens
+        return web.json_response(
+            {
+                "id": f"chatcmpl-mock-{self.stats.completions}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": input_tokens,
+                    "completion_tokens": output_tokens,
+                    "total_tokens": input_tokens + output_tokens,
+                    "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                },
+            }
+        )
+
+    async def embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        # Token id inputs (tiktoken-encoded texts) are embedded by their ids
+        texts = [
+            " ".join(map(str, text)) if isinstance(text, list) else text
+            for text in texts
+        ]
+        self.stats.embeddings += 1
+        tokens = sum(estimate_tokens(text) for text in texts)
+        self.stats.embedding_tokens += tokens
+        return web.json_response(
+            {
+                "object": "list",
+                "data": [
+                    {
+                        "object": "embedding",
+                        "index": i,
+                        "embedding": self.embedder._embed(text),
+                    }
+                    for i, text in enumerate(texts)
+                ],
+                "model": body.get("model", "mock"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            }
+        )
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(asdict(self.stats))
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware], client_max_size=64 << 20)
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_post("/v1/embeddings", self.embeddings)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+
+async def start_mock_server(
+    provider: MockProvider, host: str = "127.0.0.1", port: int = 0
+) -> Tuple[web.AppRunner, str]:
+    """Serves ``provider`` from the running event loop.
+
+    Returns:
+        tuple: The runner (``await runner.cleanup()`` to stop) and the
+        OpenAI-compatible base URL, e.g. ``http://127.0.0.1:8765/v1``
+    """
+    runner = web.AppRunner(provider.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    defaults = MockServerConfig()
+    parser.add_argument("--latency", type=float, default=defaults.latency)
+    parser.add_argument("--jitter", type=float, default=defaults.jitter)
+    parser.add_argument("--slow-rate", type=float, default=defaults.slow_rate)
+    parser.add_argument("--slow-latency", type=float, default=defaults.slow_latency)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-minute", type=int)
+    parser.add_argument("--max-in-flight", type=int)
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--no-prompt-cache", dest="prompt_cache", action="store_false")
+    args = parser.parse_args()
+
+    provider = MockProvider(
+        MockServerConfig(
+            latency=args.latency,
+            jitter=args.jitter,
+            slow_rate=args.slow_rate,
+            slow_latency=args.slow_latency,
+            rate_limit_rate=args.rate_limit_rate,
+            error_rate=args.error_rate,
+            requests_per_minute=args.requests_per_minute,
+            max_in_flight=args.max_in_flight,
+            retry_after=args.retry_after,
+            seed=args.seed,
+            prompt_cache=args.prompt_cache,
+        )
+    )
+    web.run_app(provider.app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
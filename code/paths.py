@@ -1,6 +1,7 @@
 """Path configurations for the project."""
 
 import os
+from dataclasses import dataclass, replace
 
 
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -22,9 +23,95 @@ GOLDEN_DATASET_CSV = os.path.join(DATA_DIR, "golden_dataset.csv")
 
 GOLDEN_DATASET_JSON = os.path.join(DATA_DIR, "golden_dataset.json")
 
+# Typed columnar copy of the CSV and JSON, see code/golden_dataset.py
+GOLDEN_DATASET_PARQUET = os.path.join(DATA_DIR, "golden_dataset.parquet")
+
 
 EVALUATION_RESULTS_CSV = os.path.join(OUTPUTS_DIR, "evaluation_results.csv")
 
+EVALUATION_RESULTS_JSONL = os.path.join(OUTPUTS_DIR, "evaluation_results.jsonl")
+
 COMPLETE_EVALUATION_RESULTS_CSV = os.path.join(
     OUTPUTS_DIR, "complete_evaluation_results.csv"
 )
+
+# Estimates and intervals of adaptive sampling runs, see code/sampling.py
+SAMPLING_ESTIMATES_JSON = os.path.join(OUTPUTS_DIR, "sampling_estimates.json")
+
+# Persistent caches
+CACHE_DIR = os.path.join(OUTPUTS_DIR, "cache")
+
+EMBEDDING_CACHE_DB = os.path.join(CACHE_DIR, "embeddings.sqlite")
+
+LLM_CACHE_DB = os.path.join(CACHE_DIR, "llm_responses.sqlite")
+
+# Fitted model of the local embedding backend, see code/local_embeddings.py
+LOCAL_EMBEDDING_MODEL = os.path.join(CACHE_DIR, "local_embeddings.joblib")
+
+# Tracing spans of evaluation runs, see code/tracing.py
+TRACES_DIR = os.path.join(OUTPUTS_DIR, "traces")
+
+# Judge request batches (input, state and output files per round)
+BATCH_DIR = os.path.join(OUTPUTS_DIR, "batches")
+
+
+@dataclass(frozen=True)
+class EvaluationPaths:
+    """Dataset inputs and result outputs of one evaluation run."""
+
+    dataset_csv: str = GOLDEN_DATASET_CSV
+    dataset_json: str = GOLDEN_DATASET_JSON
+    dataset_parquet: str = GOLDEN_DATASET_PARQUET
+    results_jsonl: str = EVALUATION_RESULTS_JSONL
+    results_csv: str = EVALUATION_RESULTS_CSV
+    complete_results_csv: str = COMPLETE_EVALUATION_RESULTS_CSV
+    traces_dir: str = TRACES_DIR
+    batch_dir: str = BATCH_DIR
+    sampling_json: str = SAMPLING_ESTIMATES_JSON
+
+    @classmethod
+    def in_directories(cls, dataset_dir: str, output_dir: str) -> "EvaluationPaths":
+        """Paths for a golden dataset in ``dataset_dir`` and outputs in ``output_dir``."""
+        return cls(
+            dataset_csv=os.path.join(dataset_dir, "golden_dataset.csv"),
+            dataset_json=os.path.join(dataset_dir, "golden_dataset.json"),
+            dataset_parquet=os.path.join(dataset_dir, "golden_dataset.parquet"),
+            results_jsonl=os.path.join(output_dir, "evaluation_results.jsonl"),
+            results_csv=os.path.join(output_dir, "evaluation_results.csv"),
+            complete_results_csv=os.path.join(
+                output_dir, "complete_evaluation_results.csv"
+            ),
+            traces_dir=os.path.join(output_dir, "traces"),
+            batch_dir=os.path.join(output_dir, "batches"),
+            sampling_json=os.path.join(output_dir, "sampling_estimates.json"),
+        )
+
+    def for_shard(self, shard_index: int, shard_count: int) -> "EvaluationPaths":
+        """Outputs of one shard, in a ``shards/`` directory next to the results."""
+        return self._with_output_dir(
+            os.path.join(
+                os.path.dirname(self.results_jsonl),
+                "shards",
+                f"shard-{shard_index:03d}-of-{shard_count:03d}",
+            )
+        )
+
+    def for_sampling(self) -> "EvaluationPaths":
+        """Outputs of adaptive sampling runs, in a ``sampling/`` directory next
+        to the results, so the sampled publications' store stays separate."""
+        return self._with_output_dir(
+            os.path.join(os.path.dirname(self.results_jsonl), "sampling")
+        )
+
+    def _with_output_dir(self, output_dir: str) -> "EvaluationPaths":
+        return replace(
+            self,
+            results_jsonl=os.path.join(output_dir, "evaluation_results.jsonl"),
+            results_csv=os.path.join(output_dir, "evaluation_results.csv"),
+            complete_results_csv=os.path.join(
+                output_dir, "complete_evaluation_results.csv"
+            ),
+            traces_dir=os.path.join(output_dir, "traces"),
+            batch_dir=os.path.join(output_dir, "batches"),
+            sampling_json=os.path.join(output_dir, "sampling_estimates.json"),
+        )
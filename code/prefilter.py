@@ -0,0 +1,459 @@
+"""
+Cheap local pre-filter that decides clear-cut faithfulness and coherence
+cases without the LLM judge.
+
+Every generated item gets three signals:
+
+- ``support``: share of its content words that occur in the context,
+- ``cosine``: cosine similarity of its embedding with the context's (both
+  come from the run's EmbeddingIndex, so they are usually cached), and
+- ``truth_ratio``: rapidfuzz ratio with the closest truth text of its field.
+
+An item that (nearly) repeats the truth, or whose words and embedding both
+closely match the context, is decided faithful; one whose words and
+embedding both barely match the context is decided unfaithful. Everything
+in between is escalated to the judge. Content coherence of a publication is
+decided the same way from the weakest field, and otherwise judged.
+
+The thresholds are configured in ``config.yaml`` (``prefilter_*``). Before
+relying on them, run this module to compare its decisions with a run that
+was fully judged:
+
+    python code/prefilter.py --publications 200
+"""
+
+import argparse
+import asyncio
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from rapidfuzz import fuzz, process, utils
+
+from embedding_index import EmbeddingIndex, cosine_similarities
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Shorter words (articles, prepositions, ...) say little about support
+MIN_WORD_LENGTH = 3
+
+# Judge scores counted as agreeing with a decided-high or decided-low item
+AGREEMENT_HIGH = 0.8
+AGREEMENT_LOW = 0.2
+
+
+def content_words(text: str) -> set:
+    """Lower-cased words of ``text`` of at least ``MIN_WORD_LENGTH`` characters."""
+    return {
+        word
+        for word in TOKEN_PATTERN.findall(text.lower())
+        if len(word) >= MIN_WORD_LENGTH
+    }
+
+
+def item_text(item) -> str:
+    """Text of a generated or truth item, without the keys of dict items."""
+    if isinstance(item, dict):
+        return " ".join(str(value) for value in item.values() if value)
+    return str(item)
+
+
+def context_support(text: str, vocabulary: set) -> float:
+    """Share of the content words of ``text`` found in ``vocabulary`` (NaN if none)."""
+    words = content_words(text)
+    if not words:
+        return math.nan
+    return len(words & vocabulary) / len(words)
+
+
+def truth_ratio(text: str, truths: List[str]) -> float:
+    """Similarity in [0, 1] of ``text`` with the closest of ``truths``."""
+    match = process.extractOne(
+        text, truths, scorer=fuzz.ratio, processor=utils.default_process
+    )
+    return match[1] / 100 if match else 0.0
+
+
+@dataclass
+class PrefilterThresholds:
+    """Signal thresholds and the scores given to decided items."""
+
+    truth_ratio: float = 0.95
+    high_support: float = 0.9
+    high_cosine: float = 0.85
+    low_support: float = 0.2
+    low_cosine: float = 0.7
+    high_score: float = 1.0
+    low_score: float = 0.0
+    coherence_high_score: float = 0.9
+    coherence_low_score: float = 0.1
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "PrefilterThresholds":
+        defaults = cls()
+        return cls(
+            **{
+                name: config.get(f"prefilter_{name}", getattr(defaults, name))
+                for name in defaults.__dataclass_fields__
+            }
+        )
+
+
+@dataclass
+class ItemSignals:
+    """Local signals of one generated item."""
+
+    support: float
+    cosine: float
+    truth_ratio: float
+
+
+@dataclass
+class Assessment:
+    """Pre-filter outcome of one publication.
+
+    ``faithfulness`` maps each field to one entry per generated item: the
+    decided score, or None if the item goes to the judge. ``coherence`` is
+    the decided content coherence, or None.
+    """
+
+    signals: Dict[str, List[ItemSignals]]
+    faithfulness: Dict[str, List[Optional[float]]]
+    coherence: Optional[float]
+
+    def pending_fields(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """The fields with escalated items, holding only those items.
+
+        List fields stay lists, single-text fields stay single texts.
+        """
+        pending = {}
+        for metric_name, generated in fields.items():
+            texts = generated if isinstance(generated, list) else [generated]
+            escalated = [
+                text
+                for text, score in zip(texts, self.faithfulness[metric_name])
+                if score is None
+            ]
+            if escalated:
+                pending[metric_name] = (
+                    escalated if isinstance(generated, list) else escalated[0]
+                )
+        return pending
+
+    def merge_faithfulness(
+        self, metric_name: str, generated, judged: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Faithfulness scores of a field from its decided and judged items.
+
+        Args:
+            metric_name: Field name.
+            generated: The field's generated text or list of texts.
+            judged: Judge result for the field's escalated items, as returned
+                by ``evaluate_faithfulness``, or None if none were escalated.
+
+        Returns:
+            dict: The keys and shapes ``evaluate_faithfulness`` returns for
+            ``generated``.
+        """
+        key = f"{metric_name}_faithfulness"
+        judged_scores = []
+        if judged is not None:
+            judged_scores = judged[key]
+            if not isinstance(judged_scores, list):
+                judged_scores = [judged_scores]
+        judged_scores = iter(judged_scores)
+        scores = [
+            next(judged_scores) if score is None else score
+            for score in self.faithfulness[metric_name]
+        ]
+        if isinstance(generated, list):
+            return {key: scores, f"{key}_mean": np.mean(scores)}
+        return {key: scores[0]}
+
+
+class Prefilter:
+    """
+    Decides faithfulness items and content coherence from local signals,
+    counting how many were decided high, decided low or escalated.
+    """
+
+    def __init__(self, thresholds: PrefilterThresholds = None):
+        self.thresholds = thresholds or PrefilterThresholds()
+        self.counts = {
+            kind: {"high": 0, "low": 0, "escalated": 0}
+            for kind in ("faithfulness", "coherence")
+        }
+
+    def decide(self, signals: ItemSignals) -> Optional[float]:
+        """Decided faithfulness score of an item, or None to escalate it."""
+        limits = self.thresholds
+        if signals.truth_ratio >= limits.truth_ratio:
+            return limits.high_score
+        if math.isnan(signals.support):
+            return None
+        if signals.support >= limits.high_support and (
+            signals.cosine >= limits.high_cosine
+        ):
+            return limits.high_score
+        if signals.support <= limits.low_support and (
+            signals.cosine <= limits.low_cosine
+        ):
+            return limits.low_score
+        return None
+
+    def decide_coherence(
+        self, signals: Dict[str, List[ItemSignals]]
+    ) -> Optional[float]:
+        """Decided content coherence of a publication, or None to escalate it.
+
+        Coherent only if even the weakest field closely matches the context;
+        incoherent if on average the fields barely match it.
+        """
+        limits = self.thresholds
+        supports, cosines = [], []
+        for items in signals.values():
+            item_supports = [item.support for item in items]
+            if not items or any(math.isnan(value) for value in item_supports):
+                return None
+            supports.append(np.mean(item_supports))
+            cosines.append(np.mean([item.cosine for item in items]))
+        if not supports:
+            return None
+        if min(supports) >= limits.high_support and min(cosines) >= limits.high_cosine:
+            return limits.coherence_high_score
+        if (
+            np.mean(supports) <= limits.low_support
+            and np.mean(cosines) <= limits.low_cosine
+        ):
+            return limits.coherence_low_score
+        return None
+
+    async def assess(
+        self,
+        index: EmbeddingIndex,
+        context: str,
+        fields: Dict[str, Any],
+        truths: Dict[str, List],
+        decide: Optional[Iterable[str]] = None,
+        coherence: bool = True,
+    ) -> Assessment:
+        """Computes the signals of every generated item and decides what it can.
+
+        Args:
+            index: Embedding index of the run.
+            context: Truncated publication description given to the judge.
+            fields: Mapping from metric name to the generated text(s) judged.
+            truths: Mapping from metric name to the truth text(s) of the field.
+            decide: Names of the fields whose faithfulness still needs a
+                score (all if None); the others are left out of the assessment.
+            coherence: Whether content coherence still needs a score.
+        """
+        decide = set(fields if decide is None else decide)
+        vocabulary = content_words(context)
+        # Coherence is decided from the signals of every field
+        texts = {
+            metric_name: generated if isinstance(generated, list) else [generated]
+            for metric_name, generated in fields.items()
+            if coherence or metric_name in decide
+        }
+        items = [item for field_items in texts.values() for item in field_items]
+        vectors = await index.get([context, *items])
+        cosines = iter(cosine_similarities(vectors[1:], vectors[0]).tolist())
+
+        signals, faithfulness = {}, {}
+        for metric_name, field_items in texts.items():
+            field_truths = [item_text(truth) for truth in truths[metric_name]]
+            signals[metric_name] = [
+                ItemSignals(
+                    support=context_support(item_text(item), vocabulary),
+                    cosine=next(cosines),
+                    truth_ratio=truth_ratio(item_text(item), field_truths),
+                )
+                for item in field_items
+            ]
+            if metric_name in decide:
+                faithfulness[metric_name] = [
+                    self.decide(item) for item in signals[metric_name]
+                ]
+
+        limits = self.thresholds
+        for scores in faithfulness.values():
+            for score in scores:
+                self._count("faithfulness", score, limits.high_score)
+        decided_coherence = None
+        if coherence:
+            if context:
+                decided_coherence = self.decide_coherence(signals)
+            self._count("coherence", decided_coherence, limits.coherence_high_score)
+        return Assessment(signals, faithfulness, decided_coherence)
+
+    def _count(self, kind: str, score: Optional[float], high_score: float) -> None:
+        if score is None:
+            self.counts[kind]["escalated"] += 1
+        elif score == high_score:
+            self.counts[kind]["high"] += 1
+        else:
+            self.counts[kind]["low"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Decided-high, decided-low and escalated counts, by judged metric."""
+        return {kind: dict(counts) for kind, counts in self.counts.items()}
+
+
+def escalation_rate(counts: Dict[str, int]) -> float:
+    """Share of the units counted in ``counts`` that went to the judge."""
+    total = counts["high"] + counts["low"] + counts["escalated"]
+    return counts["escalated"] / total if total else 0.0
+
+
+@dataclass
+class Calibration:
+    """Decisions of the pre-filter compared with judge scores."""
+
+    decided: Dict[str, int] = field(
+        default_factory=lambda: {"high": 0, "low": 0, "escalated": 0}
+    )
+    agreed: int = 0
+    errors: List[float] = field(default_factory=list)
+
+    def add(self, decided: Optional[float], judged, high_score: float) -> None:
+        if judged is None or (isinstance(judged, float) and math.isnan(judged)):
+            return
+        if decided is None:
+            self.decided["escalated"] += 1
+            return
+        high = decided == high_score
+        self.decided["high" if high else "low"] += 1
+        self.agreed += judged >= AGREEMENT_HIGH if high else judged <= AGREEMENT_LOW
+        self.errors.append(abs(decided - judged))
+
+    def summary(self) -> Dict[str, float]:
+        decided = self.decided["high"] + self.decided["low"]
+        return {
+            **self.decided,
+            "escalation_rate": escalation_rate(self.decided),
+            "agreement": self.agreed / decided if decided else math.nan,
+            "mean_abs_error": np.mean(self.errors) if self.errors else math.nan,
+        }
+
+
+async def calibrate(eval_ctx, rows, stored_results, prefilter: Prefilter):
+    """Compares pre-filter decisions with the judge scores of a full run.
+
+    Args:
+        eval_ctx: Evaluation context (only its embeddings and truncator are used).
+        rows: Golden dataset rows that were fully judged.
+        stored_results: Mapping from publication id to its stored result,
+            produced without the pre-filter.
+        prefilter: Pre-filter with the thresholds to calibrate.
+
+    Returns:
+        dict: ``Calibration`` summaries of "faithfulness" and "coherence".
+    """
+    from run_lesson6_multiagent_case_study_evals import (
+        faithfulness_fields,
+        faithfulness_truths,
+    )
+
+    limits = prefilter.thresholds
+    faithfulness, coherence = Calibration(), Calibration()
+    for _, row in rows.iterrows():
+        result = stored_results.get(row["publication_external_id"])
+        if result is None:
+            continue
+        context = eval_ctx.truncator.truncate(row["publication_description"])
+        assessment = await prefilter.assess(
+            eval_ctx.embedding_index,
+            context,
+            faithfulness_fields(row),
+            faithfulness_truths(row),
+        )
+        for metric_name, decided in assessment.faithfulness.items():
+            judged = result.get(f"{metric_name}_faithfulness")
+            judged = judged if isinstance(judged, list) else [judged]
+            if len(judged) != len(decided):
+                continue
+            for decided_score, judged_score in zip(decided, judged):
+                faithfulness.add(decided_score, judged_score, limits.high_score)
+        coherence.add(
+            assessment.coherence,
+            result.get("content_coherence"),
+            limits.coherence_high_score,
+        )
+    return {"faithfulness": faithfulness.summary(), "coherence": coherence.summary()}
+
+
+def print_calibration(label: str, report: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{label}")
+    for kind, stat in report.items():
+        print(
+            f"  {kind}: {stat['high']} decided high, {stat['low']} decided low, "
+            f"{stat['escalated']} escalated ({stat['escalation_rate']:.1%}), "
+            f"agreement {stat['agreement']:.1%}, "
+            f"mean abs error {stat['mean_abs_error']:.3f}"
+        )
+
+
+async def main(args):
+    from evaluation_context import build_evaluation_context
+    from golden_dataset import iter_golden_dataset
+    from results_store import ID_COLUMN, iter_records
+    from utils import load_config
+
+    config = load_config()
+    eval_ctx = build_evaluation_context(config)
+    # The latest record of a publication wins
+    records = {
+        record["result"][ID_COLUMN]: record for _, record in iter_records(args.results)
+    }
+    stored_results = {
+        pub_id: record["result"]
+        for pub_id, record in records.items()
+        if record["status"] == "ok"
+    }
+    rows = next(iter_golden_dataset(args.publications, chunksize=args.publications))
+    rows = rows[rows["publication_external_id"].isin(stored_results)]
+    print(f"Calibrating on {len(rows)} fully judged publications from {args.results}")
+
+    base = PrefilterThresholds.from_config(config)
+    print_calibration(
+        "Configured thresholds:",
+        await calibrate(eval_ctx, rows, stored_results, Prefilter(base)),
+    )
+    # Looser and stricter bands around the configured ones
+    for scale in args.sweep:
+        thresholds = PrefilterThresholds(
+            **{
+                **base.__dict__,
+                "high_support": min(1.0, base.high_support * scale),
+                "high_cosine": min(1.0, base.high_cosine * scale),
+                "low_support": base.low_support / scale,
+                "low_cosine": base.low_cosine / scale,
+            }
+        )
+        print_calibration(
+            f"High thresholds x{scale:g}, low thresholds /{scale:g}:",
+            await calibrate(eval_ctx, rows, stored_results, Prefilter(thresholds)),
+        )
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    from paths import EVALUATION_RESULTS_JSONL
+
+    parser = argparse.ArgumentParser(
+        description="Compare pre-filter decisions with a fully judged run."
+    )
+    parser.add_argument("--publications", type=int, default=200)
+    parser.add_argument(
+        "--results",
+        default=EVALUATION_RESULTS_JSONL,
+        help="Results store of a run evaluated with prefilter disabled",
+    )
+    parser.add_argument("--sweep", type=float, nargs="*", default=[0.95, 1.05])
+    args = parser.parse_args()
+    load_dotenv()
+    asyncio.run(main(args))
@@ -2,6 +2,8 @@
 Prompt template construction functions for building modular prompts.
 """
 
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Union, List, Optional, Dict, Any
 
 
@@ -34,20 +36,68 @@ def format_prompt_section(lead_in: str, value: Union[str, List[str]]) -> str:
     return f"{lead_in}\n{formatted_value}"
 
 
-def build_prompt_from_config(
+CONTENT_HEADER = (
+    "Here is the content you need to work with:\n<<<BEGIN CONTENT>>>\n```\n"
+)
+
+CONTENT_FOOTER = "\n```\n<<<END CONTENT>>>"
+
+SECTION_SEPARATOR = "\n\n"
+
+# Compiled templates by (id(config), id(app_config)), see get_prompt_template
+_template_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+TEMPLATE_CACHE_SIZE = 128
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A prompt with every section except the input data already assembled.
+
+    Attributes:
+        prefix: Sections before the content, including the trailing separator.
+        suffix: Sections after the content (reasoning strategy and closing line).
+    """
+
+    prefix: str
+    suffix: str
+
+    def render(self, input_data: str = "") -> str:
+        """Returns the prompt for ``input_data``.
+
+        Args:
+            input_data: Content to be summarized or processed.
+
+        Returns:
+            The same string as ``build_prompt_from_config`` for this config.
+        """
+        if input_data:
+            # A single join copies the (possibly long) input data only once
+            return "".join(
+                (
+                    self.prefix,
+                    CONTENT_HEADER,
+                    input_data.strip(),
+                    CONTENT_FOOTER,
+                    SECTION_SEPARATOR,
+                    self.suffix,
+                )
+            )
+        return self.prefix + self.suffix
+
+
+def compile_prompt(
     config: Dict[str, Any],
-    input_data: str = "",
     app_config: Optional[Dict[str, Any]] = None,
-) -> str:
-    """Builds a complete prompt string based on a config dictionary.
+) -> PromptTemplate:
+    """Assembles the static sections of a prompt config into a template.
 
     Args:
         config: Dictionary specifying prompt components.
-        input_data: Content to be summarized or processed.
         app_config: Optional app-wide configuration (e.g., reasoning strategies).
 
     Returns:
-        A fully constructed prompt as a string.
+        A PromptTemplate whose ``render`` only inserts the input data.
 
     Raises:
         ValueError: If the required 'instruction' field is missing.
@@ -95,21 +145,79 @@ def build_prompt_from_config(
     if goal := config.get("goal"):
         prompt_parts.append(f"Your goal is to achieve the following outcome:\n{goal}")
 
-    if input_data:
-        prompt_parts.append(
-            "Here is the content you need to work with:\n"
-            "<<<BEGIN CONTENT>>>\n"
-            "```\n" + input_data.strip() + "\n```\n<<<END CONTENT>>>"
-        )
+    # The input data goes here, between the prefix and the suffix
+    suffix_parts = []
 
     reasoning_strategy = config.get("reasoning_strategy")
     if reasoning_strategy and reasoning_strategy != "None" and app_config:
         strategies = app_config.get("reasoning_strategies", {})
         if strategy_text := strategies.get(reasoning_strategy):
-            prompt_parts.append(strategy_text.strip())
+            suffix_parts.append(strategy_text.strip())
+
+    suffix_parts.append("Now perform the task as instructed above.")
+    return PromptTemplate(
+        prefix=SECTION_SEPARATOR.join(prompt_parts) + SECTION_SEPARATOR,
+        suffix=SECTION_SEPARATOR.join(suffix_parts),
+    )
 
-    prompt_parts.append("Now perform the task as instructed above.")
-    return "\n\n".join(prompt_parts)
+
+def get_prompt_template(
+    config: Dict[str, Any],
+    app_config: Optional[Dict[str, Any]] = None,
+) -> PromptTemplate:
+    """Returns the compiled template of a config, compiling it on first use.
+
+    Templates are cached by the identity of the config objects (the cache
+    keeps them alive, so ids are not reused), which makes a lookup constant
+    time however large the config is. Configs are loaded once and treated as
+    read-only; after mutating one in place, call ``clear_prompt_cache``.
+
+    Args:
+        config: Dictionary specifying prompt components.
+        app_config: Optional app-wide configuration (e.g., reasoning strategies).
+
+    Returns:
+        The compiled PromptTemplate.
+    """
+    key = (id(config), id(app_config))
+    entry = _template_cache.get(key)
+    if entry is not None:
+        _template_cache.move_to_end(key)
+        return entry[2]
+    template = compile_prompt(config, app_config)
+    _template_cache[key] = (config, app_config, template)
+    if len(_template_cache) > TEMPLATE_CACHE_SIZE:
+        _template_cache.popitem(last=False)
+    return template
+
+
+def clear_prompt_cache() -> None:
+    """Drops all compiled templates."""
+    _template_cache.clear()
+
+
+def build_prompt_from_config(
+    config: Dict[str, Any],
+    input_data: str = "",
+    app_config: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Builds a complete prompt string based on a config dictionary.
+
+    Args:
+        config: Dictionary specifying prompt components.
+        input_data: Content to be summarized or processed.
+        app_config: Optional app-wide configuration (e.g., reasoning strategies).
+
+    Returns:
+        A fully constructed prompt as a string.
+
+    Raises:
+        ValueError: If the required 'instruction' field is missing.
+
+    To build prompts for many inputs from the same config, render
+    ``get_prompt_template(config, app_config)`` instead.
+    """
+    return compile_prompt(config, app_config).render(input_data)
 
 
 def print_prompt_preview(prompt: str, max_length: int = 500) -> None:
@@ -0,0 +1,69 @@
+"""
+Judge prompt layout for provider-side prompt caching.
+
+Providers such as OpenAI cache the longest previously seen prefix of a
+prompt (from 1024 tokens, in 128-token steps) and bill cached input tokens
+at a discount and with lower latency. Ragas renders a prompt as the metric's
+instruction, output schema and examples followed by the input JSON, so the
+publication content comes last and no two metrics share more than a few
+tokens of prefix.
+
+``ContextFirstPrompt`` moves the ``context`` input field into a block at
+the very start of the prompt. The block depends on nothing but the context,
+so every judge prompt about a publication (NLI verdicts for each field,
+combined faithfulness, coherence) starts with the same bytes, and only the
+short metric instruction and generated text differ.
+"""
+
+import typing as t
+
+from ragas.metrics._faithfulness import NLIStatementPrompt
+from ragas.prompt import PydanticPrompt
+
+CONTEXT_BLOCK_START = (
+    "Source content (referred to as the context below):\n<<<BEGIN CONTEXT>>>\n"
+)
+
+CONTEXT_BLOCK_END = "\n<<<END CONTEXT>>>\n\n"
+
+
+def context_prefix(context: str) -> str:
+    """The prompt prefix shared by every judge prompt about ``context``."""
+    return CONTEXT_BLOCK_START + context + CONTEXT_BLOCK_END
+
+
+def split_context_prefix(prompt: str) -> t.Tuple[t.Optional[str], str]:
+    """Splits a rendered prompt into its context and the rest.
+
+    Returns:
+        tuple: (context, remaining prompt), with None as the context if the
+        prompt does not start with a context block.
+    """
+    if not prompt.startswith(CONTEXT_BLOCK_START):
+        return None, prompt
+    end = prompt.find(CONTEXT_BLOCK_END, len(CONTEXT_BLOCK_START))
+    if end == -1:
+        return None, prompt
+    return (
+        prompt[len(CONTEXT_BLOCK_START) : end],
+        prompt[end + len(CONTEXT_BLOCK_END) :],
+    )
+
+
+class ContextFirstPrompt(PydanticPrompt):
+    """
+    Renders the ``context`` of the input before the instruction, and the
+    rest of the input as usual. Inputs without a context render unchanged.
+    """
+
+    def to_string(self, data=None) -> str:
+        context = getattr(data, "context", None)
+        if not context:
+            return super().to_string(data)
+        # The input JSON is dumped with exclude_none, which drops the context
+        rest = data.model_copy(update={"context": None})
+        return context_prefix(context) + super().to_string(rest)
+
+
+class ContextFirstNLIStatementPrompt(ContextFirstPrompt, NLIStatementPrompt):
+    """Ragas' faithfulness verdict prompt with the context block first."""
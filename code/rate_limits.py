@@ -0,0 +1,355 @@
+"""
+Rate-limit-aware client layer for the judge LLM.
+
+``RateLimitedChatModel`` wraps the chat model returned by ``get_llm`` and, for
+every request:
+
+1. waits for the model's request and token buckets (client-side requests and
+   tokens per minute limits),
+2. waits for a slot under an AIMD concurrency limit, which is halved when the
+   provider answers 429 and grows back by one slot per window of successes,
+3. retries rate limits, timeouts and 5xx responses with jittered exponential
+   backoff (honoring ``Retry-After``) until the retry budget or the request's
+   deadline runs out.
+
+Requests, retries, 429s and time spent waiting are recorded per metric; the
+metric is taken from the ``current_metric`` context variable, which the
+evaluator sets with ``metric_scope``.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from pydantic import Field
+
+from tracing import record_llm_run
+
+current_metric: ContextVar[str] = ContextVar("current_metric", default="other")
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+RETRYABLE_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "InternalServerError"}
+
+
+@contextmanager
+def metric_scope(metric_name: str):
+    """Attributes the LLM requests made inside the block to ``metric_name``."""
+    token = current_metric.set(metric_name)
+    try:
+        yield
+    finally:
+        current_metric.reset(token)
+
+
+@dataclass
+class RateLimits:
+    """Client-side limits and retry policy for one judge model."""
+
+    requests_per_minute: float = 500
+    tokens_per_minute: float = 200_000
+    max_concurrency: int = 8
+    max_retries: int = 6
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    request_timeout: float = 60.0
+    deadline: float = 300.0
+    # Tokens reserved for the completion until the actual usage is known
+    output_tokens_estimate: int = 512
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RateLimits":
+        defaults = cls()
+        return cls(
+            requests_per_minute=config.get(
+                "llm_requests_per_minute", defaults.requests_per_minute
+            ),
+            tokens_per_minute=config.get(
+                "llm_tokens_per_minute", defaults.tokens_per_minute
+            ),
+            max_concurrency=config.get("max_concurrency", defaults.max_concurrency),
+            max_retries=config.get("llm_max_retries", defaults.max_retries),
+            request_timeout=config.get("llm_request_timeout", defaults.request_timeout),
+            deadline=config.get("llm_deadline", defaults.deadline),
+        )
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry ``attempt`` (0-based), with full jitter."""
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``rate_per_minute``.
+
+    The bucket holds at most ``capacity`` units (by default ten seconds of
+    budget). Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1.0, rate_per_minute / 6.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Takes ``amount`` units, waiting until they are available.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        amount = min(amount, self.capacity)
+        start = time.monotonic()
+        async with self._lock:
+            self._refill()
+            while self.level < amount:
+                await asyncio.sleep((amount - self.level) / self.rate)
+                self._refill()
+            self.level -= amount
+        return time.monotonic() - start
+
+    def adjust(self, amount: float) -> None:
+        """Charges (positive) or refunds (negative) units after the fact."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class AdaptiveConcurrency:
+    """Concurrency limit with additive increase and multiplicative decrease.
+
+    Every successful request adds ``1 / limit`` (one slot per window of
+    ``limit`` successes); a throttled request multiplies the limit by
+    ``decrease_factor``. Only requests sent after the previous decrease can
+    decrease it again, so a burst of 429s from one window counts once.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1, decrease_factor: float = 0.5):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.decrease_factor = decrease_factor
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self._last_decrease = float("-inf")
+        self._waiters = deque()
+
+    async def acquire(self) -> float:
+        """Waits for a free slot. Returns the seconds spent waiting."""
+        start = time.monotonic()
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+        return time.monotonic() - start
+
+    def release(self, sent_at: float, throttled: bool = False) -> None:
+        """Frees the slot of a request sent at ``sent_at`` (``time.monotonic()``)."""
+        self.in_flight -= 1
+        if throttled:
+            if sent_at >= self._last_decrease:
+                self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                self._last_decrease = time.monotonic()
+        else:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+@dataclass
+class MetricRequestStats:
+    requests: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    failures: int = 0
+    throttle_wait: float = 0.0
+    backoff_wait: float = 0.0
+
+
+@dataclass
+class RateLimitStats:
+    """Request statistics of a RateLimitedChatModel, by metric."""
+
+    metrics: Dict[str, MetricRequestStats] = field(default_factory=dict)
+
+    def for_metric(self, metric_name: str) -> MetricRequestStats:
+        return self.metrics.setdefault(metric_name, MetricRequestStats())
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {name: asdict(stats) for name, stats in sorted(self.metrics.items())}
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code
+
+
+def is_rate_limit(error: BaseException) -> bool:
+    return status_code(error) == 429 or "RateLimit" in type(error).__name__
+
+
+def is_retryable(error: BaseException) -> bool:
+    return (
+        is_rate_limit(error)
+        or status_code(error) in RETRYABLE_STATUS_CODES
+        or isinstance(error, (asyncio.TimeoutError, ConnectionError))
+        or type(error).__name__ in RETRYABLE_ERROR_NAMES
+    )
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked to wait (``Retry-After`` header), if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    """Rough prompt size (4 characters per token) used to reserve token budget."""
+    return sum(len(str(message.content)) for message in messages) // 4 + 1
+
+
+class RateLimitedChatModel(BaseChatModel):
+    """
+    Chat model that throttles, adapts concurrency and retries around another one.
+
+    Caching belongs on this wrapper (cache hits then skip the limits), and
+    the wrapped model should not retry on its own. The limits are asyncio
+    primitives, so only the async path is supported; synchronous calls raise
+    instead of bypassing them.
+    """
+
+    model: BaseChatModel
+    limits: RateLimits = Field(default_factory=RateLimits)
+    request_bucket: Any = Field(default=None, exclude=True)
+    token_bucket: Any = Field(default=None, exclude=True)
+    concurrency: Any = Field(default=None, exclude=True)
+    stats: Any = Field(default=None, exclude=True)
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.request_bucket = TokenBucket(self.limits.requests_per_minute)
+        self.token_bucket = TokenBucket(self.limits.tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(self.limits.max_concurrency)
+        self.stats = RateLimitStats()
+
+    @property
+    def model_name(self) -> Optional[str]:
+        return getattr(self.model, "model_name", None)
+
+    @property
+    def _llm_type(self) -> str:
+        return self.model._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.model._identifying_params
+
+    def _get_llm_string(self, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        # Cache entries are keyed by the wrapped model's parameters
+        return self.model._get_llm_string(stop=stop, **kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        raise NotImplementedError(
+            "RateLimitedChatModel only supports async calls (ainvoke/agenerate); "
+            "call the wrapped model directly to bypass the rate limits"
+        )
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        limits = self.limits
+        stats = self.stats.for_metric(current_metric.get())
+        stats.requests += 1
+        estimated = estimate_tokens(messages) + limits.output_tokens_estimate
+        deadline = time.monotonic() + limits.deadline
+        run_id = getattr(run_manager, "run_id", None)
+
+        attempt = 0
+        while True:
+            throttle_wait = await self.request_bucket.acquire(1)
+            throttle_wait += await self.token_bucket.acquire(estimated)
+            throttle_wait += await self.concurrency.acquire()
+            stats.throttle_wait += throttle_wait
+            record_llm_run(run_id, throttle_wait=throttle_wait)
+
+            throttled = False
+            sent_at = time.monotonic()
+            try:
+                timeout = min(limits.request_timeout, deadline - time.monotonic())
+                result = await asyncio.wait_for(
+                    self.model._agenerate(
+                        messages, stop=stop, run_manager=run_manager, **kwargs
+                    ),
+                    timeout=max(timeout, 0.001),
+                )
+            except Exception as error:
+                # The failed attempt's reservation goes back to the budget;
+                # a retry reserves it again
+                self.token_bucket.adjust(-estimated)
+                throttled = is_rate_limit(error)
+                stats.rate_limited += int(throttled)
+                delay = limits.backoff(attempt, retry_after(error))
+                if (
+                    not is_retryable(error)
+                    or attempt >= limits.max_retries
+                    or time.monotonic() + delay >= deadline
+                ):
+                    stats.failures += 1
+                    raise
+            else:
+                usage = getattr(result.generations[0].message, "usage_metadata", None)
+                if usage and usage.get("total_tokens"):
+                    self.token_bucket.adjust(usage["total_tokens"] - estimated)
+                return result
+            finally:
+                self.concurrency.release(sent_at, throttled)
+
+            attempt += 1
+            stats.retries += 1
+            stats.backoff_wait += delay
+            record_llm_run(run_id, retries=1, rate_limited=int(throttled))
+            await asyncio.sleep(delay)
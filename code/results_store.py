@@ -0,0 +1,201 @@
+"""
+Append-only JSONL store for per-publication evaluation results.
+
+Each line is a record ``{"status": "ok" | "error", "result": {...}}``, plus
+the ``fingerprints`` of the result's inputs if known, written and flushed as
+soon as a publication finishes, so an interrupted run loses at most the
+publications that were in flight. When a publication appears more
+than once (e.g. it failed and was retried), the last record wins.
+"""
+
+import json
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+ID_COLUMN = "publication_external_id"
+
+
+class ResultsWriter:
+    """Appends result records to a JSONL file, one flushed line per publication."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        drop_partial_line(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.close()
+        self._file = None
+
+    def write(
+        self,
+        result: Dict,
+        error: Optional[str] = None,
+        fingerprints: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Appends one publication's result.
+
+        Args:
+            result: Result dictionary of the publication.
+            error: Error message if the evaluation failed, else None.
+            fingerprints: Optional input fingerprint of each metric group
+                (see ``fingerprints``).
+        """
+        record = {"status": "error" if error else "ok", "result": result}
+        if error:
+            record["error"] = error
+        if fingerprints:
+            record["fingerprints"] = fingerprints
+        self._file.write(json.dumps(record, default=float) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+def drop_partial_line(path: str, block_size: int = 65536) -> None:
+    """Truncates the store after its last newline.
+
+    A crash mid-write leaves a partial last line; the next record appended
+    would otherwise be glued onto it and lost with it.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            print(
+                f"Warning: dropping a partial last line of {end - position} bytes "
+                f"from {path}"
+            )
+            f.truncate(position)
+
+
+def reset_results(path: str) -> None:
+    """Deletes a results store so the next run starts from scratch."""
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def iter_records(path: str) -> Iterator[Tuple[int, Dict]]:
+    """Yields ``(byte_offset, record)`` for every complete line of the store.
+
+    A partially written last line (e.g. from a crash mid-write) is skipped,
+    with a warning giving the number of lines skipped.
+    """
+    if not os.path.exists(path):
+        return
+    skipped = 0
+    with open(path, "rb") as f:
+        offset = f.tell()
+        for line in iter(f.readline, b""):
+            try:
+                yield offset, json.loads(line)
+            except json.JSONDecodeError:
+                skipped += 1
+            offset = f.tell()
+    if skipped:
+        print(f"Warning: skipped {skipped} unreadable lines of {path}")
+
+
+def load_completed_ids(path: str) -> Set[str]:
+    """Returns the ids whose latest record in the store succeeded."""
+    status = {}
+    for _, record in iter_records(path):
+        status[record["result"][ID_COLUMN]] = record["status"]
+    return {pub_id for pub_id, state in status.items() if state == "ok"}
+
+
+def index_results(path: str) -> Tuple[Dict[str, int], List[str]]:
+    """Indexes the store without keeping the results in memory.
+
+    Returns:
+        tuple: (offset of the latest record per id, result columns in
+        first-seen order)
+    """
+    offsets, columns = {}, {}
+    for offset, record in iter_records(path):
+        offsets[record["result"][ID_COLUMN]] = offset
+        columns.update(dict.fromkeys(record["result"]))
+    return offsets, list(columns) or [ID_COLUMN]
+
+
+def read_result(f, offset: int) -> Dict:
+    """Reads the result stored at ``offset`` of an open store file."""
+    f.seek(offset)
+    return json.loads(f.readline())["result"]
+
+
+def write_merged_results(
+    path: str,
+    dataset_csv: str,
+    results_csv: str,
+    complete_results_csv: str,
+    num_publications: Optional[int] = None,
+    chunksize: int = 1000,
+    evaluated_only: bool = False,
+    on_result: Optional[Callable[[Dict], None]] = None,
+) -> int:
+    """Writes the results CSVs from the store in one streaming pass.
+
+    Walks the golden dataset in chunks, looks up each publication's latest
+    result by offset and appends it to ``results_csv``; the dataset rows
+    merged with their results are appended to ``complete_results_csv``. Only
+    one chunk of results is held in memory at a time.
+
+    Args:
+        path: JSONL results store.
+        dataset_csv: Golden dataset CSV the results belong to.
+        results_csv: Output path for the results.
+        complete_results_csv: Output path for the dataset merged with results.
+        num_publications: Only merge the first N rows of the dataset.
+        chunksize: Number of dataset rows processed at a time.
+        evaluated_only: Leave dataset rows without a result out of
+            ``complete_results_csv`` (e.g. rows of other shards).
+        on_result: Optional callback invoked with every result written, e.g.
+            to aggregate statistics in the same pass.
+
+    Returns:
+        int: Number of result rows written.
+    """
+    # pandas takes a while to import; the store's other users don't need it
+    import pandas as pd
+
+    offsets, columns = index_results(path)
+    written = 0
+    with open(path, "rb") as store:
+        chunks = pd.read_csv(dataset_csv, nrows=num_publications, chunksize=chunksize)
+        for i, chunk in enumerate(chunks):
+            results = [
+                read_result(store, offsets[pub_id])
+                for pub_id in chunk[ID_COLUMN]
+                if pub_id in offsets
+            ]
+            if on_result is not None:
+                for result in results:
+                    on_result(result)
+            results_chunk = pd.DataFrame(results, columns=columns)
+            if evaluated_only:
+                chunk = chunk[chunk[ID_COLUMN].isin(offsets)]
+            complete_chunk = chunk.merge(results_chunk, on=ID_COLUMN, how="left")
+
+            mode, header = ("w", True) if i == 0 else ("a", False)
+            results_chunk.to_csv(results_csv, mode=mode, header=header, index=False)
+            complete_chunk.to_csv(
+                complete_results_csv, mode=mode, header=header, index=False
+            )
+            written += len(results_chunk)
+    return written
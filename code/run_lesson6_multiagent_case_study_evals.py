@@ -1,298 +1,1412 @@
-import ast
-import numpy as np
-import asyncio
-from ragas.dataset_schema import SingleTurnSample
-from ragas.metrics import SemanticSimilarity, Faithfulness
-from ragas.embeddings import LangchainEmbeddingsWrapper
-from langchain_openai import OpenAIEmbeddings
-from ragas.llms import LangchainLLMWrapper
-from dotenv import load_dotenv
-from llm import get_llm
-
-# Import your custom coherence metric
-from coherence import ContentCoherenceMetric, CoherenceInput
-
-# Import utility functions
-from utils import (
-    truncate_context,
-    load_dataset,
-    load_publication_descriptions,
-    print_evaluation_scores,
-    save_evaluation_results,
-    print_evaluation_summary,
-    initialize_result_dict,
-    prepare_text_for_semantic_similarity,
-    load_config,
-)
-
-config = load_config()
-
-llm = get_llm(config.get("llm", "gpt-4o-mini"))
-num_publications_to_evaluate = config.get("num_publications_to_evaluate", 2)
-
-
-def jaccard_score(list1, list2):
-    """
-    Computes Jaccard similarity between two lists.
-    """
-    set1 = set(list1)
-    set2 = set(list2)
-
-    intersection = set1 & set2
-    union = set1 | set2
-
-    if not union:
-        return 0.0  # define as 0 if both are empty
-    return len(intersection) / len(union)
-
-
-load_dotenv()
-
-
-async def evaluate_semantic_similarity(generated_text, truth_text, metric_name):
-    """Evaluate semantic similarity between generated and truth text."""
-    # Create semantic similarity scorer
-    evaluator_embedding = OpenAIEmbeddings(model="text-embedding-ada-002")
-    semantic_scorer = SemanticSimilarity(
-        embeddings=LangchainEmbeddingsWrapper(evaluator_embedding)
-    )
-
-    if isinstance(generated_text, list):
-        scores = {f"{metric_name}_semantic_similarity": []}
-        for item in generated_text:
-            sample = SingleTurnSample(
-                user_input="dummy", response=str(item), reference=str(truth_text)
-            )
-            score = await semantic_scorer.single_turn_ascore(sample)
-            scores[f"{metric_name}_semantic_similarity"].append(score)
-        scores[f"{metric_name}_semantic_similarity_mean"] = np.mean(
-            scores[f"{metric_name}_semantic_similarity"]
-        )
-        return scores
-    else:
-        sample = SingleTurnSample(
-            user_input="dummy", response=str(generated_text), reference=str(truth_text)
-        )
-        score = await semantic_scorer.single_turn_ascore(sample)
-        return {f"{metric_name}_semantic_similarity": score}
-
-
-async def evaluate_faithfulness(generated_text, context, user_input, metric_name):
-    """Evaluate faithfulness of generated text against the context."""
-    # Create faithfulness scorer
-    evaluator_llm = LangchainLLMWrapper(llm)
-    faithfulness_scorer = Faithfulness(llm=evaluator_llm)
-
-    if isinstance(generated_text, list):
-        scores = {f"{metric_name}_faithfulness": []}
-        for item in generated_text:
-            sample = SingleTurnSample(
-                user_input=user_input,
-                response=str(item),
-                retrieved_contexts=[context] if context else [""],
-            )
-            score = await faithfulness_scorer.single_turn_ascore(sample)
-            scores[f"{metric_name}_faithfulness"].append(score)
-        scores[f"{metric_name}_faithfulness_mean"] = np.mean(
-            scores[f"{metric_name}_faithfulness"]
-        )
-        return scores
-    else:
-        sample = SingleTurnSample(
-            user_input=user_input,
-            response=str(generated_text),
-            retrieved_contexts=[context] if context else [""],
-        )
-        score = await faithfulness_scorer.single_turn_ascore(sample)
-        return {f"{metric_name}_faithfulness": score}
-
-
-async def evaluate_jaccard_similarity(generated_text, truth_text, metric_name):
-    """Evaluate Jaccard similarity between generated and truth text."""
-
-    updated_generated_text = generated_text
-    updated_truth_text = truth_text
-    if metric_name == "references":
-        updated_generated_text = [i["url"] for i in generated_text]
-        updated_truth_text = [i["url"] for i in truth_text]
-
-    return {
-        f"{metric_name}_jaccard_similarity": jaccard_score(
-            updated_generated_text, updated_truth_text
-        )
-    }
-
-
-async def evaluate_content_coherence(
-    context, title_generated, tldr_generated, references_generated, tags_generated
-):
-    """Evaluate content coherence using the custom ContentCoherenceMetric."""
-    # Create coherence scorer
-    evaluator_llm = LangchainLLMWrapper(llm)
-    coherence_scorer = ContentCoherenceMetric(llm=evaluator_llm)
-    if not context:
-        print("Warning: No context provided for coherence evaluation")
-        return {"content_coherence": 0.0}
-
-    # Create custom sample for coherence evaluation
-    coherence_sample = CoherenceInput(
-        context=context,
-        title_generated=str(title_generated),
-        tldr_generated=str(tldr_generated),
-        references_generated=str(references_generated),
-        tags_generated=str(tags_generated),
-    )
-
-    # Evaluate coherence using the custom metric
-    score = await coherence_scorer._single_turn_ascore(coherence_sample, callbacks=None)
-    return {"content_coherence": score}
-
-
-async def evaluate_dataset(num_publications_to_evaluate: int = 2):
-    """Evaluate the golden dataset with semantic similarity, Jaccard metrics, faithfulness, and content coherence."""
-
-    # Load data using utility functions
-    df = load_dataset(num_publications_to_evaluate=num_publications_to_evaluate)
-    pub_descriptions = load_publication_descriptions()
-
-    # Results storage
-    results = []
-
-    print(f"Evaluating {len(df)} publications...")
-
-    for index, row in df.iterrows():
-        print(
-            f"Processing publication {index + 1}/{len(df)}: {row['publication_external_id']}"
-        )
-
-        title_generated = ast.literal_eval(row["title_generated"])
-        tldr_generated = ast.literal_eval(row["tldr_generated"])
-        references_generated = ast.literal_eval(row["references_generated"])
-        references_truth = ast.literal_eval(row["references_truth"])
-        tags_generated = row["tags_generated"]
-
-        try:
-            # Get publication description for context and truncate if needed
-            pub_id = row["publication_external_id"]
-            raw_context = pub_descriptions.get(pub_id, "")
-            context = truncate_context(raw_context, max_tokens=8000)
-
-            if len(raw_context) > len(context):
-                print(
-                    f"  Warning: Context truncated from {len(raw_context)} to {len(context)} characters"
-                )
-
-            # Initialize result dictionary using utility function
-            result = {
-                "publication_external_id": row["publication_external_id"],
-            }
-
-            # Title Evaluation
-            title_semantic = await evaluate_semantic_similarity(
-                title_generated, row["title_truth"], "title"
-            )
-            result.update(title_semantic)
-
-            title_faithfulness = await evaluate_faithfulness(
-                title_generated,
-                context,
-                "Generate a concise and accurate title for the given content.",
-                "title",
-            )
-            result.update(title_faithfulness)
-
-            # TLDR Evaluation
-            tldr_semantic = await evaluate_semantic_similarity(
-                tldr_generated, row["tldr_truth"], "tldr"
-            )
-            result.update(tldr_semantic)
-
-            tldr_faithfulness = await evaluate_faithfulness(
-                tldr_generated,
-                context,
-                "Provide a concise summary (TL;DR) for the given content that captures the main points and key takeaways.",
-                "tldr",
-            )
-            result.update(tldr_faithfulness)
-
-            # References Evaluation
-            references_semantic = await evaluate_semantic_similarity(
-                references_generated, row["references_truth"], "references"
-            )
-            result.update(references_semantic)
-
-            references_jaccard_result = await evaluate_jaccard_similarity(
-                references_generated, references_truth, "references"
-            )
-            result.update(references_jaccard_result)
-
-            references_faithfulness = await evaluate_faithfulness(
-                references_generated,
-                context,
-                "Extract and list the relevant references and citations mentioned in the given content.",
-                "references",
-            )
-            result.update(references_faithfulness)
-
-            # Tags Evaluation
-            # Prepare text for semantic similarity
-            tags_truth_prepared = prepare_text_for_semantic_similarity(
-                row["tags_truth"], "tags"
-            )
-            tags_generated_prepared = prepare_text_for_semantic_similarity(
-                tags_generated, "tags"
-            )
-
-            tags_semantic = await evaluate_semantic_similarity(
-                tags_generated_prepared, tags_truth_prepared, "tags"
-            )
-            result.update(tags_semantic)
-
-            tags_jaccard_result = await evaluate_jaccard_similarity(
-                tags_generated, row["tags_truth"], "tags"
-            )
-            result.update(tags_jaccard_result)
-
-            tags_faithfulness = await evaluate_faithfulness(
-                tags_generated_prepared,
-                context,
-                "Generate relevant tags and keywords that accurately represent the main topics and themes of the given content.",
-                "tags",
-            )
-            result.update(tags_faithfulness)
-
-            # Content Coherence Evaluation
-            coherence_result = await evaluate_content_coherence(
-                context,
-                title_generated,
-                tldr_generated,
-                references_generated,
-                tags_generated,
-            )
-            result.update(coherence_result)
-
-            results.append(result)
-
-            # Print scores using utility function
-            print_evaluation_scores(result)
-
-        except Exception as e:
-            print(f"Error processing publication {row['publication_external_id']}: {e}")
-            import traceback
-
-            traceback.print_exc()
-            # Still add the result with None values using utility function
-            result = initialize_result_dict(row["publication_external_id"])
-            result["content_coherence"] = None
-            results.append(result)
-
-    # Save results and print summary using utility functions
-    results_df, complete_results = save_evaluation_results(results, df)
-    print_evaluation_summary(results_df)
-
-    return results_df, complete_results
-
-
-if __name__ == "__main__":
-    # Evaluate entire dataset
-    asyncio.run(evaluate_dataset())
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+import numpy as np
+import asyncio
+
+from embedding_index import cosine_similarities
+from metric_stats import MetricAggregator
+
+from paths import BATCH_DIR, EvaluationPaths
+from results_store import (
+    ID_COLUMN,
+    ResultsWriter,
+    reset_results,
+    write_merged_results,
+)
+from rate_limits import metric_scope
+from scheduler import bounded, map_bounded
+from sharding import (
+    merge_cache_stats,
+    merge_dedup_stats,
+    merge_prefilter_stats,
+    merge_rate_limit_stats,
+    merge_result_stores,
+    shard_mask,
+)
+from tracing import configure_tracing, print_trace_summary, span
+from work_plan import WorkPlan, unit_key
+
+# Import utility functions
+from utils import (
+    TAG_SEPARATOR,
+    print_evaluation_scores,
+    print_evaluation_summary,
+    initialize_result_dict,
+    prepare_text_for_semantic_similarity,
+    load_config,
+)
+
+if TYPE_CHECKING:
+    # ragas, the LangChain provider clients, pandas and scipy take seconds to
+    # import; the functions using them import them when first called
+    from batch_jobs import BatchBackend
+    from coherence import CoherenceInput
+    from evaluation_context import EvaluationContext
+    from fingerprints import Fingerprinter, PreviousResults
+    from sampling import AdaptiveSampler, SamplingConfig
+
+# Loaded on first use, or explicitly with configure(); see get_config()
+_config = None
+
+# Instruction each field was generated for, given to the faithfulness judge
+FAITHFULNESS_TASKS = {
+    "title": "Generate a concise and accurate title for the given content.",
+    "tldr": "Provide a concise summary (TL;DR) for the given content that captures the main points and key takeaways.",
+    "references": "Extract and list the relevant references and citations mentioned in the given content.",
+    "tags": "Generate relevant tags and keywords that accurately represent the main topics and themes of the given content.",
+}
+
+
+def get_config() -> dict:
+    """The run's config, loaded from ``config.yaml`` on first use.
+
+    Importing this module has no side effects; overrides made to the
+    returned dict (e.g. by ``main`` or the benchmarks) apply to the run.
+    """
+    global _config
+    if _config is None:
+        _config = load_config()
+    return _config
+
+
+def configure(overrides: dict = None) -> dict:
+    """Reloads the config from ``config.yaml`` and applies ``overrides``."""
+    global _config
+    _config = load_config()
+    _config.update(overrides or {})
+    return _config
+
+
+async def evaluate_semantic_similarity(
+    eval_ctx: "EvaluationContext", generated_text, truth_text, metric_name
+):
+    """Evaluate semantic similarity between generated and truth text."""
+    with span("semantic_similarity", field=metric_name):
+        return await _evaluate_semantic_similarity(
+            eval_ctx, generated_text, truth_text, metric_name
+        )
+
+
+async def _evaluate_semantic_similarity(
+    eval_ctx: "EvaluationContext", generated_text, truth_text, metric_name
+):
+    if eval_ctx.batch_embeddings:
+        return await evaluate_semantic_similarity_batched(
+            eval_ctx, generated_text, truth_text, metric_name
+        )
+
+    from ragas.dataset_schema import SingleTurnSample
+
+    semantic_scorer = eval_ctx.semantic_scorer
+
+    def score(sample):
+        return run_unit(
+            eval_ctx,
+            semantic_similarity_key(sample.response, sample.reference),
+            lambda: bounded(
+                eval_ctx.limiter, semantic_scorer.single_turn_ascore(sample)
+            ),
+        )
+
+    if isinstance(generated_text, list):
+        samples = [
+            SingleTurnSample(
+                user_input="dummy", response=str(item), reference=str(truth_text)
+            )
+            for item in generated_text
+        ]
+        item_scores = await asyncio.gather(*(score(sample) for sample in samples))
+        scores = {f"{metric_name}_semantic_similarity": list(item_scores)}
+        scores[f"{metric_name}_semantic_similarity_mean"] = np.mean(
+            scores[f"{metric_name}_semantic_similarity"]
+        )
+        return scores
+    else:
+        sample = SingleTurnSample(
+            user_input="dummy", response=str(generated_text), reference=str(truth_text)
+        )
+        return {f"{metric_name}_semantic_similarity": await score(sample)}
+
+
+async def evaluate_semantic_similarity_batched(
+    eval_ctx: "EvaluationContext", generated_text, truth_text, metric_name
+):
+    """Evaluate semantic similarity from one batched embedding lookup.
+
+    Produces the same keys and scores as the per-item ragas path, but embeds
+    the reference and all candidates together and scores them with a single
+    matrix-vector product.
+    """
+    candidates = (
+        generated_text if isinstance(generated_text, list) else [generated_text]
+    )
+    vectors = await eval_ctx.embedding_index.get([truth_text, *candidates])
+    item_scores = [
+        float(score) for score in cosine_similarities(vectors[1:], vectors[0])
+    ]
+
+    if isinstance(generated_text, list):
+        return {
+            f"{metric_name}_semantic_similarity": item_scores,
+            f"{metric_name}_semantic_similarity_mean": np.mean(item_scores),
+        }
+    return {f"{metric_name}_semantic_similarity": item_scores[0]}
+
+
+async def evaluate_faithfulness(
+    eval_ctx: "EvaluationContext", generated_text, context, user_input, metric_name
+):
+    """Evaluate faithfulness of generated text against the context."""
+    with metric_scope(f"{metric_name}_faithfulness"), span(
+        "faithfulness", field=metric_name
+    ):
+        return await _evaluate_faithfulness(
+            eval_ctx, generated_text, context, user_input, metric_name
+        )
+
+
+async def _evaluate_faithfulness(
+    eval_ctx: "EvaluationContext", generated_text, context, user_input, metric_name
+):
+    from ragas.dataset_schema import SingleTurnSample
+
+    faithfulness_scorer = eval_ctx.faithfulness_scorer
+
+    def score(sample):
+        return run_unit(
+            eval_ctx,
+            faithfulness_key(user_input, sample.response, context),
+            lambda: bounded(
+                eval_ctx.limiter, faithfulness_scorer.single_turn_ascore(sample)
+            ),
+        )
+
+    if isinstance(generated_text, list):
+        samples = [
+            SingleTurnSample(
+                user_input=user_input,
+                response=str(item),
+                retrieved_contexts=[context] if context else [""],
+            )
+            for item in generated_text
+        ]
+        item_scores = await asyncio.gather(*(score(sample) for sample in samples))
+        scores = {f"{metric_name}_faithfulness": list(item_scores)}
+        scores[f"{metric_name}_faithfulness_mean"] = np.mean(
+            scores[f"{metric_name}_faithfulness"]
+        )
+        return scores
+    else:
+        sample = SingleTurnSample(
+            user_input=user_input,
+            response=str(generated_text),
+            retrieved_contexts=[context] if context else [""],
+        )
+        return {f"{metric_name}_faithfulness": await score(sample)}
+
+
+async def evaluate_faithfulness_combined(
+    eval_ctx: "EvaluationContext", context, fields
+):
+    """Evaluate faithfulness of all generated fields with a single judge call.
+
+    Args:
+        eval_ctx: Shared scorers and clients for the run
+        context: Truncated publication description
+        fields: Mapping from metric name to the generated text or list of texts
+
+    Returns:
+        dict: For every metric name, the same scores ``evaluate_faithfulness``
+        would return for it
+    """
+    tasks, items = combined_faithfulness_items(fields)
+    with metric_scope("combined_faithfulness"), span("faithfulness_combined"):
+        item_scores = await run_unit(
+            eval_ctx,
+            combined_faithfulness_key(context, tasks, items),
+            lambda: bounded(
+                eval_ctx.limiter,
+                eval_ctx.multi_field_faithfulness_scorer.ascore_items(
+                    context, tasks, items
+                ),
+            ),
+        )
+
+    results = {}
+    for metric_name, generated in fields.items():
+        if isinstance(generated, list):
+            scores = [item_scores[f"{metric_name}_{i}"] for i in range(len(generated))]
+            results[metric_name] = {
+                f"{metric_name}_faithfulness": scores,
+                f"{metric_name}_faithfulness_mean": np.mean(scores),
+            }
+        else:
+            results[metric_name] = {
+                f"{metric_name}_faithfulness": item_scores[f"{metric_name}_0"]
+            }
+    return results
+
+
+def combined_faithfulness_items(fields):
+    """Instructions and generated items judged by the combined faithfulness call."""
+    from faithfulness import GeneratedItem
+
+    items = []
+    for metric_name, generated in fields.items():
+        texts = generated if isinstance(generated, list) else [generated]
+        items.extend(
+            GeneratedItem(id=f"{metric_name}_{i}", field=metric_name, text=str(text))
+            for i, text in enumerate(texts)
+        )
+    tasks = {metric_name: FAITHFULNESS_TASKS[metric_name] for metric_name in fields}
+    return tasks, items
+
+
+async def evaluate_content_coherence(
+    eval_ctx: "EvaluationContext",
+    context,
+    title_generated,
+    tldr_generated,
+    references_generated,
+    tags_generated,
+):
+    """Evaluate content coherence using the custom ContentCoherenceMetric."""
+    from coherence import CoherenceInput
+
+    coherence_scorer = eval_ctx.coherence_scorer
+    if not context:
+        print("Warning: No context provided for coherence evaluation")
+        return {"content_coherence": 0.0}
+
+    # Create custom sample for coherence evaluation
+    coherence_sample = CoherenceInput(
+        context=context,
+        title_generated=str(title_generated),
+        tldr_generated=str(tldr_generated),
+        references_generated=str(references_generated),
+        tags_generated=str(tags_generated),
+    )
+
+    # Evaluate coherence using the custom metric
+    with metric_scope("content_coherence"), span("content_coherence"):
+        score = await run_unit(
+            eval_ctx,
+            coherence_key(coherence_sample),
+            lambda: bounded(
+                eval_ctx.limiter,
+                coherence_scorer._single_turn_ascore(coherence_sample, callbacks=None),
+            ),
+        )
+    return {"content_coherence": score}
+
+
+def faithfulness_fields(row):
+    """Map each faithfulness metric name to the generated text(s) it scores."""
+    return {
+        "title": row["title_generated"],
+        "tldr": row["tldr_generated"],
+        "references": row["references_generated"],
+        "tags": prepare_text_for_semantic_similarity(
+            TAG_SEPARATOR.join(row["tags_generated"]), "tags"
+        ),
+    }
+
+
+def faithfulness_truths(row):
+    """Map each faithfulness metric name to the truth text(s) of its field."""
+    return {
+        "title": [row["title_truth"]],
+        "tldr": [row["tldr_truth"]],
+        "references": list(row["references_truth"]),
+        "tags": [
+            prepare_text_for_semantic_similarity(
+                TAG_SEPARATOR.join(row["tags_truth"]), "tags"
+            )
+        ],
+    }
+
+
+def semantic_similarity_inputs(row):
+    """List the (generated, truth, metric_name) triples scored by semantic similarity."""
+    return [
+        (row["title_generated"], row["title_truth"], "title"),
+        (row["tldr_generated"], row["tldr_truth"], "tldr"),
+        (row["references_generated"], str(row["references_truth"]), "references"),
+        (
+            prepare_text_for_semantic_similarity(
+                TAG_SEPARATOR.join(row["tags_generated"]), "tags"
+            ),
+            prepare_text_for_semantic_similarity(
+                TAG_SEPARATOR.join(row["tags_truth"]), "tags"
+            ),
+            "tags",
+        ),
+    ]
+
+
+def metric_fingerprints(
+    eval_ctx: "EvaluationContext", fingerprinter: "Fingerprinter", row
+):
+    """Fingerprint the inputs of every metric group of a row.
+
+    Returns:
+        dict: Fingerprint by metric group, named after its result column
+        (e.g. ``title_semantic_similarity``, ``content_coherence``)
+    """
+    from fingerprints import digest
+
+    context_hash = digest(eval_ctx.truncator.truncate(row["publication_description"]))
+    fingerprints = {}
+    for generated, truth, metric_name in semantic_similarity_inputs(row):
+        fingerprints[f"{metric_name}_semantic_similarity"] = (
+            fingerprinter.semantic_similarity(generated, truth)
+        )
+    truths = faithfulness_truths(row)
+    for metric_name, generated in faithfulness_fields(row).items():
+        fingerprints[f"{metric_name}_faithfulness"] = fingerprinter.faithfulness(
+            generated,
+            truths[metric_name],
+            FAITHFULNESS_TASKS[metric_name],
+            context_hash,
+        )
+    fingerprints["content_coherence"] = fingerprinter.coherence(
+        [
+            row["title_generated"],
+            row["tldr_generated"],
+            row["references_generated"],
+            row["tags_generated"],
+        ],
+        context_hash,
+    )
+    return fingerprints
+
+
+def plan_reuse(
+    eval_ctx: "EvaluationContext",
+    fingerprinter: "Fingerprinter",
+    previous: "PreviousResults",
+    df,
+):
+    """Plan which metric groups of every row are reused from ``previous``.
+
+    Returns:
+        dict: ReusePlan by publication id
+    """
+    return {
+        row[ID_COLUMN]: previous.plan(
+            row[ID_COLUMN], metric_fingerprints(eval_ctx, fingerprinter, row)
+        )
+        for _, row in df.iterrows()
+    }
+
+
+def semantic_similarity_key(candidate, reference) -> str:
+    return unit_key("semantic_similarity", str(candidate), str(reference))
+
+
+def faithfulness_key(task, candidate, context) -> str:
+    return unit_key("faithfulness", task, str(candidate), context)
+
+
+def combined_faithfulness_key(context, tasks, items) -> str:
+    return unit_key(
+        "combined_faithfulness", context, tasks, [item.model_dump() for item in items]
+    )
+
+
+def coherence_key(coherence_input: "CoherenceInput") -> str:
+    return unit_key("content_coherence", coherence_input.model_dump())
+
+
+async def run_unit(eval_ctx: "EvaluationContext", key: str, factory):
+    """Run a unit of scoring work, once for all rows of the chunk sharing its key."""
+    if eval_ctx.shared_work is None:
+        return await factory()
+    return await eval_ctx.shared_work.run(key, factory)
+
+
+def plan_work(
+    eval_ctx: "EvaluationContext", df, plans=None, assessments=None
+) -> WorkPlan:
+    """Collect the units of scoring work of every row of ``df``, keyed by their inputs.
+
+    Semantic similarity pairs are only planned for the per-candidate ragas
+    path; the batched path already embeds each distinct text once. Metric
+    groups reused from the previous run (see ``plan_reuse``) and items the
+    pre-filter ``assessments`` decided (see ``assess_rows``) are left out.
+    """
+    from coherence import CoherenceInput
+
+    work = WorkPlan()
+    for _, row in df.iterrows():
+        reused = reused_groups(plans, row[ID_COLUMN])
+        assessment = assessments.get(row[ID_COLUMN]) if assessments else None
+        context = eval_ctx.truncator.truncate(row["publication_description"])
+        if not eval_ctx.batch_embeddings:
+            for generated, truth, metric_name in semantic_similarity_inputs(row):
+                if f"{metric_name}_semantic_similarity" in reused:
+                    continue
+                texts = generated if isinstance(generated, list) else [generated]
+                for text in texts:
+                    work.add(
+                        "semantic_similarity", semantic_similarity_key(text, truth)
+                    )
+
+        fields = judged_faithfulness_fields(row, reused)
+        if assessment is not None:
+            fields = assessment.pending_fields(fields)
+        if eval_ctx.faithfulness_mode == "combined":
+            if fields:
+                work.add(
+                    "combined_faithfulness",
+                    combined_faithfulness_key(
+                        context, *combined_faithfulness_items(fields)
+                    ),
+                )
+        else:
+            for metric_name, generated in fields.items():
+                texts = generated if isinstance(generated, list) else [generated]
+                for text in texts:
+                    work.add(
+                        "faithfulness",
+                        faithfulness_key(
+                            FAITHFULNESS_TASKS[metric_name], text, context
+                        ),
+                    )
+
+        if (
+            context
+            and "content_coherence" not in reused
+            and (assessment is None or assessment.coherence is None)
+        ):
+            coherence_input = CoherenceInput(
+                context=context,
+                title_generated=str(row["title_generated"]),
+                tldr_generated=str(row["tldr_generated"]),
+                references_generated=str(row["references_generated"]),
+                tags_generated=TAG_SEPARATOR.join(row["tags_generated"]),
+            )
+            work.add("content_coherence", coherence_key(coherence_input))
+    return work
+
+
+async def prefetch_embeddings(eval_ctx: "EvaluationContext", df):
+    """Embed every semantic similarity text of ``df`` in batched requests.
+
+    Args:
+        eval_ctx: Shared scorers and clients for the run
+        df: Golden dataset rows about to be evaluated
+    """
+    texts = []
+    for _, row in df.iterrows():
+        for generated, truth, _ in semantic_similarity_inputs(row):
+            texts.append(truth)
+            texts.extend(generated if isinstance(generated, list) else [generated])
+        if eval_ctx.prefilter is not None:
+            # The pre-filter compares every generated item with the context
+            texts.append(eval_ctx.truncator.truncate(row["publication_description"]))
+
+    try:
+        with span("embedding_prefetch", texts=len(texts)):
+            await eval_ctx.embedding_index.add(texts)
+        print(f"Embedded {len(eval_ctx.embedding_index)} unique texts in batches")
+    except Exception as e:
+        # Rows fall back to embedding their own texts and report errors per row
+        print(f"Warning: Batched embedding prefetch failed: {e}")
+
+
+async def evaluate_publication(
+    eval_ctx: "EvaluationContext", row, lexical_scores, reused=None, assessment=None
+):
+    """Evaluate a single publication, running its independent metrics concurrently.
+
+    Args:
+        eval_ctx: Shared scorers and clients for the run
+        row: Typed row of the golden dataset (see ``golden_dataset.SCHEMA``)
+        lexical_scores: The row's scores from ``compute_lexical_metrics``
+        reused: Optional result values by metric group, taken over instead of
+            evaluating those groups again (see ``plan_reuse``)
+        assessment: The row's pre-filter assessment from ``assess_rows``;
+            assessed here if the context has a pre-filter and none is given
+
+    Returns:
+        tuple: (result dictionary, error message or None if evaluation succeeded)
+    """
+    error = None
+    reused = reused or {}
+    title_generated = row["title_generated"]
+    tldr_generated = row["tldr_generated"]
+    references_generated = row["references_generated"]
+    references_truth = row["references_truth"]
+    # The tag prompts and embeddings use the pipe-separated form of the tags
+    tags_generated = TAG_SEPARATOR.join(row["tags_generated"])
+    tags_truth = TAG_SEPARATOR.join(row["tags_truth"])
+
+    try:
+        # Truncate the publication description used as context if needed
+        raw_context = row["publication_description"]
+        context = eval_ctx.truncator.truncate(raw_context)
+
+        if len(raw_context) > len(context):
+            print(
+                f"  Warning: Context truncated from {len(raw_context)} to {len(context)} characters"
+            )
+
+        # Prepare text for semantic similarity
+        tags_truth_prepared = prepare_text_for_semantic_similarity(tags_truth, "tags")
+        tags_generated_prepared = prepare_text_for_semantic_similarity(
+            tags_generated, "tags"
+        )
+
+        fields = faithfulness_fields(row)
+        judged_fields = judged_faithfulness_fields(row, reused)
+        if eval_ctx.prefilter is not None and assessment is None:
+            with span("prefilter"):
+                assessment = await eval_ctx.prefilter.assess(
+                    eval_ctx.embedding_index,
+                    context,
+                    fields,
+                    faithfulness_truths(row),
+                    decide=judged_fields,
+                    coherence="content_coherence" not in reused,
+                )
+        if assessment is not None:
+            # Only the items local signals could not decide go to the judge
+            judged_fields = assessment.pending_fields(judged_fields)
+
+        if eval_ctx.faithfulness_mode == "combined":
+            # One judge call covers every field; each field awaits its share
+            if judged_fields:
+                combined = asyncio.ensure_future(
+                    evaluate_faithfulness_combined(eval_ctx, context, judged_fields)
+                )
+
+            async def judge_faithfulness(metric_name):
+                return (await combined)[metric_name]
+
+        else:
+
+            def judge_faithfulness(metric_name):
+                return evaluate_faithfulness(
+                    eval_ctx,
+                    judged_fields[metric_name],
+                    context,
+                    FAITHFULNESS_TASKS[metric_name],
+                    metric_name,
+                )
+
+        async def semantic_similarity(generated, truth, metric_name):
+            if f"{metric_name}_semantic_similarity" in reused:
+                return reused[f"{metric_name}_semantic_similarity"]
+            return await evaluate_semantic_similarity(
+                eval_ctx, generated, truth, metric_name
+            )
+
+        async def faithfulness(metric_name):
+            if f"{metric_name}_faithfulness" in reused:
+                return reused[f"{metric_name}_faithfulness"]
+            if assessment is None:
+                return await judge_faithfulness(metric_name)
+            judged = None
+            if metric_name in judged_fields:
+                judged = await judge_faithfulness(metric_name)
+            return assessment.merge_faithfulness(
+                metric_name, fields[metric_name], judged
+            )
+
+        async def content_coherence():
+            if "content_coherence" in reused:
+                return reused["content_coherence"]
+            if assessment is not None and assessment.coherence is not None:
+                return {"content_coherence": assessment.coherence}
+            return await evaluate_content_coherence(
+                eval_ctx,
+                context,
+                title_generated,
+                tldr_generated,
+                references_generated,
+                tags_generated,
+            )
+
+        # All metrics of a publication are independent of each other, so they
+        # are scheduled together and merged back in a fixed order.
+        metric_results = await asyncio.gather(
+            # Title Evaluation
+            semantic_similarity(title_generated, row["title_truth"], "title"),
+            faithfulness("title"),
+            # TLDR Evaluation
+            semantic_similarity(tldr_generated, row["tldr_truth"], "tldr"),
+            faithfulness("tldr"),
+            # References Evaluation
+            semantic_similarity(
+                references_generated, str(references_truth), "references"
+            ),
+            faithfulness("references"),
+            # Tags Evaluation
+            semantic_similarity(tags_generated_prepared, tags_truth_prepared, "tags"),
+            faithfulness("tags"),
+            # Content Coherence Evaluation
+            content_coherence(),
+        )
+
+        result = {
+            "publication_external_id": row["publication_external_id"],
+        }
+        for metric_result in metric_results:
+            result.update(metric_result)
+        result.update(lexical_scores)
+
+        # Print scores using utility function
+        print_evaluation_scores(result)
+
+    except Exception as e:
+        print(f"Error processing publication {row['publication_external_id']}: {e}")
+        import traceback
+
+        traceback.print_exc()
+        # Still add the result with None values using utility function
+        result = initialize_result_dict(row["publication_external_id"])
+        result["content_coherence"] = None
+        error = str(e)
+
+    return result, error
+
+
+async def evaluate_rows(
+    eval_ctx: "EvaluationContext",
+    df,
+    on_result=None,
+    progress_offset: int = 0,
+    progress_total: int = None,
+    plans=None,
+    assessments=None,
+):
+    """Evaluate every row of the dataset concurrently.
+
+    At most ``eval_ctx.max_concurrency`` publications are in flight, and the
+    same limit bounds the number of simultaneous LLM/embedding calls across
+    all of them.
+
+    Args:
+        eval_ctx: Shared scorers and clients for the run
+        df: Typed golden dataset rows to evaluate
+        on_result: Optional callback ``(result, error)`` invoked as soon as each
+            publication finishes, in completion order
+        progress_offset: Number of publications processed before ``df``
+        progress_total: Total number of publications shown in progress output
+        plans: Optional ReusePlan by publication id from ``plan_reuse``; the
+            metric groups they reuse are not evaluated again
+        assessments: Optional pre-filter assessments by publication id from
+            ``assess_rows``; with a pre-filter, rows are assessed here otherwise
+
+    Returns:
+        list: Result dictionaries in the same order as the rows of ``df``
+    """
+    from lexical_metrics import compute_lexical_metrics
+
+    if eval_ctx.batch_embeddings:
+        await prefetch_embeddings(eval_ctx, df)
+    if eval_ctx.prefilter is not None and assessments is None:
+        # Decided before planning, so the plan only shares work that is judged
+        with span("prefilter", rows=len(df)):
+            assessments = await assess_rows(eval_ctx, df, plans)
+    if eval_ctx.shared_work is not None:
+        work = plan_work(eval_ctx, df, plans, assessments)
+        eval_ctx.shared_work.add(work)
+        print(work.summary_line())
+    # Set-overlap metrics need no model calls and are computed for all rows at once
+    with span("lexical_metrics", rows=len(df)):
+        lexical_scores = compute_lexical_metrics(df).to_dict("records")
+
+    async def evaluate_row(item):
+        position, row = item
+        total = progress_total or progress_offset + len(df)
+        print(
+            f"Processing publication {progress_offset + position + 1}/{total}: {row['publication_external_id']}"
+        )
+        assessment = assessments.get(row[ID_COLUMN]) if assessments else None
+        with span(
+            "publication", publication_external_id=row["publication_external_id"]
+        ):
+            result, error = await evaluate_publication(
+                eval_ctx,
+                row,
+                lexical_scores[position],
+                reused_groups(plans, row["publication_external_id"]),
+                assessment,
+            )
+        if on_result is not None:
+            on_result(result, error)
+        return result
+
+    rows = enumerate(row for _, row in df.iterrows())
+    try:
+        return await map_bounded(evaluate_row, rows, limit=eval_ctx.max_concurrency)
+    finally:
+        if eval_ctx.shared_work is not None:
+            eval_ctx.shared_work.clear()
+
+
+def reused_groups(plans, publication_id):
+    """Result values by metric group reused for a publication, if any."""
+    if not plans:
+        return {}
+    return plans[publication_id].reused
+
+
+def judged_faithfulness_fields(row, reused):
+    """The faithfulness fields of ``row`` whose scores are not reused."""
+    return {
+        metric_name: generated
+        for metric_name, generated in faithfulness_fields(row).items()
+        if f"{metric_name}_faithfulness" not in reused
+    }
+
+
+async def assess_rows(eval_ctx: "EvaluationContext", df, plans=None):
+    """Pre-filter every row of ``df``, keyed by publication id.
+
+    Rows are assessed concurrently: without the batched embedding prefetch,
+    each one embeds its context and items, and the index holds a slot of
+    ``eval_ctx.limiter`` for every such request.
+    """
+
+    async def assess_row(row):
+        reused = reused_groups(plans, row["publication_external_id"])
+        context = eval_ctx.truncator.truncate(row["publication_description"])
+        return await eval_ctx.prefilter.assess(
+            eval_ctx.embedding_index,
+            context,
+            faithfulness_fields(row),
+            faithfulness_truths(row),
+            decide=judged_faithfulness_fields(row, reused),
+            coherence="content_coherence" not in reused,
+        )
+
+    rows = [row for _, row in df.iterrows()]
+    assessments = await map_bounded(assess_row, rows, limit=eval_ctx.max_concurrency)
+    return dict(zip(df["publication_external_id"], assessments))
+
+
+def judge_requests(eval_ctx: "EvaluationContext", df, assessments=None, plans=None):
+    """Render the first round of judge prompts of every row for a batch.
+
+    With pre-filter ``assessments`` (see ``assess_rows``), only the items and
+    coherence checks they escalate are rendered; with reuse ``plans``, none
+    of the metric groups they reuse.
+
+    Returns:
+        tuple: (all requests of the round, the faithfulness statement
+        extraction requests among them with the context each one is checked
+        against in the second round)
+    """
+    from ragas.metrics._faithfulness import StatementGeneratorInput
+
+    from batch_jobs import JudgeRequest
+    from coherence import CoherenceInput
+    from faithfulness import MultiFieldFaithfulnessInput
+
+    requests, statement_requests = [], []
+    faithfulness_scorer = eval_ctx.faithfulness_scorer
+    for _, row in df.iterrows():
+        publication_id = row["publication_external_id"]
+        context = eval_ctx.truncator.truncate(row["publication_description"])
+        reused = reused_groups(plans, publication_id)
+        fields = judged_faithfulness_fields(row, reused)
+        assessment = assessments.get(publication_id) if assessments else None
+        if assessment is not None:
+            fields = assessment.pending_fields(fields)
+
+        if eval_ctx.faithfulness_mode == "combined" and fields:
+            tasks, items = combined_faithfulness_items(fields)
+            requests.append(
+                JudgeRequest(
+                    f"{publication_id}/faithfulness",
+                    eval_ctx.multi_field_faithfulness_scorer.prompt,
+                    MultiFieldFaithfulnessInput(
+                        context=context, tasks=tasks, items=items
+                    ),
+                )
+            )
+        elif eval_ctx.faithfulness_mode != "combined":
+            for metric_name, generated in fields.items():
+                texts = generated if isinstance(generated, list) else [generated]
+                for i, text in enumerate(texts):
+                    request = JudgeRequest(
+                        f"{publication_id}/{metric_name}_faithfulness/{i}",
+                        faithfulness_scorer.statement_generator_prompt,
+                        StatementGeneratorInput(
+                            question=FAITHFULNESS_TASKS[metric_name], answer=str(text)
+                        ),
+                    )
+                    requests.append(request)
+                    statement_requests.append((request, context))
+
+        if (
+            context
+            and "content_coherence" not in reused
+            and (assessment is None or assessment.coherence is None)
+        ):
+            requests.append(
+                JudgeRequest(
+                    f"{publication_id}/content_coherence",
+                    eval_ctx.coherence_scorer.coherence_prompt,
+                    CoherenceInput(
+                        context=context,
+                        title_generated=str(row["title_generated"]),
+                        tldr_generated=str(row["tldr_generated"]),
+                        references_generated=str(row["references_generated"]),
+                        tags_generated=TAG_SEPARATOR.join(row["tags_generated"]),
+                    ),
+                )
+            )
+    return requests, statement_requests
+
+
+def verification_requests(eval_ctx: "EvaluationContext", statement_requests, answers):
+    """Render the statement verification prompts for the extracted statements.
+
+    Texts without statements, or whose extraction answer could not be parsed,
+    get no verification request (the replay then scores or fails them like
+    an online run would).
+    """
+    from ragas.metrics._faithfulness import NLIStatementInput
+
+    from batch_jobs import JudgeRequest, parse_output, prompt_key
+
+    requests = []
+    for request, context in statement_requests:
+        answer = answers.get(prompt_key(request.text))
+        output = answer and parse_output(request.prompt, answer)
+        if output and output.statements:
+            requests.append(
+                JudgeRequest(
+                    f"{request.custom_id}/verdicts",
+                    eval_ctx.faithfulness_scorer.nli_statements_prompt,
+                    NLIStatementInput(context=context, statements=output.statements),
+                )
+            )
+    return requests
+
+
+async def evaluate_rows_batched(
+    eval_ctx: "EvaluationContext",
+    df,
+    backend: "BatchBackend",
+    work_dir: str,
+    on_result=None,
+    progress_offset: int = 0,
+    poll_interval: float = None,
+    plans=None,
+):
+    """Evaluate rows with every judge prompt answered through batch submissions.
+
+    The judge prompts are rendered up front and submitted in rounds: the
+    statement extraction (or combined faithfulness) and coherence prompts,
+    then the verification of the extracted statements. The answers are
+    joined back by prompt and replayed through ``evaluate_rows``, so the
+    results match an online run with the same judge answers. Prompts without
+    a batch answer (e.g. output-fixing retries) are sent to the judge online.
+    With a pre-filter, rows are assessed first and decided items get no
+    prompts.
+
+    Args:
+        eval_ctx: Shared scorers and clients for the run
+        df: Golden dataset rows to evaluate
+        backend: Batch API the rounds are submitted to
+        work_dir: Directory of this chunk's batch files
+        on_result: Optional callback receiving ``(result, error)`` per publication
+        progress_offset: Number of publications processed before ``df``
+        poll_interval: Seconds between batch status checks (default: the
+            backend's)
+        plans: Optional ReusePlan by publication id; reused metric groups get
+            no prompts
+
+    Returns:
+        list: Result dictionaries in the same order as the rows of ``df``
+    """
+    from batch_jobs import ReplayChatModel, model_parameters, run_batch
+
+    assessments = None
+    if eval_ctx.prefilter is not None:
+        if eval_ctx.batch_embeddings:
+            await prefetch_embeddings(eval_ctx, df)
+        assessments = await assess_rows(eval_ctx, df, plans)
+    requests, statement_requests = judge_requests(eval_ctx, df, assessments, plans)
+    answers = await run_batch(
+        backend, requests, eval_ctx.llm, work_dir, "round1", poll_interval
+    )
+    answers.update(
+        await run_batch(
+            backend,
+            verification_requests(eval_ctx, statement_requests, answers),
+            eval_ctx.llm,
+            work_dir,
+            "round2",
+            poll_interval,
+        )
+    )
+
+    parameters = model_parameters(eval_ctx.llm)
+    replay_ctx = eval_ctx.with_llm(
+        ReplayChatModel(
+            responses=answers,
+            model_name=parameters["model"],
+            temperature=parameters.get("temperature"),
+            fallback=eval_ctx.llm,
+        )
+    )
+    results = await evaluate_rows(
+        replay_ctx,
+        df,
+        on_result=on_result,
+        progress_offset=progress_offset,
+        plans=plans,
+        assessments=assessments,
+    )
+    if replay_ctx.llm.missed:
+        print(
+            f"{replay_ctx.llm.missed} prompts without a batch answer were judged online"
+        )
+    return results
+
+
+async def evaluate_dataset(
+    num_publications_to_evaluate: int = 2,
+    eval_ctx: "EvaluationContext" = None,
+    resume: bool = True,
+    batch_backend: "BatchBackend" = None,
+    paths: EvaluationPaths = None,
+    shard_index: int = None,
+    shard_count: int = 1,
+    sampling: "SamplingConfig" = None,
+):
+    """Evaluate the golden dataset with semantic similarity, Jaccard metrics, faithfulness, and content coherence.
+
+    The dataset is streamed in chunks of typed rows, from the converted
+    Parquet file when it is up to date. Each publication's result is appended to the
+    JSONL results store as soon as it completes, with the fingerprints of its
+    metric groups' inputs. With ``resume``, metric groups whose fingerprint
+    matches the latest successful record in the store are reused from it, and
+    publications with nothing to recompute are skipped; otherwise the store
+    is reset. With a ``batch_backend``, the judge prompts of every
+    chunk are submitted as provider batches instead of online requests.
+    ``paths`` points the run at another dataset and output location than
+    the golden dataset and ``outputs/``. With a ``shard_index``, only the
+    publications of that shard (out of ``shard_count``) are evaluated, and
+    results go to the shard's directory; see ``merge_shards``. With
+    ``sampling``, publications of the whole dataset are drawn in randomized,
+    stratified order until the metric estimates are precise enough (see
+    ``sampling``), instead of the first ``num_publications_to_evaluate``;
+    outputs go to the ``sampling/`` directory, with the estimates.
+
+    Running means are printed every ``progress_summary_every`` results.
+    Returns the MetricAggregator holding the statistics of every metric.
+    """
+    from evaluation_context import build_evaluation_context
+    from fingerprints import Fingerprinter, PreviousResults, ReuseStats
+    from golden_dataset import iter_golden_dataset
+    from sampling import AdaptiveSampler, SamplingPlan, print_sampling_summary
+
+    config = get_config()
+    # Scorers and clients are built once and shared by every metric call
+    if paths is None:
+        paths = EvaluationPaths()
+    if eval_ctx is None:
+        eval_ctx = build_evaluation_context(config, dataset_paths=paths)
+    sharded = shard_index is not None
+    if sharded:
+        paths = paths.for_shard(shard_index, shard_count)
+    chunksize = config.get("dataset_chunksize", 500)
+    sampler = None
+    if sampling is not None:
+        if sharded:
+            raise ValueError("Adaptive sampling cannot be combined with sharding")
+        paths = paths.for_sampling()
+        plan = SamplingPlan.from_dataset(
+            iter_golden_dataset(
+                chunksize=chunksize,
+                parquet_path=paths.dataset_parquet,
+                csv_path=paths.dataset_csv,
+                json_path=paths.dataset_json,
+            ),
+            strata=sampling.strata,
+            seed=sampling.seed,
+        )
+        sampler = AdaptiveSampler(plan, sampling)
+
+    tracer = None
+    if config.get("tracing", True):
+        trace_format = config.get("trace_format", "jsonl")
+        extension = ".otlp.jsonl" if trace_format == "otlp" else ".jsonl"
+        trace_path = os.path.join(
+            paths.traces_dir, f"evaluation-{time.strftime('%Y%m%dT%H%M%S')}{extension}"
+        )
+        tracer = configure_tracing(trace_path, trace_format)
+
+    if not resume:
+        reset_results(paths.results_jsonl)
+
+    if sharded:
+        print(
+            f"Evaluating shard {shard_index + 1} of {shard_count} of "
+            f"{num_publications_to_evaluate} publications..."
+        )
+    elif sampler is not None:
+        print(
+            f"Sampling from {len(sampler.plan)} publications until every interval "
+            f"is within +/-{sampling.target_half_width}..."
+        )
+    else:
+        print(f"Evaluating {num_publications_to_evaluate} publications...")
+
+    evaluated = 0
+    running = MetricAggregator()
+    summary_every = config.get("progress_summary_every", 50)
+    fingerprinter = Fingerprinter(eval_ctx)
+    reuse = ReuseStats()
+    fingerprints = {}
+    with PreviousResults(paths.results_jsonl) as previous, ResultsWriter(
+        paths.results_jsonl
+    ) as writer:
+
+        def on_result(result, error=None):
+            writer.write(result, error, fingerprints.get(result[ID_COLUMN]))
+            if error is None:
+                running.update(result)
+                if sampler is not None:
+                    sampler.update(result)
+                if summary_every and running.results % summary_every == 0:
+                    print(f"Running scores: {running.progress_line()}")
+
+        if sampler is not None:
+            chunks = sampled_chunks(eval_ctx, sampler, paths, chunksize)
+        else:
+            chunks = iter_golden_dataset(
+                num_publications_to_evaluate,
+                chunksize=chunksize,
+                parquet_path=paths.dataset_parquet,
+                csv_path=paths.dataset_csv,
+                json_path=paths.dataset_json,
+            )
+        for chunk_number, chunk in enumerate(chunks):
+            if sharded:
+                chunk = chunk[
+                    shard_mask(
+                        chunk["publication_external_id"], shard_index, shard_count
+                    )
+                ]
+            plans = plan_reuse(eval_ctx, fingerprinter, previous, chunk)
+            reuse.add(plans.values())
+            fingerprints.clear()
+            fingerprints.update(
+                (pub_id, plan.fingerprints) for pub_id, plan in plans.items()
+            )
+            pending = chunk[[not plans[pub_id].complete for pub_id in chunk[ID_COLUMN]]]
+            if sampler is not None:
+                # Reused publications count towards the estimates as well
+                for pub_id, reuse_plan in plans.items():
+                    if reuse_plan.complete:
+                        sampler.update(previous.result(pub_id))
+            if batch_backend is not None:
+                await evaluate_rows_batched(
+                    eval_ctx,
+                    pending,
+                    batch_backend,
+                    os.path.join(paths.batch_dir, f"chunk_{chunk_number:05d}"),
+                    on_result=on_result,
+                    progress_offset=evaluated,
+                    poll_interval=config.get("batch_poll_interval"),
+                    plans=plans,
+                )
+            else:
+                await evaluate_rows(
+                    eval_ctx,
+                    pending,
+                    on_result=on_result,
+                    progress_offset=evaluated,
+                    plans=plans,
+                )
+            evaluated += len(pending)
+            # Embeddings of earlier chunks live on in the persistent cache
+            eval_ctx.embedding_index.clear()
+
+    if resume:
+        print(reuse.summary_line())
+
+    metrics = write_results(
+        paths,
+        num_publications_to_evaluate if sampler is None else None,
+        eval_ctx.cache_stats(),
+        eval_ctx.rate_limit_stats(),
+        evaluated_only=sharded or sampler is not None,
+        prefilter_stats=eval_ctx.prefilter_stats(),
+        dedup_stats=eval_ctx.dedup_stats(),
+    )
+    if sampler is not None:
+        report = sampler.report()
+        print_sampling_summary(report)
+        with open(paths.sampling_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Sampling estimates saved to: {paths.sampling_json}")
+    if tracer is not None:
+        print_trace_summary(tracer.summary())
+        configure_tracing(enabled=False)
+        print(f"Trace written to: {trace_path}")
+
+    return metrics
+
+
+def sampled_chunks(
+    eval_ctx: "EvaluationContext",
+    sampler: "AdaptiveSampler",
+    paths: EvaluationPaths,
+    chunksize: int = 500,
+):
+    """Yield batches of publications in sampling order until the sampler stops.
+
+    The stopping rule is checked before every batch, once the results of the
+    previous one are in. Rows are read ``chunksize`` publications of the
+    order at a time, each with one pass over the dataset.
+    """
+    from golden_dataset import read_publications
+
+    window = None
+    while sampler.check(eval_ctx.judge_requests()) is None:
+        if sampler.drawn:
+            print(sampler.progress_line())
+        start = sampler.drawn
+        ids = sampler.next_batch()
+        if window is None or not set(ids).issubset(window[ID_COLUMN]):
+            window = read_publications(
+                sampler.plan.ordered_ids[start : start + max(chunksize, len(ids))],
+                chunksize=chunksize,
+                parquet_path=paths.dataset_parquet,
+                csv_path=paths.dataset_csv,
+                json_path=paths.dataset_json,
+            )
+        yield window[window[ID_COLUMN].isin(ids)]
+    print(f"Sampling stopped: {sampler.stop_reason}")
+
+
+def write_results(
+    paths: EvaluationPaths,
+    num_publications_to_evaluate: int,
+    cache_stats=None,
+    rate_limit_stats=None,
+    evaluated_only: bool = False,
+    prefilter_stats=None,
+    dedup_stats=None,
+) -> MetricAggregator:
+    """Merges the stored results into the CSV outputs and prints the summary.
+
+    The metric statistics are aggregated while the CSVs are written, so no
+    more than one chunk of results is held in memory.
+    """
+    metrics = MetricAggregator()
+    write_merged_results(
+        paths.results_jsonl,
+        paths.dataset_csv,
+        paths.results_csv,
+        paths.complete_results_csv,
+        num_publications=num_publications_to_evaluate,
+        evaluated_only=evaluated_only,
+        on_result=metrics.update,
+    )
+    print_evaluation_summary(
+        metrics, cache_stats, rate_limit_stats, prefilter_stats, dedup_stats
+    )
+    return metrics
+
+
+def evaluate_shard(
+    run_config: dict,
+    num_publications_to_evaluate: int,
+    shard_index: int,
+    shard_count: int,
+    resume: bool = True,
+    batch: str = None,
+    paths: EvaluationPaths = None,
+) -> dict:
+    """Evaluates one shard in this process with its own clients.
+
+    Returns:
+        dict: The shard's ``cache``, ``rate_limits``, ``prefilter`` and
+        ``dedup`` statistics.
+    """
+    from batch_jobs import get_batch_backend
+    from evaluation_context import build_evaluation_context
+
+    # Spawned workers start from config.yaml; apply the parent's overrides
+    config = configure(run_config)
+    paths = paths or EvaluationPaths()
+    eval_ctx = build_evaluation_context(config, dataset_paths=paths)
+    batch_backend = None
+    if batch:
+        batch_backend = get_batch_backend(
+            batch,
+            eval_ctx.llm,
+            paths.for_shard(shard_index, shard_count).batch_dir,
+            max_concurrency=eval_ctx.max_concurrency,
+        )
+    asyncio.run(
+        evaluate_dataset(
+            num_publications_to_evaluate,
+            eval_ctx,
+            resume=resume,
+            batch_backend=batch_backend,
+            paths=paths,
+            shard_index=shard_index,
+            shard_count=shard_count,
+        )
+    )
+    return {
+        "cache": eval_ctx.cache_stats(),
+        "rate_limits": eval_ctx.rate_limit_stats(),
+        "prefilter": eval_ctx.prefilter_stats(),
+        "dedup": eval_ctx.dedup_stats(),
+    }
+
+
+def merge_shards(
+    num_publications_to_evaluate: int,
+    shard_count: int,
+    paths: EvaluationPaths = None,
+    shard_stats=(),
+) -> MetricAggregator:
+    """Merges the results stores of all shards into the run's outputs.
+
+    The merged store replaces ``paths.results_jsonl``; the results CSVs and
+    summary are then written from it as for an unsharded run. Shards may
+    have been evaluated on other machines, as long as their ``shards/``
+    directories were copied next to the results store.
+    """
+    paths = paths or EvaluationPaths()
+    merged = merge_result_stores(
+        [
+            paths.for_shard(shard_index, shard_count).results_jsonl
+            for shard_index in range(shard_count)
+        ],
+        paths.results_jsonl,
+    )
+    print(f"\nMerged {merged} result records from {shard_count} shards")
+    return write_results(
+        paths,
+        num_publications_to_evaluate,
+        merge_cache_stats([stats["cache"] for stats in shard_stats]),
+        merge_rate_limit_stats([stats["rate_limits"] for stats in shard_stats]),
+        prefilter_stats=merge_prefilter_stats(
+            [stats.get("prefilter", {}) for stats in shard_stats]
+        ),
+        dedup_stats=merge_dedup_stats(
+            [stats.get("dedup", {}) for stats in shard_stats]
+        ),
+    )
+
+
+def evaluate_sharded(
+    num_publications_to_evaluate: int,
+    shard_count: int,
+    resume: bool = True,
+    batch: str = None,
+    paths: EvaluationPaths = None,
+) -> MetricAggregator:
+    """Evaluates the dataset in ``shard_count`` processes and merges the results.
+
+    Each process evaluates one shard with its own event loop and clients, so
+    the per-row Python work (row access, prompt rendering, result building)
+    runs on all cores. The judge rate limits of ``config.yaml`` apply per
+    process; divide them by the shard count to keep the total budget.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=shard_count, mp_context=context) as pool:
+        futures = [
+            pool.submit(
+                evaluate_shard,
+                get_config(),
+                num_publications_to_evaluate,
+                shard_index,
+                shard_count,
+                resume,
+                batch,
+                paths,
+            )
+            for shard_index in range(shard_count)
+        ]
+        shard_stats = [future.result() for future in futures]
+    return merge_shards(num_publications_to_evaluate, shard_count, paths, shard_stats)
+
+
+def main(args) -> None:
+    """Runs the evaluation requested by the parsed command line of ``cli``."""
+    from batch_jobs import get_batch_backend
+    from evaluation_context import build_evaluation_context
+    from sampling import SamplingConfig
+
+    config = get_config()
+    if args.no_llm_cache:
+        config["llm_cache"] = False
+    num_publications_to_evaluate = args.num_publications or config.get(
+        "num_publications_to_evaluate", 2
+    )
+    sampling = None
+    if args.sample or config.get("sampling", False):
+        if args.shard_index is not None or args.shard_count > 1:
+            raise ValueError("Adaptive sampling cannot be combined with sharding")
+        sampling = SamplingConfig.from_config(config)
+
+    if args.merge_shards:
+        merge_shards(num_publications_to_evaluate, args.shard_count)
+    elif args.shard_index is not None:
+        evaluate_shard(
+            config,
+            num_publications_to_evaluate,
+            args.shard_index,
+            args.shard_count,
+            resume=not args.restart,
+            batch=args.batch,
+        )
+    elif args.shard_count > 1:
+        evaluate_sharded(
+            num_publications_to_evaluate,
+            args.shard_count,
+            resume=not args.restart,
+            batch=args.batch,
+        )
+    else:
+        eval_ctx = build_evaluation_context(config)
+        batch_backend = None
+        if args.batch:
+            batch_backend = get_batch_backend(
+                args.batch,
+                eval_ctx.llm,
+                BATCH_DIR,
+                max_concurrency=eval_ctx.max_concurrency,
+            )
+
+        # Evaluate entire dataset
+        asyncio.run(
+            evaluate_dataset(
+                num_publications_to_evaluate,
+                eval_ctx,
+                resume=not args.restart,
+                batch_backend=batch_backend,
+                sampling=sampling,
+            )
+        )
+
+
+if __name__ == "__main__":
+    # cli.py is the faster entry point: it parses the arguments before
+    # importing this module
+    from dotenv import load_dotenv
+
+    from cli import build_parser
+
+    args = build_parser().parse_args()
+    load_dotenv()
+    main(args)
@@ -0,0 +1,345 @@
+"""
+Adaptive sampling: dataset-level metric estimates from as few publications
+as they need.
+
+Instead of the first ``num_publications_to_evaluate`` rows of the CSV, the
+sampling mode evaluates publications in a randomized, stratified order.
+``SamplingPlan`` groups all publications into strata by description length
+(quantile bins; the length drives context truncation and how much the judge
+has to check), shuffles each stratum with a fixed seed and interleaves the
+strata so that every prefix of the order holds each of them in proportion
+to its size.
+
+``StratifiedEstimator`` keeps running statistics per stratum and metric and
+estimates each metric's dataset mean with the stratified estimator and a
+Student t confidence interval (with finite population correction, so the
+interval closes once a stratum is exhausted). Faithfulness and coherence
+scores lie in [0, 1], so their variance per stratum is estimated with one
+pseudo-observation at 0 and one at 1 added (as in the Agresti-Coull
+interval) and their intervals are clipped to [0, 1]: a few identical scores
+do not close the interval. Other metrics (e.g. cosine similarities, which
+can be negative) keep the plain sample variance and wait for
+``MIN_CONSTANT_COUNT`` scores of a stratum before a zero variance counts. The evaluator draws batches
+of publications in order and stops once every requested metric's interval
+half-width is below the target, or the row or judge request budget is
+used up.
+
+Enable it with ``sampling: true`` in ``config.yaml`` or ``--sample``.
+"""
+
+import math
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import stats
+
+from metric_stats import RunningStats, is_score
+
+# Metrics whose intervals must reach the target before sampling stops
+DEFAULT_METRICS = [
+    "title_semantic_similarity_mean",
+    "tldr_semantic_similarity_mean",
+    "references_semantic_similarity_mean",
+    "tags_semantic_similarity",
+    "title_faithfulness_mean",
+    "tldr_faithfulness_mean",
+    "references_faithfulness_mean",
+    "tags_faithfulness",
+    "content_coherence",
+]
+
+# Scores of a stratum needed before a zero sample variance is believed
+MIN_CONSTANT_COUNT = 10
+
+
+@dataclass
+class SamplingConfig:
+    """Stopping rule and draw order of the sampling mode."""
+
+    metrics: List[str] = field(default_factory=lambda: list(DEFAULT_METRICS))
+    target_half_width: float = 0.05
+    confidence: float = 0.95
+    strata: int = 4
+    batch_size: int = 20
+    min_rows: int = 20
+    max_rows: Optional[int] = None
+    # Judge requests sent to the provider; cache hits are free
+    call_budget: Optional[int] = None
+    seed: int = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "SamplingConfig":
+        defaults = cls()
+        return cls(
+            **{
+                name: config.get(f"sampling_{name}", getattr(defaults, name))
+                for name in defaults.__dataclass_fields__
+            }
+        )
+
+
+class SamplingPlan:
+    """Randomized, stratified order of the publications of a dataset."""
+
+    def __init__(self, ids: Sequence[str], strata: Sequence[int], order: Sequence[int]):
+        self.ids = list(ids)
+        self.strata = list(strata)
+        self.order = list(order)
+        self.sizes = np.bincount(self.strata).tolist() if self.strata else []
+        self.ordered_ids = [self.ids[i] for i in self.order]
+
+    @classmethod
+    def build(
+        cls, ids: Sequence[str], lengths: Sequence[int], strata: int = 4, seed: int = 0
+    ) -> "SamplingPlan":
+        """Orders ``ids`` by stratified shuffle of their description ``lengths``."""
+        rng = np.random.default_rng(seed)
+        lengths = np.asarray(lengths, dtype=float)
+        if len(lengths):
+            cutoffs = np.quantile(lengths, np.linspace(0, 1, strata + 1)[1:-1])
+            stratum = np.searchsorted(np.unique(cutoffs), lengths, side="right")
+        else:
+            stratum = np.zeros(0, dtype=int)
+        # Position i of a shuffled stratum of size n sorts at (i + u) / n, with
+        # one random offset u per stratum: a systematic proportional interleave
+        keys = np.empty(len(lengths))
+        for h in np.unique(stratum):
+            members = np.flatnonzero(stratum == h)
+            rng.shuffle(members)
+            keys[members] = (np.arange(len(members)) + rng.random()) / len(members)
+        order = np.argsort(keys, kind="stable")
+        return cls(ids, stratum.tolist(), order.tolist())
+
+    @classmethod
+    def from_dataset(
+        cls, chunks: Iterable, strata: int = 4, seed: int = 0
+    ) -> "SamplingPlan":
+        """Orders every publication of the dataset ``chunks`` (one pass)."""
+        ids, lengths = [], []
+        for chunk in chunks:
+            ids.extend(chunk["publication_external_id"])
+            lengths.extend(chunk["publication_description"].fillna("").str.len())
+        return cls.build(ids, lengths, strata, seed)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def stratum_of(self) -> Dict[str, int]:
+        return dict(zip(self.ids, self.strata))
+
+
+@dataclass
+class Estimate:
+    """Stratified estimate of a metric's dataset mean."""
+
+    mean: float
+    half_width: float
+    low: float
+    high: float
+    count: int
+
+
+def score_range(metric: str) -> Optional[Tuple[float, float]]:
+    """Range of a metric's scores, or None if unknown."""
+    if "faithfulness" in metric or "coherence" in metric:
+        return 0.0, 1.0
+    if "semantic_similarity" in metric:
+        return -1.0, 1.0
+    return None
+
+
+def bounded_variance(stat: RunningStats) -> float:
+    """Sample variance of scores in [0, 1] with a 0 and a 1 added.
+
+    Never zero, so identical scores of a small sample do not make a
+    zero-width interval; the pseudo-observations weigh less as the sample
+    grows.
+    """
+    count = stat.count + 2
+    total = stat.count * stat.mean + 1
+    squares = stat.m2 + stat.count * stat.mean**2 + 1
+    return (squares - total**2 / count) / (count - 1)
+
+
+class StratifiedEstimator:
+    """Running per-stratum statistics of the sampled results."""
+
+    def __init__(
+        self, sizes: Sequence[int], metrics: Iterable[str], confidence: float = 0.95
+    ):
+        self.sizes = list(sizes)
+        self.confidence = confidence
+        self.stats: Dict[str, List[RunningStats]] = {
+            metric: [RunningStats() for _ in self.sizes] for metric in metrics
+        }
+        self.rows = 0
+        # Rows drawn per stratum, whether or not their evaluation succeeds
+        self.drawn = [0] * len(self.sizes)
+
+    def draw(self, stratum: int) -> None:
+        """Counts a row of ``stratum`` dispatched for evaluation."""
+        self.drawn[stratum] += 1
+
+    def update(self, stratum: int, result: Dict[str, Any]) -> None:
+        self.rows += 1
+        for metric, strata in self.stats.items():
+            value = result.get(metric)
+            if is_score(value):
+                strata[stratum].update(float(value))
+
+    def estimate(self, metric: str) -> Estimate:
+        """Stratified mean and t interval; infinitely wide while a stratum lacks data.
+
+        The mean weights the strata sampled so far by their sizes. A stratum
+        whose rows have all been drawn adds no variance (nor does it hold up
+        the interval when none of them has a score).
+        """
+        sampled = [
+            (size, drawn, stat)
+            for size, drawn, stat in zip(self.sizes, self.drawn, self.stats[metric])
+            if stat.count
+        ]
+        count = sum(stat.count for _, _, stat in sampled)
+        if not sampled:
+            return Estimate(math.nan, math.inf, math.nan, math.nan, 0)
+        total = sum(size for size, _, _ in sampled)
+        mean = sum(size / total * stat.mean for size, _, stat in sampled)
+
+        bounds = score_range(metric)
+        unit_interval = bounds == (0.0, 1.0)
+        ready = all(
+            stat.count or drawn >= size
+            for size, drawn, stat in zip(self.sizes, self.drawn, self.stats[metric])
+        )
+        variance = 0.0
+        for size, drawn, stat in sampled:
+            if drawn >= size:
+                continue
+            stratum_variance = bounded_variance(stat) if unit_interval else stat.std**2
+            if stat.count < 2 or (
+                stratum_variance == 0 and stat.count < MIN_CONSTANT_COUNT
+            ):
+                ready = False
+                break
+            correction = 1 - drawn / size
+            variance += (size / total) ** 2 * correction * stratum_variance / stat.count
+        if not ready:
+            half_width = math.inf
+        elif variance == 0:
+            # Every stratum exhausted or constant over many scores
+            half_width = 0.0
+        else:
+            degrees = count - len(sampled)
+            quantile = stats.t.ppf((1 + self.confidence) / 2, degrees)
+            half_width = float(quantile * math.sqrt(variance))
+        low, high = mean - half_width, mean + half_width
+        if bounds is not None:
+            # The mean lies in the range of the scores
+            low, high = max(low, bounds[0]), min(high, bounds[1])
+        return Estimate(float(mean), half_width, low, high, count)
+
+    def estimates(self) -> Dict[str, Estimate]:
+        return {metric: self.estimate(metric) for metric in self.stats}
+
+    def widest(self) -> Tuple[str, float]:
+        """The metric with the widest interval and its half-width."""
+        return max(
+            (
+                (metric, estimate.half_width)
+                for metric, estimate in self.estimates().items()
+            ),
+            key=lambda item: item[1],
+            default=(None, 0.0),
+        )
+
+
+class AdaptiveSampler:
+    """Draws publications in plan order until the estimates are precise enough."""
+
+    def __init__(self, plan: SamplingPlan, config: SamplingConfig):
+        self.plan = plan
+        self.config = config
+        self.estimator = StratifiedEstimator(
+            plan.sizes, config.metrics, config.confidence
+        )
+        self.strata = plan.stratum_of()
+        self.drawn = 0
+        self.judge_calls = 0
+        self.stop_reason: Optional[str] = None
+
+    def update(self, result: Dict[str, Any]) -> None:
+        """Adds the result of a drawn publication."""
+        self.estimator.update(self.strata[result["publication_external_id"]], result)
+
+    def check(self, judge_calls: int = 0) -> Optional[str]:
+        """Why sampling stops now, or None to draw another batch."""
+        self.judge_calls = judge_calls
+        config = self.config
+        if self.drawn >= len(self.plan):
+            self.stop_reason = "dataset exhausted"
+        elif config.max_rows is not None and self.drawn >= config.max_rows:
+            self.stop_reason = "row budget reached"
+        elif config.call_budget is not None and judge_calls >= config.call_budget:
+            self.stop_reason = "judge call budget reached"
+        elif (
+            self.drawn >= config.min_rows
+            and self.estimator.widest()[1] <= config.target_half_width
+        ):
+            self.stop_reason = "target half-width reached"
+        return self.stop_reason
+
+    def next_batch(self) -> List[str]:
+        """Ids of the next batch in plan order."""
+        size = self.config.batch_size
+        if self.config.max_rows is not None:
+            size = min(size, self.config.max_rows - self.drawn)
+        ids = self.plan.ordered_ids[self.drawn : self.drawn + size]
+        self.drawn += len(ids)
+        for pub_id in ids:
+            self.estimator.draw(self.strata[pub_id])
+        return ids
+
+    def progress_line(self) -> str:
+        metric, half_width = self.estimator.widest()
+        return (
+            f"Sampled {self.drawn}/{len(self.plan)} publications: widest interval "
+            f"+/-{half_width:.3f} ({metric}), target "
+            f"+/-{self.config.target_half_width:.3f}"
+        )
+
+    def report(self) -> Dict[str, Any]:
+        """Estimates, intervals and rows consumed, as written to the sampling JSON."""
+        return {
+            "rows_consumed": self.drawn,
+            "rows_with_results": self.estimator.rows,
+            "population": len(self.plan),
+            "stop_reason": self.stop_reason,
+            "judge_calls": self.judge_calls,
+            "strata_sizes": self.plan.sizes,
+            "config": asdict(self.config),
+            "estimates": {
+                metric: asdict(estimate)
+                for metric, estimate in self.estimator.estimates().items()
+            },
+        }
+
+
+def print_sampling_summary(report: Dict[str, Any]) -> None:
+    """Prints the estimates and intervals of a sampling ``report``."""
+    config = report["config"]
+    print("\nADAPTIVE SAMPLING:")
+    print("-" * 50)
+    print(
+        f"Evaluated {report['rows_consumed']} of {report['population']} publications "
+        f"({report['stop_reason']}), {report['judge_calls']} judge requests"
+    )
+    print(
+        f"{config['confidence']:.0%} intervals, target half-width "
+        f"{config['target_half_width']:.3f}:"
+    )
+    for metric, estimate in report["estimates"].items():
+        print(
+            f"  {metric}: {estimate['mean']:.3f} +/- {estimate['half_width']:.3f} "
+            f"[{estimate['low']:.3f}, {estimate['high']:.3f}] (n={estimate['count']})"
+        )
@@ -0,0 +1,52 @@
+"""
+Helpers for running evaluation work concurrently with bounded fan-out.
+"""
+
+import asyncio
+from contextlib import nullcontext
+from typing import Awaitable, Callable, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def bounded(limiter: Optional[asyncio.Semaphore], awaitable: Awaitable[R]) -> R:
+    """Awaits ``awaitable`` while holding a slot of ``limiter``.
+
+    Args:
+        limiter: Semaphore shared by every network-bound call of a run, or None
+            to run without a limit.
+        awaitable: The call to run.
+
+    Returns:
+        The result of the awaitable.
+    """
+    async with limiter if limiter is not None else nullcontext():
+        return await awaitable
+
+
+async def map_bounded(
+    func: Callable[[T], Awaitable[R]], items: Iterable[T], limit: int
+) -> List[R]:
+    """Applies an async function to every item with at most ``limit`` in flight.
+
+    Items are pulled lazily by a fixed pool of workers, so only ``limit``
+    coroutines exist at any time regardless of how many items there are.
+
+    Args:
+        func: Coroutine function applied to each item.
+        items: Items to process.
+        limit: Maximum number of items processed concurrently.
+
+    Returns:
+        Results in the same order as ``items``.
+    """
+    results = {}
+    iterator = iter(enumerate(items))
+
+    async def worker():
+        for position, item in iterator:
+            results[position] = await func(item)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, limit))))
+    return [results[position] for position in range(len(results))]
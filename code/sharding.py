@@ -0,0 +1,120 @@
+"""
+Partitioning of the golden dataset into shards evaluated independently.
+
+A publication belongs to shard ``hash(publication_external_id) % shard_count``,
+using a stable hash, so every process or machine given the same shard count
+agrees on the partition without coordination and shards stay balanced
+however the dataset is ordered. Each shard writes its own results store
+(see ``EvaluationPaths.for_shard``); the stores are then merged into the
+run's store, from which the usual results CSVs are written.
+"""
+
+import hashlib
+import os
+from typing import TYPE_CHECKING, Dict, Iterable, List
+
+import numpy as np
+
+from results_store import reset_results
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def shard_of(publication_id: str, shard_count: int) -> int:
+    """Returns the shard a publication belongs to."""
+    digest = hashlib.blake2b(str(publication_id).encode("utf-8"), digest_size=8)
+    return int.from_bytes(digest.digest(), "big") % shard_count
+
+
+def shard_mask(
+    publication_ids: "pd.Series", shard_index: int, shard_count: int
+) -> np.ndarray:
+    """Boolean mask of the ids that belong to shard ``shard_index``."""
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(
+            f"shard index {shard_index} is out of range for {shard_count} shards"
+        )
+    return np.fromiter(
+        (shard_of(pub_id, shard_count) == shard_index for pub_id in publication_ids),
+        dtype=bool,
+        count=len(publication_ids),
+    )
+
+
+def merge_result_stores(shard_paths: Iterable[str], path: str) -> int:
+    """Writes the records of the shard results stores into one store.
+
+    ``path`` is replaced. Records keep their order within each shard, so the
+    latest record of a publication still wins. A partially written last line
+    of a shard store is dropped.
+
+    Returns:
+        int: Number of records written.
+    """
+    reset_results(path)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    with open(path, "wb") as merged:
+        for shard_path in shard_paths:
+            if not os.path.exists(shard_path):
+                print(f"Warning: no results found for shard at {shard_path}")
+                continue
+            with open(shard_path, "rb") as shard:
+                for line in shard:
+                    if line.endswith(b"\n"):
+                        merged.write(line)
+                        written += 1
+    return written
+
+
+def merge_cache_stats(
+    shard_stats: List[Dict[str, Dict[str, float]]],
+) -> Dict[str, Dict[str, float]]:
+    """Combines the ``cache_stats()`` of several shard processes."""
+    merged = {}
+    for stats in shard_stats:
+        for name, stat in stats.items():
+            total = merged.setdefault(name, {"hits": 0, "misses": 0, "entries": 0})
+            total["hits"] += stat["hits"]
+            total["misses"] += stat["misses"]
+            # The shards share the cache file; the last one saw all entries
+            total["entries"] = max(total["entries"], stat["entries"])
+    for total in merged.values():
+        lookups = total["hits"] + total["misses"]
+        total["hit_rate"] = total["hits"] / lookups if lookups else 0.0
+    return merged
+
+
+def _sum_stats(
+    shard_stats: List[Dict[str, Dict[str, float]]],
+) -> Dict[str, Dict[str, float]]:
+    merged = {}
+    for stats in shard_stats:
+        for metric, stat in stats.items():
+            total = merged.setdefault(metric, dict.fromkeys(stat, 0))
+            for key, value in stat.items():
+                total[key] += value
+    return merged
+
+
+def merge_rate_limit_stats(
+    shard_stats: List[Dict[str, Dict[str, float]]],
+) -> Dict[str, Dict[str, float]]:
+    """Sums the per-metric ``rate_limit_stats()`` of several shard processes."""
+    return dict(sorted(_sum_stats(shard_stats).items()))
+
+
+def merge_prefilter_stats(
+    shard_stats: List[Dict[str, Dict[str, int]]],
+) -> Dict[str, Dict[str, int]]:
+    """Sums the ``prefilter_stats()`` of several shard processes."""
+    return _sum_stats(shard_stats)
+
+
+def merge_dedup_stats(
+    shard_stats: List[Dict[str, Dict[str, int]]],
+) -> Dict[str, Dict[str, int]]:
+    """Sums the ``dedup_stats()`` of several shard processes."""
+    return _sum_stats(shard_stats)
@@ -0,0 +1,458 @@
+"""
+Lightweight tracing of the evaluator's hot path.
+
+``span(name, **attributes)`` times a block of (async) work and nests under
+the span that is current in the calling task, so every publication gets a
+tree of metric spans and, below them, one ``llm`` span per judge request
+(recorded by ``LLMSpanHandler``). Counters added with ``record`` (tokens,
+cache hits, retries, throttle time) accumulate on the current span and all
+its ancestors, so a metric span carries the totals of its judge requests.
+
+Finished spans are streamed to a file as JSONL (one span per line) or as
+OTLP/JSON (one ``ExportTraceServiceRequest`` per line, the format of the
+OpenTelemetry Collector's file exporter), and their durations are summarized
+per (span name, field) for the p50/p95/total summary in bounded memory
+(``metric_stats.MetricStats``: running totals and a quantile sketch).
+
+Usage:
+    python code/tracing.py outputs/traces/evaluation-20260101T000000.jsonl
+"""
+
+import argparse
+import json
+import os
+import secrets
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+
+from metric_stats import MetricStats
+
+if TYPE_CHECKING:
+    # Only the summaries need pandas; spans are recorded without it
+    import pandas as pd
+
+# Attributes copied from a span to the spans started below it
+INHERITED_ATTRIBUTES = ("publication_external_id", "field")
+
+SERVICE_NAME = "publication-evaluator"
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent: Optional["Span"] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def record(self, **counters: float) -> None:
+        """Adds to numeric attributes of this span and its ancestors."""
+        span = self
+        while span is not None:
+            for key, value in counters.items():
+                span.attributes[key] = span.attributes.get(key, 0) + value
+            span = span.parent
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent.span_id if self.parent else None,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": "ERROR" if self.error else "OK",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+def otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, (int, np.integer)):
+        return {"intValue": str(int(value))}
+    if isinstance(value, (float, np.floating)):
+        return {"doubleValue": float(value)}
+    return {"stringValue": str(value)}
+
+
+def otlp_span(span: Span) -> Dict[str, Any]:
+    """Span in the OTLP/JSON encoding."""
+    data = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [
+            {"key": key, "value": otlp_value(value)}
+            for key, value in span.attributes.items()
+        ],
+        # STATUS_CODE_OK / STATUS_CODE_ERROR
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent is not None:
+        data["parentSpanId"] = span.parent.span_id
+    return data
+
+
+class SpanFileExporter:
+    """Appends finished spans to a JSONL or OTLP/JSON file in batches."""
+
+    def __init__(self, path: str, fmt: str = "jsonl", batch_size: int = 512):
+        if fmt not in ("jsonl", "otlp"):
+            raise ValueError(f"Unknown trace format: {fmt}")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self._buffer: List[Span] = []
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        self._buffer.append(span)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        if self.fmt == "jsonl":
+            for span in self._buffer:
+                self._file.write(json.dumps(span.to_dict(), default=str) + "\n")
+        else:
+            request = {
+                "resourceSpans": [
+                    {
+                        "resource": {
+                            "attributes": [
+                                {
+                                    "key": "service.name",
+                                    "value": {"stringValue": SERVICE_NAME},
+                                }
+                            ]
+                        },
+                        "scopeSpans": [
+                            {
+                                "scope": {"name": __name__},
+                                "spans": [otlp_span(span) for span in self._buffer],
+                            }
+                        ],
+                    }
+                ]
+            }
+            self._file.write(json.dumps(request) + "\n")
+        self._file.flush()
+        self._buffer.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+class Tracer:
+    """
+    Creates spans, hands them to an exporter and keeps their durations.
+
+    A disabled tracer still runs the traced code but records nothing.
+    """
+
+    def __init__(self, exporter: Optional[SpanFileExporter] = None, enabled=True):
+        self.exporter = exporter
+        self.enabled = enabled
+        self.trace_id = secrets.token_hex(16)
+        self._durations: Dict[tuple, MetricStats] = defaultdict(MetricStats)
+        self._counters: Dict[tuple, Dict[str, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+
+    def start_span(
+        self, name: str, parent: Optional[Span] = None, **attributes: Any
+    ) -> Span:
+        if parent is not None:
+            inherited = {
+                key: parent.attributes[key]
+                for key in INHERITED_ATTRIBUTES
+                if key in parent.attributes
+            }
+            attributes = {**inherited, **attributes}
+        return Span(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=secrets.token_hex(8),
+            parent=parent,
+            attributes=attributes,
+        )
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None) -> None:
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        key = (span.name, span.attributes.get("field", ""))
+        self._durations[key].update(span.duration)
+        counters = self._counters[key]
+        for name, value in span.attributes.items():
+            if name not in INHERITED_ATTRIBUTES and isinstance(value, (int, float)):
+                counters[name] += value
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    def summary(self) -> "pd.DataFrame":
+        """Count, p50, p95 and total seconds plus summed counters per span name and field."""
+        return summarize(
+            self._durations,
+            {key: dict(counters) for key, counters in self._counters.items()},
+        )
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+_tracer = Tracer(enabled=False)
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def configure_tracing(
+    path: Optional[str] = None, fmt: str = "jsonl", enabled: bool = True
+) -> Tracer:
+    """Replaces the process-wide tracer.
+
+    Args:
+        path: File the spans are exported to, or None to only keep the summary
+        fmt: ``jsonl`` or ``otlp``
+        enabled: False to turn tracing off
+    """
+    global _tracer
+    _tracer.close()
+    exporter = SpanFileExporter(path, fmt) if enabled and path else None
+    _tracer = Tracer(exporter, enabled=enabled)
+    return _tracer
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Traces the enclosed block as a child of the current span."""
+    tracer = _tracer
+    if not tracer.enabled:
+        yield None
+        return
+    current = tracer.start_span(name, current_span.get(), **attributes)
+    token = current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        tracer.end_span(current, error=e)
+        raise
+    else:
+        tracer.end_span(current)
+    finally:
+        current_span.reset(token)
+
+
+def record(**counters: float) -> None:
+    """Adds counters (tokens, retries, ...) to the current span and its ancestors."""
+    current = current_span.get()
+    if current is not None:
+        current.record(**counters)
+
+
+# Open ``llm`` spans by LangChain run id
+_llm_spans: Dict[UUID, Span] = {}
+
+
+def record_llm_run(run_id: Optional[UUID], **counters: float) -> None:
+    """Adds counters to the ``llm`` span of a chat model run (else the current span)."""
+    llm_span = _llm_spans.get(run_id) if run_id is not None else None
+    if llm_span is not None:
+        llm_span.record(**counters)
+    else:
+        record(**counters)
+
+
+class LLMSpanHandler(BaseCallbackHandler):
+    """
+    Opens an ``llm`` span per chat model request, below the span current in
+    the calling task, and records its token usage and cache hits.
+    """
+
+    # Called in the caller's task so that ``current_span`` is visible
+    run_inline = True
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        tracer = _tracer
+        if tracer.enabled:
+            _llm_spans[run_id] = tracer.start_span("llm", current_span.get())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        llm_span = _llm_spans.pop(run_id, None)
+        if llm_span is None:
+            return
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                metadata = getattr(message, "response_metadata", None) or {}
+                cached = bool(metadata.get("cache_hit"))
+                details = usage.get("input_token_details") or {}
+                llm_span.record(
+                    requests=1,
+                    cache_hits=int(cached),
+                    input_tokens=0 if cached else usage.get("input_tokens", 0),
+                    # Input tokens served from the provider's prompt cache
+                    prompt_cached_tokens=(
+                        0 if cached else details.get("cache_read") or 0
+                    ),
+                    output_tokens=0 if cached else usage.get("output_tokens", 0),
+                )
+        _tracer.end_span(llm_span)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        llm_span = _llm_spans.pop(run_id, None)
+        if llm_span is not None:
+            llm_span.record(requests=1, errors=1)
+            _tracer.end_span(llm_span, error=error)
+
+
+def summarize(
+    durations: Dict[tuple, MetricStats], counters: Dict[tuple, Dict[str, float]]
+) -> "pd.DataFrame":
+    """Tabulates span durations (and optional counters) by span name and field."""
+    import pandas as pd
+
+    if not durations:
+        return pd.DataFrame()
+    summary = pd.DataFrame(
+        [
+            {
+                "count": stat.stats.count,
+                "p50": stat.sketch.quantile(0.5),
+                "p95": stat.sketch.quantile(0.95),
+                "total": stat.stats.mean * stat.stats.count,
+            }
+            for stat in durations.values()
+        ],
+        index=pd.MultiIndex.from_tuples(list(durations), names=["name", "field"]),
+    )
+    for column in [
+        "requests",
+        "input_tokens",
+        "prompt_cached_tokens",
+        "output_tokens",
+        "cache_hits",
+        "retries",
+    ]:
+        summary[column] = [
+            counters.get(key, {}).get(column, 0) for key in summary.index.to_list()
+        ]
+    return summary.sort_values("total", ascending=False)
+
+
+def print_trace_summary(summary: "pd.DataFrame") -> None:
+    """Prints the latency profile of ``Tracer.summary``."""
+    if summary.empty:
+        return
+    print("\nLATENCY PROFILE:")
+    print("-" * 50)
+    print(
+        f"{'span':<28}{'field':<12}{'count':>7}{'p50 (s)':>9}{'p95 (s)':>9}"
+        f"{'total (s)':>11}{'tokens in':>11}{'in cached':>10}{'tokens out':>11}"
+        f"{'cached':>8}{'retries':>9}"
+    )
+    for (name, field_name), row in summary.iterrows():
+        # Share of the input tokens the provider served from its prompt cache
+        prompt_cached = (
+            row["prompt_cached_tokens"] / row["input_tokens"]
+            if row["input_tokens"]
+            else 0.0
+        )
+        print(
+            f"{name:<28}{field_name:<12}{row['count']:>7.0f}{row['p50']:>9.3f}"
+            f"{row['p95']:>9.3f}{row['total']:>11.2f}{row['input_tokens']:>11,.0f}"
+            f"{prompt_cached:>10.1%}{row['output_tokens']:>11,.0f}"
+            f"{row['cache_hits']:>8.0f}{row['retries']:>9.0f}"
+        )
+
+
+def from_otlp_value(value: Dict[str, Any]) -> Any:
+    if "intValue" in value:
+        return int(value["intValue"])
+    if "doubleValue" in value:
+        return float(value["doubleValue"])
+    if "boolValue" in value:
+        return bool(value["boolValue"])
+    return value.get("stringValue")
+
+
+def read_trace(path: str) -> Iterator[Dict[str, Any]]:
+    """Yields the spans of a JSONL or OTLP/JSON trace file as JSONL-style dicts."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            if "resourceSpans" not in data:
+                yield data
+                continue
+            for resource in data["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    for otlp in scope["spans"]:
+                        start = int(otlp["startTimeUnixNano"])
+                        end = int(otlp["endTimeUnixNano"])
+                        yield {
+                            "name": otlp["name"],
+                            "duration_ms": (end - start) / 1e6,
+                            "attributes": {
+                                a["key"]: from_otlp_value(a["value"])
+                                for a in otlp["attributes"]
+                            },
+                        }
+
+
+def summarize_trace_file(path: str) -> "pd.DataFrame":
+    durations: Dict[tuple, MetricStats] = defaultdict(MetricStats)
+    counters: Dict[tuple, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for data in read_trace(path):
+        attributes = data.get("attributes") or {}
+        key = (data["name"], attributes.get("field", ""))
+        durations[key].update(data["duration_ms"] / 1000)
+        for name, value in attributes.items():
+            if name not in INHERITED_ATTRIBUTES and isinstance(value, (int, float)):
+                counters[key][name] += value
+    return summarize(durations, counters)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Print the latency profile of an evaluation trace file."
+    )
+    parser.add_argument("path", help="JSONL or OTLP/JSON trace file")
+    print_trace_summary(summarize_trace_file(parser.parse_args().path))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,54 @@
 import os
 import json
 import yaml
-import pandas as pd
+from metric_stats import MetricAggregator
+from prefilter import escalation_rate
+from work_plan import dedup_ratio
 from paths import (
     DATA_DIR,
     CONFIG_FILE_PATH,
     GOLDEN_DATASET_CSV,
     GOLDEN_DATASET_JSON,
-    EVALUATION_RESULTS_CSV,
-    COMPLETE_EVALUATION_RESULTS_CSV,
 )
 
+# Separator of the tags in the golden dataset's tag columns
+TAG_SEPARATOR = "|"
 
-def truncate_context(text, max_tokens=8000):
+
+def load_dataset(csv_path=GOLDEN_DATASET_CSV, num_publications_to_evaluate: int = 2):
     """
-    Truncate context to fit within token limits.
-    Rough estimation: 1 token ≈ 4 characters for English text.
+    Load the main evaluation dataset.
 
     Args:
-        text: Input text to truncate
-        max_tokens: Maximum number of tokens allowed
+        csv_path: Path to the CSV file
 
     Returns:
-        Truncated text string
+        pandas.DataFrame: Loaded dataset
     """
-    if not text:
-        return ""
+    import pandas as pd
 
-    max_chars = max_tokens * 4  # Conservative estimate
-    if len(text) <= max_chars:
-        return text
-
-    # Truncate and try to end at a sentence boundary
-    truncated = text[:max_chars]
-    last_period = truncated.rfind(".")
-    if last_period > max_chars * 0.8:  # If we can find a period in the last 20%
-        return truncated[: last_period + 1]
-    else:
-        return truncated + "..."
+    return pd.read_csv(csv_path, nrows=num_publications_to_evaluate)
 
 
-def load_dataset(csv_path=GOLDEN_DATASET_CSV, num_publications_to_evaluate: int = 2):
+def iter_dataset_chunks(
+    csv_path=GOLDEN_DATASET_CSV, num_publications_to_evaluate=None, chunksize=500
+):
     """
-    Load the main evaluation dataset.
+    Stream the evaluation dataset in chunks of rows.
 
     Args:
         csv_path: Path to the CSV file
+        num_publications_to_evaluate: Only read the first N rows (all if None)
+        chunksize: Number of rows per chunk
 
     Returns:
-        pandas.DataFrame: Loaded dataset
+        Iterator of pandas.DataFrame chunks
     """
+    import pandas as pd
 
-    return pd.read_csv(csv_path, nrows=num_publications_to_evaluate)
+    return pd.read_csv(
+        csv_path, nrows=num_publications_to_evaluate, chunksize=chunksize
+    )
 
 
 def load_publication_descriptions(json_path=GOLDEN_DATASET_JSON):
@@ -100,9 +97,14 @@ def print_evaluation_scores(result):
         ("TLDR Faithfulness", "tldr_faithfulness_mean"),
         ("References Semantic", "references_semantic_similarity_mean"),
         ("References Jaccard", "references_jaccard_similarity"),
+        (
+            "References Jaccard (normalized URLs)",
+            "references_normalized_jaccard_similarity",
+        ),
         ("References Faithfulness", "references_faithfulness_mean"),
         ("Tags Semantic", "tags_semantic_similarity"),
         ("Tags Jaccard", "tags_jaccard_similarity"),
+        ("Tags Jaccard (fuzzy)", "tags_fuzzy_jaccard_similarity"),
         ("Tags Faithfulness", "tags_faithfulness"),
     ]
 
@@ -111,84 +113,35 @@ def print_evaluation_scores(result):
         print(f"  {name}: {format_score(score)}")
 
 
-def save_evaluation_results(results, df):
-    """
-    Save evaluation results to CSV files.
-
-    Args:
-        results: List of result dictionaries
-        df: Original DataFrame
-
-    Returns:
-        tuple: (results_df, complete_results_df)
-    """
-    # Convert results to DataFrame
-    results_df = pd.DataFrame(results)
-
-    # Merge with original data for complete results
-    complete_results = df.merge(results_df, on="publication_external_id", how="left")
-
-    # Save results using paths from paths.py
-    results_df.to_csv(EVALUATION_RESULTS_CSV, index=False)
-    complete_results.to_csv(COMPLETE_EVALUATION_RESULTS_CSV, index=False)
-
-    return results_df, complete_results
-
-
-def calculate_metric_statistics(results_df):
-    """
-    Calculate statistics for all evaluation metrics.
-
-    Args:
-        results_df: DataFrame containing evaluation results
-
-    Returns:
-        dict: Statistics for each metric
-    """
-    metric_columns = [
-        "title_semantic_similarity_mean",
-        "tldr_semantic_similarity_mean",
-        "references_semantic_similarity_mean",
-        "tags_semantic_similarity",
-        "references_jaccard_similarity",
-        "tags_jaccard_similarity",
-        "title_faithfulness_mean",
-        "tldr_faithfulness_mean",
-        "references_faithfulness_mean",
-        "tags_faithfulness",
-    ]
-
-    stats = {}
-    for col in metric_columns:
-        non_null_values = results_df[col].dropna()
-        if len(non_null_values) > 0:
-            stats[col] = {
-                "count": len(non_null_values),
-                "mean": non_null_values.mean(),
-                "std": non_null_values.std(),
-                "min": non_null_values.min(),
-                "max": non_null_values.max(),
-            }
-
-    return stats
-
-
-def print_evaluation_summary(results_df):
+def print_evaluation_summary(
+    results,
+    cache_stats=None,
+    rate_limit_stats=None,
+    prefilter_stats=None,
+    dedup_stats=None,
+):
     """
     Print comprehensive evaluation summary.
 
     Args:
-        results_df: DataFrame containing evaluation results
+        results: MetricAggregator fed with the results, or a DataFrame of them
+        cache_stats: Optional mapping from cache name to its hit/miss statistics
+        rate_limit_stats: Optional mapping from metric name to its judge request statistics
+        prefilter_stats: Optional mapping from judged metric to its pre-filter decision counts
+        dedup_stats: Optional mapping from kind of scoring work to its deduplication counts
     """
+    if not isinstance(results, MetricAggregator):
+        results = MetricAggregator.from_frame(results)
+
     print("\n" + "=" * 70)
     print("EVALUATION SUMMARY")
     print("=" * 70)
-    print(f"Total Publications Evaluated: {len(results_df)}")
+    print(f"Total Publications Evaluated: {results.results}")
     print(f"Results saved to: evaluation_results.csv")
     print(f"Complete results saved to: complete_evaluation_results.csv")
 
     # Calculate and display statistics
-    stats = calculate_metric_statistics(results_df)
+    stats = results.summary()
 
     print("\nMETRIC STATISTICS:")
     print("-" * 50)
@@ -199,6 +152,50 @@ def print_evaluation_summary(results_df):
         print(f"  Mean:  {stat['mean']:.3f}")
         print(f"  Std:   {stat['std']:.3f}")
         print(f"  Range: {stat['min']:.3f} - {stat['max']:.3f}")
+        print(
+            f"  Median: {stat['p50']:.3f} (p05 {stat['p05']:.3f}, p95 {stat['p95']:.3f})"
+        )
+
+    if cache_stats:
+        print("\nCACHE STATISTICS:")
+        print("-" * 50)
+        for name, stat in cache_stats.items():
+            print(
+                f"{name}: {stat['hits']} hits, {stat['misses']} misses "
+                f"({stat['hit_rate']:.1%} hit rate), {stat['entries']} entries"
+            )
+
+    if rate_limit_stats:
+        print("\nRATE LIMITING:")
+        print("-" * 50)
+        for metric, stat in rate_limit_stats.items():
+            print(
+                f"{metric}: {stat['requests']} requests, {stat['retries']} retries "
+                f"({stat['rate_limited']} rate limited), {stat['failures']} failed, "
+                f"{stat['throttle_wait']:.1f}s throttled, "
+                f"{stat['backoff_wait']:.1f}s backing off"
+            )
+
+    if prefilter_stats:
+        print("\nPRE-FILTER:")
+        print("-" * 50)
+        for metric, stat in prefilter_stats.items():
+            print(
+                f"{metric}: {stat['high']} decided high, {stat['low']} decided low, "
+                f"{stat['escalated']} escalated to the judge "
+                f"({escalation_rate(stat):.1%} escalation rate)"
+            )
+
+    if dedup_stats:
+        print("\nDEDUPLICATION:")
+        print("-" * 50)
+        for kind, stat in dedup_stats.items():
+            print(
+                f"{kind}: {stat['units']} units, {stat['unique']} unique "
+                f"({dedup_ratio(stat):.2f}x dedup ratio), "
+                f"{stat['judge_calls_saved']} judge and "
+                f"{stat['embedding_calls_saved']} embedding calls saved"
+            )
 
 
 def initialize_result_dict(publication_id):
@@ -218,7 +215,9 @@ def initialize_result_dict(publication_id):
         "references_semantic_similarity_mean": None,
         "tags_semantic_similarity": None,
         "references_jaccard_similarity": None,
+        "references_normalized_jaccard_similarity": None,
         "tags_jaccard_similarity": None,
+        "tags_fuzzy_jaccard_similarity": None,
         "title_faithfulness_mean": None,
         "tldr_faithfulness_mean": None,
         "references_faithfulness_mean": None,
@@ -239,7 +238,7 @@ def prepare_text_for_semantic_similarity(text, field_type=None):
     """
     text = str(text)
     if field_type == "tags":
-        text = text.replace("|", ", ")
+        text = text.replace(TAG_SEPARATOR, ", ")
     return text
 
 
@@ -0,0 +1,137 @@
+"""
+Cross-row deduplication of scoring work.
+
+Before a chunk of publications is evaluated, ``plan_work`` (in the evaluator)
+collects every unit of scoring work of its rows, keyed by the unit's
+inputs: the semantic similarity of a candidate to its reference, the
+faithfulness of a candidate to the publication context (or of all fields
+of a publication at once in combined mode) and the content coherence of a
+publication. The same tags, titles or references generated for several
+publications, or repeated candidates of one publication, then share a key.
+
+``SharedWork`` runs each key that more than one row asks for once, hands
+its result to every one of them and forgets it after the last; keys with a
+single consumer run directly. Identical inputs get the same scores they
+would have gotten from a deterministic judge, with one set of model calls.
+"""
+
+import asyncio
+import json
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict
+
+from cache_store import content_key
+
+# Model calls one unit of each kind makes: the ragas semantic similarity
+# embeds both texts, per-field faithfulness extracts statements and then
+# verifies them (texts without statements skip the second call)
+CALLS_PER_UNIT = {
+    "semantic_similarity": ("embedding", 2),
+    "faithfulness": ("judge", 2),
+    "combined_faithfulness": ("judge", 1),
+    "content_coherence": ("judge", 1),
+}
+
+
+def unit_key(kind: str, *inputs) -> str:
+    """Key of a unit of scoring work from its kind and JSON-serializable inputs."""
+    return content_key(
+        kind, *(json.dumps(part, sort_keys=True, default=str) for part in inputs)
+    )
+
+
+class WorkPlan:
+    """Units of scoring work of a chunk, with the number of rows asking for each."""
+
+    def __init__(self):
+        self.consumers = Counter()
+        self.kinds = {}
+
+    def add(self, kind: str, key: str) -> None:
+        self.consumers[key] += 1
+        self.kinds[key] = kind
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Units, unique units and model calls saved by deduplication, by kind."""
+        stats = {}
+        for key, consumers in self.consumers.items():
+            stat = stats.setdefault(
+                self.kinds[key],
+                {
+                    "units": 0,
+                    "unique": 0,
+                    "judge_calls_saved": 0,
+                    "embedding_calls_saved": 0,
+                },
+            )
+            stat["units"] += consumers
+            stat["unique"] += 1
+            calls, per_unit = CALLS_PER_UNIT[self.kinds[key]]
+            stat[f"{calls}_calls_saved"] += (consumers - 1) * per_unit
+        return stats
+
+    def summary_line(self) -> str:
+        units = sum(self.consumers.values())
+        unique = len(self.consumers)
+        stats = self.stats().values()
+        judge = sum(stat["judge_calls_saved"] for stat in stats)
+        embedding = sum(stat["embedding_calls_saved"] for stat in stats)
+        return (
+            f"Planned {units} scoring units, {unique} unique "
+            f"({dedup_ratio({'units': units, 'unique': unique}):.2f}x); "
+            f"saves {judge} judge and {embedding} embedding calls"
+        )
+
+
+def dedup_ratio(stat: Dict[str, int]) -> float:
+    """Units per unique unit (1.0 without duplicates)."""
+    return stat["units"] / stat["unique"] if stat["unique"] else 1.0
+
+
+class SharedWork:
+    """
+    Runs the units of scoring work of planned chunks, each duplicated key
+    once. Keeps the run's deduplication statistics across chunks.
+    """
+
+    def __init__(self):
+        self.remaining = Counter()
+        self.futures: Dict[str, asyncio.Future] = {}
+        self.totals: Dict[str, Dict[str, int]] = {}
+
+    def add(self, plan: WorkPlan) -> None:
+        """Expects the consumers of ``plan`` and counts its units."""
+        for key, consumers in plan.consumers.items():
+            if consumers > 1:
+                self.remaining[key] += consumers
+        for kind, stat in plan.stats().items():
+            total = self.totals.setdefault(kind, dict.fromkeys(stat, 0))
+            for name, value in stat.items():
+                total[name] += value
+
+    def clear(self) -> None:
+        """Forgets the results of a finished chunk that some consumer never asked for.
+
+        E.g. units of a row whose evaluation failed before it reached them.
+        """
+        self.remaining.clear()
+        self.futures.clear()
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of the unit ``key``, computed by ``factory()`` on first request."""
+        if key not in self.remaining:
+            # Planned for one consumer (or not at all)
+            return await factory()
+        future = self.futures.get(key)
+        if future is None:
+            future = self.futures[key] = asyncio.ensure_future(factory())
+        self.remaining[key] -= 1
+        if self.remaining[key] == 0:
+            del self.remaining[key]
+            del self.futures[key]
+        # A cancelled consumer must not cancel the unit for the others
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Planned units, unique units and calls saved of every chunk, by kind."""
+        return {kind: dict(stat) for kind, stat in self.totals.items()}